@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'PatasNaRua.settings')
 
 application = get_asgi_application()
+
+# Monta o filtro de disponibilidade (cadlog.disponibilidade) em segundo plano ao subir.
+from cadlog.disponibilidade import indice_disponibilidade  # noqa: E402
+
+indice_disponibilidade.preparar()
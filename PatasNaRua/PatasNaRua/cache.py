@@ -0,0 +1,254 @@
+from collections import OrderedDict
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+CANAL_INVALIDACAO = 'patasnarua:cache:l1'
+_ausente = object()
+
+
+class _LRU:
+    def __init__(self, max_itens):
+        self.max_itens = max_itens
+        self.itens = OrderedDict()
+        self.trava = threading.Lock()
+
+    def obter(self, chave):
+        with self.trava:
+            item = self.itens.get(chave)
+            if item is None:
+                return _ausente
+            valor, expira_em = item
+            if expira_em <= time.monotonic():
+                del self.itens[chave]
+                return _ausente
+            self.itens.move_to_end(chave)
+            return valor
+
+    def guardar(self, chave, valor, ttl):
+        with self.trava:
+            self.itens[chave] = (valor, time.monotonic() + ttl)
+            self.itens.move_to_end(chave)
+            while len(self.itens) > self.max_itens:
+                self.itens.popitem(last=False)
+
+    def descartar(self, chave):
+        with self.trava:
+            self.itens.pop(chave, None)
+
+    def limpar(self):
+        with self.trava:
+            self.itens.clear()
+
+
+class CacheEmCamadas(BaseCache):
+    """
+    L1 em memória do processo (LRU com limite de itens e TTL curto) na frente
+    de um L2 compartilhado, que é outro alias de CACHES (normalmente o Redis).
+
+    Toda escrita vai para o L2 e, se a chave pode estar no L1, publica a chave
+    no canal de invalidação, para os outros processos descartarem a cópia.
+    Como uma mensagem pode se perder (reconexão, corrida entre leitura e
+    invalidação), o L1_TTL limita por quanto tempo um processo pode enxergar
+    um valor antigo. Chaves que começam com um dos prefixos de SOMENTE_L2
+    nunca passam pelo L1 nem geram invalidações.
+
+    OPTIONS: L2 (alias), L1_MAX_ITENS, L1_TTL (segundos), SOMENTE_L2 (prefixos).
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        opcoes = params.get('OPTIONS', {})
+        self.alias_l2 = opcoes['L2']
+        self.l1_ttl = opcoes.get('L1_TTL', 5)
+        self.somente_l2 = tuple(opcoes.get('SOMENTE_L2', ()))
+        self.l1 = _LRU(opcoes.get('L1_MAX_ITENS', 1000))
+        self.origem = uuid.uuid4().hex
+        self._conexao = _ausente
+        self._assinatura = None
+        self._trava_assinatura = threading.Lock()
+
+    @property
+    def l2(self):
+        return caches[self.alias_l2]
+
+    def _redis(self):
+        if self._conexao is _ausente:
+            try:
+                from django_redis import get_redis_connection
+                self._conexao = get_redis_connection(self.alias_l2)
+            except (ImportError, NotImplementedError):
+                self._conexao = None
+        return self._conexao
+
+    def _usa_l1(self, key):
+        return not key.startswith(self.somente_l2)
+
+    def _garantir_assinatura(self):
+        if self._assinatura is not None:
+            return
+        with self._trava_assinatura:
+            if self._assinatura is not None:
+                return
+            conexao = self._redis()
+            if conexao is None:
+                # L2 local (testes/dev): só existe este processo, não há a quem avisar.
+                self._assinatura = False
+                return
+            self._assinatura = threading.Thread(
+                target=self._ouvir_invalidacoes, args=(conexao,), daemon=True, name='cache-l1'
+            )
+            self._assinatura.start()
+
+    def _ouvir_invalidacoes(self, conexao):
+        while True:
+            try:
+                pubsub = conexao.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(CANAL_INVALIDACAO)
+                # O que foi publicado enquanto estávamos desconectados se perdeu.
+                self.l1.limpar()
+                for mensagem in pubsub.listen():
+                    origem, _, chave = mensagem['data'].decode().partition(' ')
+                    if origem == self.origem:
+                        continue
+                    if chave == '*':
+                        self.l1.limpar()
+                    else:
+                        self.l1.descartar(chave)
+            except Exception as e:
+                logger.warning(f'Assinatura de invalidação do cache caiu: {e}')
+                time.sleep(1)
+
+    def _invalidar(self, *chaves):
+        if not chaves:
+            return
+        for chave in chaves:
+            if chave == '*':
+                self.l1.limpar()
+            else:
+                self.l1.descartar(chave)
+
+        conexao = self._redis()
+        if conexao is None:
+            return
+        try:
+            for chave in chaves:
+                conexao.publish(CANAL_INVALIDACAO, f'{self.origem} {chave}')
+        except Exception as e:
+            logger.warning(f'Falha ao publicar invalidação do cache: {e}')
+
+    def _chave_l1(self, key, version):
+        return self.make_and_validate_key(key, version=version)
+
+    def _invalidar_chaves(self, keys, version):
+        # Chaves de SOMENTE_L2 nunca entram no L1: publicá-las só faria todos
+        # os processos acordarem a cada contador ou sessão gravados.
+        self._invalidar(*(self._chave_l1(key, version) for key in keys if self._usa_l1(key)))
+
+    def get(self, key, default=None, version=None):
+        if not self._usa_l1(key):
+            return self.l2.get(key, default, version=version)
+
+        self._garantir_assinatura()
+        chave = self._chave_l1(key, version)
+        valor = self.l1.obter(chave)
+        if valor is not _ausente:
+            return valor
+
+        valor = self.l2.get(key, _ausente, version=version)
+        if valor is _ausente:
+            return default
+        self.l1.guardar(chave, valor, self.l1_ttl)
+        return valor
+
+    async def aget(self, key, default=None, version=None):
+        # Acerto no L1 responde direto no event loop; só a ida ao L2 usa a
+        # versão assíncrona dele.
+        if not self._usa_l1(key):
+            return await self.l2.aget(key, default, version=version)
+
+        self._garantir_assinatura()
+        chave = self._chave_l1(key, version)
+        valor = self.l1.obter(chave)
+        if valor is not _ausente:
+            return valor
+
+        valor = await self.l2.aget(key, _ausente, version=version)
+        if valor is _ausente:
+            return default
+        self.l1.guardar(chave, valor, self.l1_ttl)
+        return valor
+
+    def get_many(self, keys, version=None):
+        resultado = {}
+        faltando = []
+        for key in keys:
+            if not self._usa_l1(key):
+                faltando.append(key)
+                continue
+            self._garantir_assinatura()
+            valor = self.l1.obter(self._chave_l1(key, version))
+            if valor is _ausente:
+                faltando.append(key)
+            else:
+                resultado[key] = valor
+
+        if faltando:
+            do_l2 = self.l2.get_many(faltando, version=version)
+            for key, valor in do_l2.items():
+                if self._usa_l1(key):
+                    self.l1.guardar(self._chave_l1(key, version), valor, self.l1_ttl)
+            resultado.update(do_l2)
+        return resultado
+
+    def has_key(self, key, version=None):
+        return self.get(key, _ausente, version=version) is not _ausente
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l2.set(key, value, timeout, version=version)
+        self._invalidar_chaves([key], version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        falhas = self.l2.set_many(data, timeout, version=version)
+        self._invalidar_chaves(data, version)
+        return falhas
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        adicionado = self.l2.add(key, value, timeout, version=version)
+        if adicionado:
+            self._invalidar_chaves([key], version)
+        return adicionado
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.l2.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        removido = self.l2.delete(key, version=version)
+        self._invalidar_chaves([key], version)
+        return removido
+
+    def delete_many(self, keys, version=None):
+        self.l2.delete_many(keys, version=version)
+        self._invalidar_chaves(keys, version)
+
+    def incr(self, key, delta=1, version=None):
+        valor = self.l2.incr(key, delta, version=version)
+        self._invalidar_chaves([key], version)
+        return valor
+
+    def decr(self, key, delta=1, version=None):
+        valor = self.l2.decr(key, delta, version=version)
+        self._invalidar_chaves([key], version)
+        return valor
+
+    def clear(self):
+        self.l2.clear()
+        self._invalidar('*')
+
+    def close(self, **kwargs):
+        self.l2.close(**kwargs)
@@ -0,0 +1,212 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+from PIL import Image
+from collections import namedtuple
+import gzip
+import io
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+
+logger = logging.getLogger(__name__)
+
+EXTENSOES_TEXTO = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.map', '.xml')
+EXTENSOES_IMAGEM = ('.png', '.jpg', '.jpeg')
+UM_ANO = 60 * 60 * 24 * 365
+_aceita_gzip = re.compile(r'\bgzip\b')
+
+Estatico = namedtuple('Estatico', 'caminho estado tipo codificacao variaveis imutavel')
+_avisados = set()
+
+
+def _gravar_se_menor(caminho, conteudo, tamanho_original):
+    if len(conteudo) >= tamanho_original:
+        return False
+    temporario = f'{caminho}.tmp'
+    with open(temporario, 'wb') as arquivo:
+        arquivo.write(conteudo)
+    os.replace(temporario, caminho)
+    return True
+
+
+def recomprimir_png(caminho):
+    """Regrava o PNG com compressão máxima, sem alterar nenhum pixel."""
+    with Image.open(caminho) as imagem:
+        imagem.load()
+        opcoes = {'optimize': True}
+        if imagem.info.get('icc_profile'):
+            opcoes['icc_profile'] = imagem.info['icc_profile']
+        # Canal alfa todo opaco não carrega informação.
+        if imagem.mode == 'RGBA' and imagem.getchannel('A').getextrema() == (255, 255):
+            imagem = imagem.convert('RGB')
+        buffer = io.BytesIO()
+        imagem.save(buffer, 'PNG', **opcoes)
+    return _gravar_se_menor(caminho, buffer.getvalue(), os.path.getsize(caminho))
+
+
+def gerar_webp(caminho):
+    with Image.open(caminho) as imagem:
+        buffer = io.BytesIO()
+        if caminho.lower().endswith('.png'):
+            imagem.save(buffer, 'WEBP', lossless=True, method=6)
+        else:
+            imagem.save(buffer, 'WEBP', quality=90, method=6)
+    return _gravar_se_menor(f'{caminho}.webp', buffer.getvalue(), os.path.getsize(caminho) + 1)
+
+
+def gerar_gzip(caminho):
+    with open(caminho, 'rb') as arquivo:
+        conteudo = arquivo.read()
+    # mtime fixo: o mesmo arquivo gera sempre o mesmo .gz.
+    return _gravar_se_menor(f'{caminho}.gz', gzip.compress(conteudo, 9, mtime=0), len(conteudo) + 1)
+
+
+class ArmazenamentoEstaticos(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage com etapas extras no collectstatic: PNGs
+    recomprimidos sem perda e, ao lado de cada arquivo coletado, variantes
+    .webp das imagens e .gz dos arquivos de texto, para o EstaticosMiddleware
+    escolher pela requisição.
+    """
+
+    # Sem collectstatic (desenvolvimento, testes) o {% static %} devolve o nome
+    # original em vez de quebrar a página.
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            if name not in _avisados:
+                _avisados.add(name)
+                logger.warning(f'Estático fora do manifesto, servido sem hash: {name}')
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        coletados = set(paths)
+        for original, processado, alterado in super().post_process(paths, dry_run, **options):
+            if processado and not isinstance(alterado, Exception):
+                coletados.add(processado)
+            yield original, processado, alterado
+
+        if dry_run:
+            return
+        # O hash vem do arquivo de origem (é dele que o Manifest copia), então
+        # a recompressão, determinística, não invalida o nome.
+        for nome in sorted(coletados):
+            extensao = posixpath.splitext(nome)[1].lower()
+            if extensao == '.png':
+                recomprimir_png(self.path(nome))
+            if extensao in EXTENSOES_IMAGEM:
+                gerar_webp(self.path(nome))
+            elif extensao in EXTENSOES_TEXTO:
+                gerar_gzip(self.path(nome))
+
+
+class EstaticosMiddleware:
+    """
+    Serve o STATIC_ROOT sem depender do proxy. Nomes com hash do manifesto
+    recebem Cache-Control imutável de um ano; os demais, revalidação por
+    Last-Modified. Quando o collectstatic gerou a variante, responde com o
+    .gz para quem aceita gzip e com o .webp para quem aceita image/webp.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.ESTATICOS_SERVIR or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.prefixo = settings.STATIC_URL
+        self._com_hash = None
+
+    @property
+    def com_hash(self):
+        if self._com_hash is None:
+            self._com_hash = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+        return self._com_hash
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        estatico = self.resolver(request)
+        if estatico is None:
+            return self.get_response(request)
+        resposta = self.nao_modificado(request, estatico) or FileResponse(open(estatico.caminho, 'rb'))
+        return self.cabecalhos(resposta, estatico)
+
+    async def __acall__(self, request):
+        estatico = self.resolver(request)
+        if estatico is None:
+            return await self.get_response(request)
+        resposta = self.nao_modificado(request, estatico)
+        if resposta is None:
+            # No ASGI um FileResponse seria consumido por um iterador síncrono de qualquer forma.
+            resposta = HttpResponse(await sync_to_async(self.ler)(estatico.caminho))
+        return self.cabecalhos(resposta, estatico)
+
+    def ler(self, caminho):
+        with open(caminho, 'rb') as arquivo:
+            return arquivo.read()
+
+    def resolver(self, request):
+        if request.method not in ('GET', 'HEAD') or not request.path.startswith(self.prefixo):
+            return None
+        nome = request.path[len(self.prefixo):]
+        try:
+            caminho = safe_join(settings.STATIC_ROOT, nome)
+        except ValueError:
+            return None
+        if not os.path.isfile(caminho):
+            return None
+
+        tipo, _ = mimetypes.guess_type(caminho)
+        codificacao = None
+        variaveis = []
+        extensao = posixpath.splitext(nome)[1].lower()
+
+        if extensao in EXTENSOES_IMAGEM and os.path.isfile(f'{caminho}.webp'):
+            variaveis.append('Accept')
+            if 'image/webp' in request.headers.get('Accept', ''):
+                caminho, tipo = f'{caminho}.webp', 'image/webp'
+        elif extensao in EXTENSOES_TEXTO and os.path.isfile(f'{caminho}.gz'):
+            variaveis.append('Accept-Encoding')
+            if _aceita_gzip.search(request.headers.get('Accept-Encoding', '')):
+                caminho, codificacao = f'{caminho}.gz', 'gzip'
+
+        return Estatico(caminho, os.stat(caminho), tipo, codificacao, variaveis, nome in self.com_hash)
+
+    def nao_modificado(self, request, estatico):
+        # Nomes com hash nunca mudam; o navegador nem chega a revalidar.
+        if estatico.imutavel:
+            return None
+        if was_modified_since(request.headers.get('If-Modified-Since'), estatico.estado.st_mtime):
+            return None
+        return HttpResponseNotModified()
+
+    def cabecalhos(self, resposta, estatico):
+        if resposta.status_code == 200:
+            resposta['Content-Type'] = estatico.tipo or 'application/octet-stream'
+            resposta['Content-Length'] = estatico.estado.st_size
+            if estatico.codificacao:
+                resposta['Content-Encoding'] = estatico.codificacao
+        resposta['Last-Modified'] = http_date(estatico.estado.st_mtime)
+        if estatico.imutavel:
+            patch_cache_control(resposta, public=True, max_age=UM_ANO, immutable=True)
+        else:
+            patch_cache_control(resposta, public=True, max_age=settings.ESTATICOS_MAX_AGE)
+        if estatico.variaveis:
+            patch_vary_headers(resposta, estatico.variaveis)
+        return resposta
@@ -0,0 +1,264 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from collections import deque
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import Template as TemplateDjango
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+METODOS_CACHE = (
+    'get', 'set', 'add', 'delete', 'touch', 'has_key', 'incr', 'decr',
+    'get_many', 'set_many', 'delete_many',
+)
+AMOSTRAS_LATENCIA = 1000
+
+_medicao = ContextVar('medicao', default=None)
+
+
+class OrcamentoExcedido(AssertionError):
+    pass
+
+
+class Medicao:
+    def __init__(self):
+        self.consultas = 0
+        self.tempo_banco = 0.0
+        self.chamadas_cache = 0
+        self.tempo_templates = 0.0
+        # Chamadas aninhadas (CacheEmCamadas -> L2, include dentro de template)
+        # contam uma vez só.
+        self.em_cache = False
+        self.em_template = False
+
+
+def _medir_consulta(execute, sql, params, many, context):
+    medicao = _medicao.get()
+    if medicao is None:
+        return execute(sql, params, many, context)
+
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicao.consultas += 1
+        medicao.tempo_banco += time.perf_counter() - inicio
+
+
+def _instalar_no_banco(connection, **kwargs):
+    # Na frente da lista: connection.execute_wrapper() remove sempre o último.
+    if _medir_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _medir_consulta)
+
+
+def _sondar_cache(classe):
+    for nome in METODOS_CACHE:
+        original = getattr(classe, nome)
+        if getattr(original, 'sondado', False):
+            continue
+
+        def sonda(self, *args, _original=original, **kwargs):
+            medicao = _medicao.get()
+            if medicao is None or medicao.em_cache:
+                return _original(self, *args, **kwargs)
+            medicao.em_cache = True
+            try:
+                return _original(self, *args, **kwargs)
+            finally:
+                medicao.em_cache = False
+                medicao.chamadas_cache += 1
+
+        sonda.sondado = True
+        setattr(classe, nome, sonda)
+
+
+def _sondar_templates():
+    original = TemplateDjango.render
+    if getattr(original, 'sondado', False):
+        return
+
+    def render(self, *args, **kwargs):
+        medicao = _medicao.get()
+        if medicao is None or medicao.em_template:
+            return original(self, *args, **kwargs)
+        medicao.em_template = True
+        inicio = time.perf_counter()
+        try:
+            return original(self, *args, **kwargs)
+        finally:
+            medicao.em_template = False
+            medicao.tempo_templates += time.perf_counter() - inicio
+
+    render.sondado = True
+    TemplateDjango.render = render
+
+
+_instalado = False
+_trava_instalacao = threading.Lock()
+
+
+def instalar_sondas():
+    global _instalado
+    with _trava_instalacao:
+        if _instalado:
+            return
+        connection_created.connect(_instalar_no_banco)
+        for conexao in connections.all(initialized_only=True):
+            _instalar_no_banco(conexao)
+        for alias in settings.CACHES:
+            _sondar_cache(type(caches[alias]))
+        _sondar_templates()
+        _instalado = True
+
+
+class EstatisticasRotas:
+    def __init__(self):
+        self.rotas = {}
+        self._trava = threading.Lock()
+
+    def registrar(self, rota, dados):
+        with self._trava:
+            atual = self.rotas.setdefault(rota, {
+                'requisicoes': 0,
+                'nao_modificadas': 0,
+                'consultas': 0,
+                'consultas_max': 0,
+                'banco_ms': 0.0,
+                'cache': 0,
+                'templates_ms': 0.0,
+                'latencias_ms': deque(maxlen=AMOSTRAS_LATENCIA),
+            })
+            atual['requisicoes'] += 1
+            atual['nao_modificadas'] += dados['status'] == 304
+            atual['consultas'] += dados['consultas']
+            atual['consultas_max'] = max(atual['consultas_max'], dados['consultas'])
+            atual['banco_ms'] += dados['banco_ms']
+            atual['cache'] += dados['cache']
+            atual['templates_ms'] += dados['templates_ms']
+            atual['latencias_ms'].append(dados['total_ms'])
+            return atual['nao_modificadas'] / atual['requisicoes']
+
+    def resumo(self):
+        with self._trava:
+            rotas = {rota: dict(valores, latencias_ms=sorted(valores['latencias_ms']))
+                     for rota, valores in self.rotas.items()}
+
+        resumo = {}
+        for rota, valores in sorted(rotas.items()):
+            n = valores['requisicoes']
+            latencias = valores['latencias_ms']
+            resumo[rota] = {
+                'requisicoes': n,
+                'taxa_304': round(valores['nao_modificadas'] / n, 4),
+                'consultas_media': round(valores['consultas'] / n, 2),
+                'consultas_max': valores['consultas_max'],
+                'orcamento_consultas': settings.ORCAMENTO_CONSULTAS.get(rota),
+                'banco_ms_media': round(valores['banco_ms'] / n, 2),
+                'cache_media': round(valores['cache'] / n, 2),
+                'templates_ms_media': round(valores['templates_ms'] / n, 2),
+                'p50_ms': percentil(latencias, 50),
+                'p95_ms': percentil(latencias, 95),
+                'p99_ms': percentil(latencias, 99),
+            }
+        return resumo
+
+    def limpar(self):
+        with self._trava:
+            self.rotas.clear()
+
+
+def percentil(ordenados, p):
+    if not ordenados:
+        return None
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+estatisticas_rotas = EstatisticasRotas()
+
+
+class InstrumentacaoMiddleware:
+    """
+    Mede por requisição as consultas SQL e o tempo no banco, as chamadas ao
+    cache, o tempo renderizando templates e a latência total. Loga uma linha
+    JSON por requisição, acumula por nome de rota e confere o orçamento de
+    consultas de ORCAMENTO_CONSULTAS; cada linha traz também a fração de
+    respostas 304 da rota. Respostas em streaming só contam o que
+    rodou antes de o corpo começar a ser enviado.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        instalar_sondas()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        medicao = Medicao()
+        token = _medicao.set(medicao)
+        inicio = time.perf_counter()
+        try:
+            resposta = self.get_response(request)
+        finally:
+            _medicao.reset(token)
+        self.registrar(request, resposta, medicao, inicio)
+        return resposta
+
+    async def __acall__(self, request):
+        medicao = Medicao()
+        token = _medicao.set(medicao)
+        inicio = time.perf_counter()
+        try:
+            resposta = await self.get_response(request)
+        finally:
+            _medicao.reset(token)
+        self.registrar(request, resposta, medicao, inicio)
+        return resposta
+
+    def registrar(self, request, resposta, medicao, inicio):
+        correspondencia = getattr(request, 'resolver_match', None)
+        rota = correspondencia.url_name if correspondencia and correspondencia.url_name else '<sem rota>'
+        dados = {
+            'rota': rota,
+            'metodo': request.method,
+            'status': resposta.status_code,
+            'consultas': medicao.consultas,
+            'banco_ms': round(medicao.tempo_banco * 1000, 2),
+            'cache': medicao.chamadas_cache,
+            'templates_ms': round(medicao.tempo_templates * 1000, 2),
+            'total_ms': round((time.perf_counter() - inicio) * 1000, 2),
+        }
+        # Fração de 304 acumulada na rota neste processo: quanto das
+        # revalidações condicionais evitou renderizar.
+        dados['taxa_304'] = round(estatisticas_rotas.registrar(rota, dados), 4)
+        logger.info(json.dumps(dados))
+
+        orcamento = settings.ORCAMENTO_CONSULTAS.get(rota)
+        if orcamento is not None and medicao.consultas > orcamento:
+            mensagem = f'{rota} fez {medicao.consultas} consultas (orçamento: {orcamento})'
+            if settings.ORCAMENTO_CONSULTAS_ESTRITO:
+                raise OrcamentoExcedido(mensagem)
+            logger.warning(mensagem)
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def resumo_instrumentacao(request):
+    # Os números são do processo que atendeu a requisição.
+    return Response({'processo': os.getpid(), 'rotas': estatisticas_rotas.resumo()})
@@ -0,0 +1,67 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.messages.middleware import MessageMiddleware
+from django.middleware.clickjacking import XFrameOptionsMiddleware
+from django.middleware.common import CommonMiddleware
+from django.middleware.csrf import CsrfViewMiddleware
+from django.middleware.security import SecurityMiddleware
+
+
+class SemTrocaDeThread:
+    """
+    No modo assíncrono o MiddlewareMixin do Django roda cada process_request e
+    process_response num sync_to_async, todos na mesma thread. Para os
+    middlewares abaixo esses métodos só mexem em cabeçalhos e cookies, sem
+    I/O, então rodam direto no event loop. No WSGI nada muda.
+    """
+
+    async def __acall__(self, request):
+        response = None
+        if hasattr(self, 'process_request'):
+            response = self.process_request(request)
+        response = response or await self.get_response(request)
+        if hasattr(self, 'process_response'):
+            response = self.process_response(request, response)
+        return response
+
+
+class SegurancaMiddleware(SemTrocaDeThread, SecurityMiddleware):
+    pass
+
+
+class ComumMiddleware(SemTrocaDeThread, CommonMiddleware):
+    pass
+
+
+class CsrfMiddleware(SemTrocaDeThread, CsrfViewMiddleware):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if self.async_mode:
+            # O handler só chama process_view sem sync_to_async se ele for corrotina.
+            # No ASGI o corpo já chegou inteiro antes da view, então ler request.POST não bloqueia.
+            process_view = super().process_view
+
+            async def process_view_async(request, callback, callback_args, callback_kwargs):
+                return process_view(request, callback, callback_args, callback_kwargs)
+
+            self.process_view = process_view_async
+
+
+class AutenticacaoMiddleware(SemTrocaDeThread, AuthenticationMiddleware):
+    # request.user continua preguiçoso; views assíncronas usam await request.auser().
+    pass
+
+
+class MensagensMiddleware(SemTrocaDeThread, MessageMiddleware):
+    async def __acall__(self, request):
+        self.process_request(request)
+        response = await self.get_response(request)
+        armazenamento = getattr(request, '_messages', None)
+        if armazenamento is not None and (armazenamento.used or armazenamento.added_new):
+            # Só aqui pode haver escrita na sessão.
+            return await sync_to_async(self.process_response)(request, response)
+        return response
+
+
+class XFrameMiddleware(SemTrocaDeThread, XFrameOptionsMiddleware):
+    pass
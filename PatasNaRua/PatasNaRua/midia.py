@@ -0,0 +1,211 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+from urllib.parse import quote
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+
+from ong.storage import e_nome_por_conteudo
+
+logger = logging.getLogger(__name__)
+
+UM_ANO = 60 * 60 * 24 * 365
+TAMANHO_BLOCO = 64 * 1024
+_intervalo = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class TrechoArquivo:
+    """
+    Arquivo limitado a um intervalo. Expõe o fileno para o wsgi.file_wrapper:
+    o gunicorn faz sendfile a partir da posição atual e só até o Content-Length.
+    """
+
+    def __init__(self, arquivo, inicio, tamanho):
+        arquivo.seek(inicio)
+        self.arquivo = arquivo
+        self.restante = tamanho
+
+    def read(self, tamanho=-1):
+        if tamanho < 0 or tamanho > self.restante:
+            tamanho = self.restante
+        dados = self.arquivo.read(tamanho)
+        self.restante -= len(dados)
+        return dados
+
+    def fileno(self):
+        return self.arquivo.fileno()
+
+    def close(self):
+        self.arquivo.close()
+
+
+async def _blocos(arquivo):
+    # No ASGI não há sendfile; um iterador síncrono seria lido inteiro para a
+    # memória pelo handler, então os blocos saem um a um pelo event loop.
+    ler = sync_to_async(arquivo.read, thread_sensitive=False)
+    try:
+        while bloco := await ler(TAMANHO_BLOCO):
+            yield bloco
+    finally:
+        await sync_to_async(arquivo.close, thread_sensitive=False)()
+
+
+def etag_arquivo(caminho, estado):
+    # Nome por conteúdo já é o SHA-256 dos bytes.
+    if e_nome_por_conteudo(caminho):
+        return f'"{posixpath.splitext(posixpath.basename(caminho))[0]}"'
+    return f'"{estado.st_ino:x}-{estado.st_size:x}-{estado.st_mtime_ns:x}"'
+
+
+def intervalo_pedido(request, tamanho, etag, ultima_modificacao):
+    """
+    (inicio, fim) do Range pedido, None para mandar o arquivo inteiro ou
+    False quando o intervalo não cabe no arquivo. Só um intervalo por vez;
+    pedidos com vários recebem o arquivo inteiro, como a RFC 9110 permite.
+    """
+    cabecalho = request.headers.get('Range')
+    if not cabecalho or not tamanho:
+        return None
+    condicao = request.headers.get('If-Range')
+    if condicao:
+        if condicao.startswith('"'):
+            if condicao != etag:
+                return None
+        elif ultima_modificacao is None or parse_http_date_safe(condicao) != int(ultima_modificacao):
+            return None
+
+    encontrado = _intervalo.match(cabecalho.strip())
+    if not encontrado or encontrado.groups() == ('', ''):
+        return None
+    inicio, fim = encontrado.groups()
+    if not inicio:
+        # bytes=-N: os últimos N bytes.
+        if int(fim) == 0:
+            return False
+        return max(tamanho - int(fim), 0), tamanho - 1
+    inicio = int(inicio)
+    fim = min(int(fim), tamanho - 1) if fim else tamanho - 1
+    if inicio >= tamanho or fim < inicio:
+        return False
+    return inicio, fim
+
+
+def entregar_pelo_proxy(caminho, tipo):
+    envio = settings.MIDIA_ENVIO
+    if envio == 'x-sendfile':
+        resposta = HttpResponse(content_type=tipo)
+        resposta['X-Sendfile'] = caminho
+        return resposta
+    if envio == 'x-accel-redirect':
+        try:
+            relativo = os.path.relpath(caminho, settings.MEDIA_ROOT)
+        except ValueError:
+            return None
+        if relativo.startswith(os.pardir):
+            return None
+        resposta = HttpResponse(content_type=tipo)
+        resposta['X-Accel-Redirect'] = settings.MIDIA_PREFIXO_INTERNO + quote(relativo.replace(os.sep, '/'))
+        return resposta
+    return None
+
+
+def responder_arquivo(request, caminho, tipo=None, etag=None, imutavel=False):
+    """
+    Resposta para um arquivo de mídia já autorizado. Com MIDIA_ENVIO o corpo
+    fica com o proxy; sem ele, ETag forte, 304, Range e o arquivo entregue ao
+    servidor por FileResponse (sendfile no gunicorn), sem passar os bytes por
+    Python.
+
+    `etag` substitui a calculada pelo stat; nesse caso não vai Last-Modified,
+    para arquivos cujo mtime não acompanha o conteúdo.
+    """
+    try:
+        estado = os.stat(caminho)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404('Arquivo não encontrado.')
+    tipo = tipo or mimetypes.guess_type(caminho)[0] or 'application/octet-stream'
+
+    resposta = entregar_pelo_proxy(caminho, tipo)
+    if resposta is None:
+        ultima_modificacao = None if etag else estado.st_mtime
+        etag = etag or etag_arquivo(caminho, estado)
+        resposta = get_conditional_response(request, etag=etag, last_modified=ultima_modificacao)
+        if resposta is None:
+            resposta = _resposta_arquivo(request, caminho, tipo, estado.st_size, etag, ultima_modificacao)
+        resposta['ETag'] = etag
+        if ultima_modificacao is not None:
+            resposta['Last-Modified'] = http_date(ultima_modificacao)
+        resposta['Accept-Ranges'] = 'bytes'
+
+    if imutavel:
+        patch_cache_control(resposta, public=True, max_age=UM_ANO, immutable=True)
+    else:
+        patch_cache_control(resposta, public=True, max_age=settings.MIDIA_MAX_AGE)
+    return resposta
+
+
+def _resposta_arquivo(request, caminho, tipo, tamanho, etag, ultima_modificacao):
+    intervalo = intervalo_pedido(request, tamanho, etag, ultima_modificacao)
+    if intervalo is False:
+        resposta = HttpResponse(status=416)
+        resposta['Content-Range'] = f'bytes */{tamanho}'
+        return resposta
+
+    inicio, fim = intervalo or (0, tamanho - 1)
+    comprimento = fim - inicio + 1 if tamanho else 0
+    if request.method == 'HEAD':
+        resposta = HttpResponse(content_type=tipo)
+    else:
+        arquivo = open(caminho, 'rb')
+        if isinstance(request, ASGIRequest):
+            resposta = StreamingHttpResponse(_blocos(TrechoArquivo(arquivo, inicio, comprimento)), content_type=tipo)
+        elif intervalo:
+            resposta = FileResponse(TrechoArquivo(arquivo, inicio, comprimento), content_type=tipo)
+        else:
+            resposta = FileResponse(arquivo, content_type=tipo)
+    resposta['Content-Length'] = comprimento
+    if intervalo:
+        resposta.status_code = 206
+        resposta['Content-Range'] = f'bytes {inicio}-{fim}/{tamanho}'
+    return resposta
+
+
+def pode_ver_midia(request, nome):
+    if any(nome.startswith(pasta) for pasta in settings.MIDIA_PUBLICA):
+        return True
+    return request.user.is_authenticated and request.user.is_staff
+
+
+@require_safe
+def servir_midia(request, nome):
+    # A autorização olha o caminho já normalizado: com o nome cru,
+    # 'fotosPet/../variantes/x' passaria como pasta pública.
+    partes = nome.replace('\\', '/').split('/')
+    if any(parte in ('', '.', '..') or parte.startswith('.') for parte in partes):
+        raise Http404('Arquivo não encontrado.')
+    nome = '/'.join(partes)
+    try:
+        caminho = os.path.realpath(safe_join(settings.MEDIA_ROOT, nome))
+    except SuspiciousFileOperation:
+        raise Http404('Arquivo não encontrado.')
+    # Links simbólicos também não podem levar para fora da pasta pedida.
+    raiz = os.path.realpath(settings.MEDIA_ROOT)
+    if os.path.relpath(caminho, raiz).replace(os.sep, '/') != nome:
+        raise Http404('Arquivo não encontrado.')
+
+    if not pode_ver_midia(request, nome):
+        # 404 em vez de 403: não confirma que o arquivo existe.
+        logger.info(f'Mídia negada: {nome}')
+        raise Http404('Arquivo não encontrado.')
+    if not os.path.isfile(caminho):
+        raise Http404('Arquivo não encontrado.')
+    return responder_arquivo(request, caminho, imutavel=e_nome_por_conteudo(nome))
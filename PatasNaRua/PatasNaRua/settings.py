@@ -1,5 +1,5 @@
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 from dotenv import load_dotenv
 import os
 
@@ -30,15 +30,36 @@ INSTALLED_APPS = [
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
+# Mídia servida por PatasNaRua.midia.servir_midia. Com MIDIA_ENVIO='x-accel-redirect'
+# (nginx, location internal apontando para MEDIA_ROOT em MIDIA_PREFIXO_INTERNO) ou
+# 'x-sendfile' (Apache/lighttpd) a view só autoriza e o proxy entrega o arquivo
+MIDIA_ENVIO = config('MIDIA_ENVIO', default='')
+MIDIA_PREFIXO_INTERNO = config('MIDIA_PREFIXO_INTERNO', default='/_midia/')
+# Pastas de MEDIA_ROOT abertas a qualquer visitante; o resto só para staff
+MIDIA_PUBLICA = ('fotosPet/',)
+MIDIA_MAX_AGE = config('MIDIA_MAX_AGE', default=60 * 60 * 24 * 30, cast=int)
 
+FOTOS_VARIANTES_ROOT = os.path.join(MEDIA_ROOT, 'variantes')
+FOTOS_VARIANTES_LIMITE_BYTES = int(os.getenv('FOTOS_VARIANTES_LIMITE_BYTES', 512 * 1024 * 1024))
+FOTOS_VARIANTES_LARGURAS = [160, 320, 640, 960]
+
+UPLOADS_ROOT = os.path.join(BASE_DIR, 'uploads')
+UPLOAD_FOTO_LIMITE_BYTES = int(os.getenv('UPLOAD_FOTO_LIMITE_BYTES', 10 * 1024 * 1024))
+UPLOADS_ABERTOS_POR_USUARIO = int(os.getenv('UPLOADS_ABERTOS_POR_USUARIO', 5))
+
+
+# Versões dos middlewares do Django que no ASGI não trocam de thread a cada
+# requisição (PatasNaRua.middleware); no WSGI se comportam como os originais.
 MIDDLEWARE = [
-    'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
-    'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'PatasNaRua.middleware.SegurancaMiddleware',
+    'PatasNaRua.estaticos.EstaticosMiddleware',
+    'PatasNaRua.instrumentacao.InstrumentacaoMiddleware',
+    'cadlog.sessoes.SessaoPreguicosaMiddleware',
+    'PatasNaRua.middleware.ComumMiddleware',
+    'PatasNaRua.middleware.CsrfMiddleware',
+    'PatasNaRua.middleware.AutenticacaoMiddleware',
+    'PatasNaRua.middleware.MensagensMiddleware',
+    'PatasNaRua.middleware.XFrameMiddleware',
 ]
 
 ROOT_URLCONF = 'PatasNaRua.urls'
@@ -59,6 +80,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'PatasNaRua.wsgi.application'
+ASGI_APPLICATION = 'PatasNaRua.asgi.application'
 
 DATABASES = {
     'default': {
@@ -93,8 +115,83 @@ CACHES = {
     }
 }
 
+# Com vários workers o LocMemCache deixa contadores, códigos e tokens por processo.
+# Com REDIS_URL o 'default' passa a ser um L1 em memória na frente do Redis
+# (PatasNaRua.cache.CacheEmCamadas); as chaves de segurança ficam só no Redis.
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'PatasNaRua.cache.CacheEmCamadas',
+            'OPTIONS': {
+                'L2': 'redis',
+                'L1_MAX_ITENS': config('CACHE_L1_MAX_ITENS', default=2000, cast=int),
+                'L1_TTL': config('CACHE_L1_TTL', default=5, cast=int),
+                'SOMENTE_L2': [
+                    'limite_',
+                    'codigo_recuperacao_',
+                    'token_recuperacao_',
+                    'email_verificado_',
+                    'fragmento_pet_',
+                    'django.contrib.sessions.cached_db',
+                ],
+            },
+        },
+        'redis': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+            'OPTIONS': {'CLIENT_CLASS': 'django_redis.client.DefaultClient'},
+        },
+    }
+
+# Alias do cache com os contadores de tentativas (cadlog.limites)
+LIMITES_CACHE = config('LIMITES_CACHE', default='default')
+# Desligar só em ambiente de teste de carga (testar_carga), onde tudo vem do mesmo IP
+LIMITES_ATIVOS = config('LIMITES_ATIVOS', default=True, cast=bool)
+
 AUTH_USER_MODEL = 'cadlog.CustomUser'
 
+# Custo do PBKDF2 ajustável; hashes com outro custo são refeitos no login seguinte
+PASSWORD_HASHERS = [
+    'cadlog.senhas.PBKDF2Ajustavel',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+SENHA_PBKDF2_ITERACOES = config('SENHA_PBKDF2_ITERACOES', default=1_000_000, cast=int)
+
+# Verificação de senha do login (cadlog.senhas.FilaHash): threads de hash, quantos
+# logins podem esperar na fila e por quantos segundos antes de responder 429
+LOGIN_HASH_TRABALHADORES = config('LOGIN_HASH_TRABALHADORES', default=os.cpu_count() or 2, cast=int)
+LOGIN_HASH_FILA = config('LOGIN_HASH_FILA', default=32, cast=int)
+LOGIN_HASH_PRAZO = config('LOGIN_HASH_PRAZO', default=2.0, cast=float)
+
+# Filtro de Bloom de emails/CPFs/CNPJs cadastrados (cadlog.disponibilidade)
+DISPONIBILIDADE_CAPACIDADE = config('DISPONIBILIDADE_CAPACIDADE', default=100_000, cast=int)
+DISPONIBILIDADE_TAXA_ERRO = config('DISPONIBILIDADE_TAXA_ERRO', default=0.01, cast=float)
+DISPONIBILIDADE_INTERVALO = config('DISPONIBILIDADE_INTERVALO', default=5, cast=int)
+# Ids relidos abaixo do maior já visto a cada sincronização (linhas confirmadas
+# fora de ordem) e intervalo da reconstrução completa, em segundos
+DISPONIBILIDADE_SOBREPOSICAO = config('DISPONIBILIDADE_SOBREPOSICAO', default=1000, cast=int)
+DISPONIBILIDADE_RECONSTRUCAO = config('DISPONIBILIDADE_RECONSTRUCAO', default=60 * 60, cast=int)
+
+# Orçamento de consultas SQL por nome de rota (PatasNaRua.instrumentacao).
+# Estourar loga um aviso; com ORCAMENTO_CONSULTAS_ESTRITO (testes) levanta OrcamentoExcedido.
+ORCAMENTO_CONSULTAS = {
+    'tela_user_page': 4,
+    'detalhes_pet': 3,
+    'catalogo_api': 3,
+    'busca_api': 3,
+    # Até 3 buscas por raio e 1 carga de objetos, para pets e para ONGs; 6 no caso típico.
+    'proximos_api': 8,
+    'disponibilidade_api': 8,
+    'login': 10,
+    'cadastro_usuario': 10,
+    'cadastro_ong': 10,
+}
+ORCAMENTO_CONSULTAS_ESTRITO = config('ORCAMENTO_CONSULTAS_ESTRITO', default=False, cast=bool)
+
 LANGUAGE_CODE = 'en-us'
 
 TIME_ZONE = 'UTC'
@@ -111,6 +208,17 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'app_initial', 'static'),
 ]
 
+# O collectstatic recomprime os PNGs, grava nomes com hash no manifesto e gera
+# variantes .webp e .gz (PatasNaRua.estaticos)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'PatasNaRua.estaticos.ArmazenamentoEstaticos'},
+}
+# Servir o STATIC_ROOT pelo EstaticosMiddleware; desligar quando o proxy já serve /static/
+ESTATICOS_SERVIR = config('ESTATICOS_SERVIR', default=True, cast=bool)
+# Cache dos estáticos sem hash no nome (os com hash são imutáveis por um ano)
+ESTATICOS_MAX_AGE = config('ESTATICOS_MAX_AGE', default=60 * 60, cast=int)
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 PHONENUMBER_DEFAULT_REGION = 'BR'
@@ -118,7 +226,11 @@ PHONENUMBER_DEFAULT_REGION = 'BR'
 LOGIN_URL = 'login'
 
 SESSION_COOKIE_AGE = 2592000
-SESSION_SAVE_EVERY_REQUEST = True
+# Sessão lida do cache e gravada no banco só quando muda ou quando já passou
+# SESSION_FRACAO_RENOVACAO do tempo de vida (cadlog.sessoes)
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_FRACAO_RENOVACAO = config('SESSION_FRACAO_RENOVACAO', default=0.1, cast=float)
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SECURE = True
 SESSION_BROWSER_XSS_FILTER = True
@@ -127,9 +239,15 @@ SESSION_COOKIE_SAMESITE = 'Lax'
 CSRF_COOKIE_SECURE = True
 
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = 'smtp.gmail.com'
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+EMAIL_HOST = config('EMAIL_HOST', default='smtp.gmail.com')
+EMAIL_PORT = config('EMAIL_PORT', default=587, cast=int)
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=10, cast=int)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
-DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
\ No newline at end of file
+DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+
+# Validação de e-mail por MX/A: sem DNS_NAMESERVERS usa o resolv.conf do sistema
+DNS_NAMESERVERS = config('DNS_NAMESERVERS', default='', cast=Csv())
+DNS_PORT = config('DNS_PORT', default=53, cast=int)
+DNS_TIMEOUT = config('DNS_TIMEOUT', default=2.0, cast=float)
\ No newline at end of file
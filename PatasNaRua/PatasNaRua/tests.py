@@ -0,0 +1,147 @@
+import os
+import tempfile
+from unittest import mock
+
+import numpy
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from cadlog.disponibilidade import indice_disponibilidade
+from cadlog.documentos import gerar_cnpjs, gerar_cpfs
+from ong.models import Pet
+from .cache import CacheEmCamadas
+from .instrumentacao import estatisticas_rotas
+
+SENHA = 'Senha#Forte123'
+
+
+@override_settings(ORCAMENTO_CONSULTAS_ESTRITO=True, LIMITES_ATIVOS=False, SENHA_PBKDF2_ITERACOES=1000)
+@mock.patch('cadlog.views.validar_email_formato', return_value=True)
+class OrcamentoConsultasTests(TestCase):
+    """Cada rota de ORCAMENTO_CONSULTAS, em modo estrito: estourar levanta OrcamentoExcedido."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.pet = Pet.objects.create(
+            nome='Rex', especie='Cachorro', porte='Médio', raca='SRD', peso=10, idade=2,
+            sexo='Macho', castrado='Sim', latitude=-15.8, longitude=-47.9
+        )
+        aleatorio = numpy.random.default_rng(0)
+        cls.cpfs = gerar_cpfs(aleatorio, 2)
+        cls.cnpj = gerar_cnpjs(aleatorio, 1)[0]
+
+    def setUp(self):
+        estatisticas_rotas.limpar()
+        indice_disponibilidade.reconstruir()
+
+    def test_rotas_dentro_do_orcamento(self, _):
+        self.client.get(reverse('tela_user_page'))
+        self.client.get(reverse('detalhes_pet', args=[self.pet.id]))
+        self.client.get(reverse('catalogo_api'))
+        self.client.get(reverse('busca_api'), {'q': 'rex'})
+        self.client.get(reverse('proximos_api'), {'lat': '-15.8', 'lng': '-47.9', 'k': '5'})
+        self.client.get(reverse('proximos_api'), {'lat': '-23.55', 'lng': '-46.63', 'k': '5'})
+        self.client.get(reverse('disponibilidade_api'), {'campo': 'email', 'valor': 'livre@exemplo.com'})
+
+        resposta = self.client.post(reverse('cadastro_usuario'), {
+            'nome': 'Ana Souza', 'cpf': self.cpfs[0], 'email': 'ana@exemplo.com',
+            'telefone': '(61) 99999-0000', 'data_nascimento': '1990-01-01', 'endereco': 'Rua A',
+            'senha': SENHA, 'confirma_senha': SENHA,
+        })
+        self.assertEqual(resposta.status_code, 302)
+        resposta = self.client.post(reverse('cadastro_ong'), {
+            'nome_ong': 'Patinhas', 'cnpj': self.cnpj, 'endereco': 'Rua B',
+            'email_institucional': 'ong@exemplo.com', 'nome_responsavel': 'Bia Lima',
+            'cpf_responsavel': self.cpfs[1], 'telefone': '(61) 98888-0000',
+            'senha': SENHA, 'confirma_senha': SENHA,
+        })
+        self.assertEqual(resposta.status_code, 302)
+        self.client.post(reverse('login'), {'email': 'ana@exemplo.com', 'senha': 'errada#123'})
+        self.client.post(reverse('login'), {'email': 'ana@exemplo.com', 'senha': SENHA})
+
+        self.assertEqual(set(settings.ORCAMENTO_CONSULTAS) - set(estatisticas_rotas.resumo()), set())
+
+
+class ServirMidiaTests(TestCase):
+    def setUp(self):
+        self.raiz = tempfile.TemporaryDirectory()
+        self.addCleanup(self.raiz.cleanup)
+        for pasta in ('fotosPet', 'variantes'):
+            os.makedirs(os.path.join(self.raiz.name, pasta))
+            with open(os.path.join(self.raiz.name, pasta, 'a.png'), 'wb') as arquivo:
+                arquivo.write(b'conteudo')
+        os.symlink(os.path.join(self.raiz.name, 'variantes', 'a.png'),
+                   os.path.join(self.raiz.name, 'fotosPet', 'atalho.png'))
+        configuracao = override_settings(MEDIA_ROOT=self.raiz.name)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def test_pasta_publica(self):
+        self.assertEqual(self.client.get('/media/fotosPet/a.png').status_code, 200)
+
+    def test_fora_da_pasta_publica(self):
+        for caminho in (
+            '/media/variantes/a.png',
+            '/media/fotosPet/../variantes/a.png',
+            '/media/fotosPet/%2e%2e/variantes/a.png',
+            '/media/fotosPet//a.png',
+            '/media/fotosPet/atalho.png',
+        ):
+            with self.subTest(caminho=caminho):
+                self.assertEqual(self.client.get(caminho).status_code, 404)
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'padrao'},
+    'l2': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'l2'},
+})
+class CacheEmCamadasTests(TestCase):
+    def setUp(self):
+        self.camadas = CacheEmCamadas(None, {'OPTIONS': {
+            'L2': 'l2', 'L1_MAX_ITENS': 2, 'L1_TTL': 60, 'SOMENTE_L2': ['limite_'],
+        }})
+        self.l2 = self.camadas.l2
+        self.addCleanup(self.l2.clear)
+
+    def test_acerto_no_l1(self):
+        self.camadas.set('a', 1)
+        self.assertEqual(self.camadas.get('a'), 1)
+        # Mudança feita direto no L2 por outro processo: o L1 segue até a invalidação.
+        self.l2.set('a', 2)
+        self.assertEqual(self.camadas.get('a'), 1)
+        self.camadas.set('a', 3)
+        self.assertEqual(self.camadas.get('a'), 3)
+
+    def test_lru_descarta_o_menos_recente(self):
+        for chave in ('a', 'b', 'c'):
+            self.l2.set(chave, 1)
+            self.camadas.get(chave)
+        for chave in ('a', 'b', 'c'):
+            self.l2.set(chave, 2)
+        self.assertEqual(self.camadas.get_many(['a', 'b', 'c']), {'a': 2, 'b': 1, 'c': 1})
+
+    def test_somente_l2(self):
+        self.camadas.set('limite_x', 1)
+        self.assertEqual(self.camadas.get('limite_x'), 1)
+        self.l2.set('limite_x', 2)
+        self.assertEqual(self.camadas.get('limite_x'), 2)
+
+    def test_somente_l2_nao_publica_invalidacao(self):
+        conexao = mock.Mock()
+        with mock.patch.object(self.camadas, '_redis', return_value=conexao):
+            self.camadas.set('limite_x', 1)
+            self.camadas.incr('limite_x')
+            self.camadas.add('limite_y', 1)
+            self.camadas.delete('limite_x')
+            conexao.publish.assert_not_called()
+
+            self.camadas.set('a', 1)
+            conexao.publish.assert_called_once()
+
+    def test_clear(self):
+        self.camadas.set('a', 1)
+        self.camadas.get('a')
+        self.camadas.clear()
+        self.assertIsNone(self.camadas.get('a'))
+        self.assertIsNone(self.l2.get('a'))
@@ -1,11 +1,15 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
+from .instrumentacao import resumo_instrumentacao
+from .midia import servir_midia
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/instrumentacao/', resumo_instrumentacao, name='resumo_instrumentacao'),
+    re_path(rf'^{settings.MEDIA_URL.lstrip("/")}(?P<nome>.+)$', servir_midia, name='midia'),
     path('', include('app_initial.urls')),
     path('', include('cadlog.urls')),
     path('', include('ong.urls')),
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'PatasNaRua.settings')
 
 application = get_wsgi_application()
+
+# Monta o filtro de disponibilidade (cadlog.disponibilidade) em segundo plano ao subir.
+from cadlog.disponibilidade import indice_disponibilidade  # noqa: E402
+
+indice_disponibilidade.preparar()
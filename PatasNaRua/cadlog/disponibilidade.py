@@ -0,0 +1,159 @@
+from django.conf import settings
+from django.db import connections
+from .models import CustomUser, ONG, UsuarioComum, normalizar_email
+import hashlib
+import logging
+import math
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def normalizar_documento(valor):
+    return re.sub(r'[^0-9]', '', valor)
+
+
+# campo da API -> (normalização, [(modelo, coluna), ...])
+CAMPOS_DISPONIBILIDADE = {
+    'email': (normalizar_email, [(CustomUser, 'email'), (ONG, 'email_institucional')]),
+    'cpf': (normalizar_documento, [(UsuarioComum, 'cpf')]),
+    'cnpj': (normalizar_documento, [(ONG, 'cnpj')]),
+}
+
+
+class FiltroBloom:
+    def __init__(self, capacidade, taxa_erro):
+        self.capacidade = capacidade
+        self.tamanho = max(64, int(-capacidade * math.log(taxa_erro) / math.log(2) ** 2))
+        self.funcoes = max(1, round(self.tamanho / capacidade * math.log(2)))
+        self.bits = bytearray((self.tamanho + 7) // 8)
+        self.itens = 0
+
+    def _posicoes(self, valor):
+        resumo = hashlib.blake2b(valor.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(resumo[:8], 'little')
+        h2 = int.from_bytes(resumo[8:], 'little') | 1
+        return [(h1 + i * h2) % self.tamanho for i in range(self.funcoes)]
+
+    def adicionar(self, valor):
+        # A sincronização relê uma faixa de ids; repetidos não contam como itens.
+        novo = False
+        for posicao in self._posicoes(valor):
+            if not self.bits[posicao >> 3] & (1 << (posicao & 7)):
+                self.bits[posicao >> 3] |= 1 << (posicao & 7)
+                novo = True
+        self.itens += novo
+
+    def __contains__(self, valor):
+        return all(self.bits[posicao >> 3] & (1 << (posicao & 7)) for posicao in self._posicoes(valor))
+
+
+class IndiceDisponibilidade:
+    """
+    Filtro de Bloom em memória com emails, CPFs e CNPJs já cadastrados.
+    Um "não está no filtro" é definitivo e dispensa o banco; um "talvez" é
+    confirmado com uma consulta pela coluna única.
+
+    O filtro é montado numa thread ao subir o servidor (preparar(), chamado
+    pelo wsgi.py/asgi.py) e nunca dentro de uma requisição: enquanto não fica
+    pronto, as consultas vão direto ao banco. Recebe os cadastros deste
+    processo pelos signals; a cada DISPONIBILIDADE_INTERVALO segundos relê os
+    ids a partir de DISPONIBILIDADE_SOBREPOSICAO abaixo do maior já visto,
+    para pegar linhas de outros workers confirmadas fora da ordem do id, e é
+    remontado por inteiro a cada DISPONIBILIDADE_RECONSTRUCAO segundos.
+    """
+
+    def __init__(self):
+        self.filtro = None
+        self.ultimos_ids = {}
+        self.sincronizado_em = 0
+        self.construido_em = 0
+        self._trava = threading.Lock()
+        self._construindo = threading.Event()
+
+    def _chave(self, campo, valor):
+        return f'{campo}:{valor}'
+
+    def _carregar(self, filtro, desde_ids):
+        novos_ids = {}
+        sobreposicao = settings.DISPONIBILIDADE_SOBREPOSICAO if desde_ids else 0
+        for campo, (normalizar, fontes) in CAMPOS_DISPONIBILIDADE.items():
+            for modelo, coluna in fontes:
+                ultimo = desde_ids.get(modelo._meta.label, 0)
+                linhas = (
+                    modelo.objects.filter(pk__gt=max(0, ultimo - sobreposicao))
+                    .order_by('pk')
+                    .values_list('pk', coluna)
+                    .iterator(chunk_size=5000)
+                )
+                for pk, valor in linhas:
+                    if valor:
+                        filtro.adicionar(self._chave(campo, normalizar(valor)))
+                    ultimo = max(ultimo, pk)
+                novos_ids[modelo._meta.label] = max(ultimo, novos_ids.get(modelo._meta.label, 0))
+        return novos_ids
+
+    def reconstruir(self):
+        total = CustomUser.objects.count() + UsuarioComum.objects.count() + 2 * ONG.objects.count()
+        filtro = FiltroBloom(
+            max(total * 2, settings.DISPONIBILIDADE_CAPACIDADE),
+            settings.DISPONIBILIDADE_TAXA_ERRO,
+        )
+        ultimos_ids = self._carregar(filtro, {})
+        with self._trava:
+            self.filtro = filtro
+            self.ultimos_ids = ultimos_ids
+            self.sincronizado_em = self.construido_em = time.monotonic()
+
+    def preparar(self):
+        """Monta (ou remonta) o filtro numa thread, se nenhuma já estiver montando."""
+        with self._trava:
+            if self._construindo.is_set():
+                return
+            self._construindo.set()
+
+        def construir():
+            try:
+                self.reconstruir()
+            except Exception:
+                logger.exception('Falha ao montar o filtro de disponibilidade')
+            finally:
+                connections.close_all()
+                self._construindo.clear()
+
+        threading.Thread(target=construir, name='indice-disponibilidade', daemon=True).start()
+
+    def sincronizar(self):
+        agora = time.monotonic()
+        if (self.filtro.itens > self.filtro.capacidade
+                or agora - self.construido_em >= settings.DISPONIBILIDADE_RECONSTRUCAO):
+            self.preparar()
+        if agora - self.sincronizado_em < settings.DISPONIBILIDADE_INTERVALO:
+            return
+        with self._trava:
+            if time.monotonic() - self.sincronizado_em >= settings.DISPONIBILIDADE_INTERVALO:
+                self.ultimos_ids = self._carregar(self.filtro, self.ultimos_ids)
+                self.sincronizado_em = time.monotonic()
+
+    def adicionar(self, campo, valor):
+        if self.filtro is None or not valor:
+            return
+        normalizar, _ = CAMPOS_DISPONIBILIDADE[campo]
+        self.filtro.adicionar(self._chave(campo, normalizar(valor)))
+
+    def disponivel(self, campo, valor):
+        normalizar, fontes = CAMPOS_DISPONIBILIDADE[campo]
+        valor = normalizar(valor)
+
+        if self.filtro is None:
+            self.preparar()
+        else:
+            self.sincronizar()
+            if self._chave(campo, valor) not in self.filtro:
+                return True
+        return not any(modelo.objects.filter(**{coluna: valor}).exists() for modelo, coluna in fontes)
+
+
+indice_disponibilidade = IndiceDisponibilidade()
@@ -0,0 +1,104 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturoExpirado
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+import dns.exception
+import dns.resolver
+
+logger = logging.getLogger(__name__)
+
+EXISTE = 'existe'
+INEXISTENTE = 'inexistente'
+SEM_RESPOSTA = 'sem_resposta'
+FALHA = 'falha'
+
+TTL_MINIMO = 60
+TTL_MAXIMO = 60 * 60 * 6
+TTL_NEGATIVO = 5 * 60
+# Durante uma queda do resolvedor a falha fica em cache por pouco tempo,
+# para que cada login não espere o timeout inteiro de novo.
+TTL_FALHA = 15
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='dns')
+_em_andamento = {}
+_trava = threading.Lock()
+_resolvedor = None
+
+
+def obter_resolvedor():
+    global _resolvedor
+    if _resolvedor is None:
+        resolvedor = dns.resolver.Resolver(configure=not settings.DNS_NAMESERVERS)
+        if settings.DNS_NAMESERVERS:
+            resolvedor.nameservers = settings.DNS_NAMESERVERS
+            resolvedor.port = settings.DNS_PORT
+        resolvedor.timeout = settings.DNS_TIMEOUT
+        resolvedor.lifetime = settings.DNS_TIMEOUT
+        _resolvedor = resolvedor
+    return _resolvedor
+
+
+def _consultar(dominio, tipo):
+    try:
+        resposta = obter_resolvedor().resolve(dominio, tipo)
+        return EXISTE, min(max(resposta.rrset.ttl, TTL_MINIMO), TTL_MAXIMO)
+    except dns.resolver.NXDOMAIN:
+        return INEXISTENTE, TTL_NEGATIVO
+    except dns.resolver.NoAnswer:
+        return SEM_RESPOSTA, TTL_NEGATIVO
+    except (dns.exception.DNSException, OSError) as e:
+        logger.warning(f'Falha ao resolver {tipo} de {dominio}: {e}')
+        return FALHA, TTL_FALHA
+
+
+def _chave(dominio, tipo):
+    return f'dns_{tipo}_{dominio}'
+
+
+def _resolver_e_guardar(dominio, tipo):
+    try:
+        estado, ttl = _consultar(dominio, tipo)
+        cache.set(_chave(dominio, tipo), estado, ttl)
+        return estado
+    finally:
+        with _trava:
+            _em_andamento.pop((dominio, tipo), None)
+
+
+def _agendar(dominio, tipo):
+    # Requisições simultâneas para o mesmo domínio compartilham uma única consulta.
+    with _trava:
+        futuro = _em_andamento.get((dominio, tipo))
+        if futuro is None:
+            futuro = _executor.submit(_resolver_e_guardar, dominio, tipo)
+            _em_andamento[(dominio, tipo)] = futuro
+    return futuro
+
+
+def resolver(dominio, tipos=('MX', 'A')):
+    dominio = dominio.strip().lower().rstrip('.')
+    estados = cache.get_many([_chave(dominio, tipo) for tipo in tipos])
+    resultado = {tipo: estados.get(_chave(dominio, tipo)) for tipo in tipos}
+
+    futuros = {tipo: _agendar(dominio, tipo) for tipo, estado in resultado.items() if estado is None}
+    for tipo, futuro in futuros.items():
+        try:
+            resultado[tipo] = futuro.result(timeout=settings.DNS_TIMEOUT + 0.5)
+        except FuturoExpirado:
+            resultado[tipo] = FALHA
+    return resultado
+
+
+def dominio_aceita_email(dominio):
+    # MX e A são consultados em paralelo; o A só decide quando não há MX.
+    estados = resolver(dominio)
+
+    if estados['MX'] == EXISTE:
+        return True
+    if estados['MX'] == INEXISTENTE:
+        return False
+    if estados['MX'] == FALHA:
+        return True
+    return estados['A'] in (EXISTE, FALHA)
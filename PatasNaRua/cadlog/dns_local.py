@@ -0,0 +1,58 @@
+import socketserver
+import threading
+
+import dns.exception
+import dns.flags
+import dns.message
+import dns.rcode
+import dns.rdatatype
+import dns.rrset
+
+
+class _ConsultaDNS(socketserver.BaseRequestHandler):
+    def handle(self):
+        dados, sock = self.request
+        try:
+            consulta = dns.message.from_wire(dados)
+        except dns.exception.DNSException:
+            return
+
+        resposta = dns.message.make_response(consulta)
+        resposta.flags |= dns.flags.AA
+        for pergunta in consulta.question:
+            nome = pergunta.name.to_text(omit_final_dot=True).lower()
+            tipo = dns.rdatatype.to_text(pergunta.rdtype)
+            self.server.registrar(nome, tipo)
+
+            registros = self.server.zonas.get(nome)
+            if registros is None:
+                resposta.set_rcode(dns.rcode.NXDOMAIN)
+            elif registros.get(tipo):
+                resposta.answer.append(dns.rrset.from_text_list(
+                    pergunta.name, self.server.ttl, 'IN', tipo, registros[tipo]
+                ))
+        sock.sendto(resposta.to_wire(), self.client_address)
+
+
+class ServidorDNSLocal(socketserver.ThreadingUDPServer):
+    """Resolvedor DNS mínimo, autoritativo para as zonas recebidas e NXDOMAIN para o resto."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, endereco=('127.0.0.1', 5353), zonas=None, ttl=300):
+        super().__init__(endereco, _ConsultaDNS)
+        # zonas: {'exemplo.com': {'MX': ['10 mx.exemplo.com.'], 'A': ['127.0.0.1']}}
+        self.zonas = {nome.lower(): registros for nome, registros in (zonas or {}).items()}
+        self.ttl = ttl
+        self.consultas = []
+        self._trava = threading.Lock()
+
+    def registrar(self, nome, tipo):
+        with self._trava:
+            self.consultas.append((nome, tipo))
+
+    def iniciar_em_segundo_plano(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,120 @@
+import numpy as np
+
+PESOS_CPF_1 = np.array([10, 9, 8, 7, 6, 5, 4, 3, 2])
+PESOS_CPF_2 = np.array([11, 10, 9, 8, 7, 6, 5, 4, 3, 2])
+PESOS_CNPJ_1 = np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+PESOS_CNPJ_2 = np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
+
+
+def _digitos(valores):
+    """
+    Junta todos os valores num único buffer e separa os dígitos ASCII de uma
+    vez. Devolve os dígitos (0-9) na ordem, quantos dígitos cada valor tem e
+    onde os dígitos de cada valor começam. Qualquer caractere fora de 0-9
+    (inclusive não-ASCII, que vira '?') é descartado, como no re.sub dos
+    validadores escalares.
+    """
+    valores = list(map(str, valores))
+    tamanhos = np.fromiter(map(len, valores), dtype=np.int64, count=len(valores))
+    buffer = np.frombuffer(''.join(valores).encode('ascii', 'replace'), dtype=np.uint8)
+
+    e_digito = (buffer >= 48) & (buffer <= 57)
+    digitos = buffer[e_digito] - 48
+
+    contagem = np.zeros(len(valores), dtype=np.int64)
+    com_texto = np.flatnonzero(tamanhos)
+    if len(com_texto):
+        fins = np.cumsum(tamanhos)
+        contagem[com_texto] = np.add.reduceat(e_digito, (fins - tamanhos)[com_texto], dtype=np.int64)
+    inicios = np.cumsum(contagem) - contagem
+    return digitos, contagem, inicios
+
+
+def _matriz(digitos, contagem, inicios, tamanho):
+    # Linhas dos valores com exatamente `tamanho` dígitos, uma por valor.
+    linhas = np.flatnonzero(contagem == tamanho)
+    posicoes = inicios[linhas][:, None] + np.arange(tamanho)
+    return linhas, digitos[posicoes].astype(np.int64)
+
+
+def _digito_verificador(matriz, pesos):
+    resto = (matriz[:, :len(pesos)] @ pesos) % 11
+    return np.where(resto < 2, 0, 11 - resto)
+
+
+def _texto(matriz, tamanho):
+    # Cada caractere de um array 'U' é um uint32 com o código do caractere.
+    return np.ascontiguousarray(matriz + 48, dtype=np.uint32).view(f'U{tamanho}').ravel()
+
+
+def _validar_documento(valores, tamanho, pesos1, pesos2):
+    digitos, contagem, inicios = _digitos(valores)
+    linhas, matriz = _matriz(digitos, contagem, inicios, tamanho)
+
+    repetido = (matriz == matriz[:, :1]).all(axis=1)
+    validos = (
+        ~repetido
+        & (matriz[:, tamanho - 2] == _digito_verificador(matriz, pesos1))
+        & (matriz[:, tamanho - 1] == _digito_verificador(matriz, pesos2))
+    )
+
+    mascara = np.zeros(len(contagem), dtype=bool)
+    mascara[linhas[validos]] = True
+    normalizados = np.full(len(contagem), '', dtype=f'U{tamanho}')
+    normalizados[linhas] = _texto(matriz, tamanho)
+    return mascara, normalizados
+
+
+def validar_cpfs(valores):
+    """
+    Versão em lote de cadlog.views.validar_cpf. Devolve a máscara de válidos
+    e os CPFs só com dígitos ('' para quem não tem 11 dígitos).
+    """
+    return _validar_documento(valores, 11, PESOS_CPF_1, PESOS_CPF_2)
+
+
+def validar_cnpjs(valores):
+    """Versão em lote de cadlog.views.validar_cnpj, no mesmo formato de validar_cpfs."""
+    return _validar_documento(valores, 14, PESOS_CNPJ_1, PESOS_CNPJ_2)
+
+
+def validar_telefones(valores):
+    """Versão em lote de cadlog.views.validar_telefone: 10 ou 11 dígitos com DDD entre 11 e 99."""
+    digitos, contagem, inicios = _digitos(valores)
+    mascara = np.zeros(len(contagem), dtype=bool)
+    normalizados = np.full(len(contagem), '', dtype='U11')
+
+    for tamanho in (10, 11):
+        linhas, matriz = _matriz(digitos, contagem, inicios, tamanho)
+        ddd = matriz[:, 0] * 10 + matriz[:, 1]
+        mascara[linhas] = (ddd >= 11) & (ddd <= 99)
+        normalizados[linhas] = _texto(matriz, tamanho)
+
+    return mascara, normalizados
+
+
+def _gerar_documento(aleatorio, quantidade, tamanho_base, sufixo, pesos1, pesos2):
+    tamanho = tamanho_base + len(sufixo) + 2
+    # Sorteia um pouco a mais para repor as bases com todos os dígitos iguais.
+    bases = aleatorio.choice(10 ** tamanho_base, size=quantidade + quantidade // 100 + 10, replace=False)
+    matriz = np.zeros((len(bases), tamanho), dtype=np.int64)
+    for posicao in range(tamanho_base):
+        matriz[:, tamanho_base - 1 - posicao] = bases // 10 ** posicao % 10
+    matriz[:, tamanho_base:tamanho - 2] = [int(d) for d in sufixo]
+    matriz = matriz[~(matriz[:, :tamanho_base] == matriz[:, :1]).all(axis=1)][:quantidade]
+    if len(matriz) < quantidade:
+        raise ValueError(f'Não há {quantidade} documentos distintos disponíveis.')
+
+    matriz[:, tamanho - 2] = _digito_verificador(matriz, pesos1)
+    matriz[:, tamanho - 1] = _digito_verificador(matriz, pesos2)
+    return _texto(matriz, tamanho)
+
+
+def gerar_cpfs(aleatorio, quantidade):
+    """CPFs distintos e válidos, só com dígitos, sorteados com o numpy.random.Generator recebido."""
+    return _gerar_documento(aleatorio, quantidade, 9, '', PESOS_CPF_1, PESOS_CPF_2)
+
+
+def gerar_cnpjs(aleatorio, quantidade):
+    """CNPJs distintos e válidos de matriz (filial 0001), no mesmo formato de gerar_cpfs."""
+    return _gerar_documento(aleatorio, quantidade, 8, '0001', PESOS_CNPJ_1, PESOS_CNPJ_2)
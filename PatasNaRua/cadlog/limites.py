@@ -0,0 +1,195 @@
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib import messages
+from django.core.cache import caches
+from django.shortcuts import render
+from django.conf import settings
+from functools import wraps
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+SEMPRE = 'sempre'
+FALHAS = 'falhas'
+SUCESSOS = 'sucessos'
+
+
+class Consumo:
+    def __init__(self, identificador, chave, permitido, restantes, liberacao_em):
+        self.identificador = identificador
+        self.chave = chave
+        self.permitido = permitido
+        self.restantes = restantes
+        self.liberacao_em = liberacao_em
+
+
+class LimiteTaxa:
+    """
+    Janela deslizante aproximada: dois contadores inteiros por identificador
+    (janela atual e anterior), com a anterior pesando pelo tempo que ainda
+    sobrepõe a janela deslizante. Memória constante por chave e incremento
+    atômico (add + incr) tanto no LocMemCache quanto no django-redis.
+    """
+
+    def __init__(self, escopo, maximo, janela):
+        self.escopo = escopo
+        self.maximo = maximo
+        self.janela = janela
+
+    @property
+    def cache(self):
+        return caches[settings.LIMITES_CACHE]
+
+    def _chave(self, identificador, indice):
+        return f'limite_{self.escopo}_{identificador}_{indice}'
+
+    def _incrementar(self, chave):
+        self.cache.add(chave, 0, self.janela * 2)
+        try:
+            return self.cache.incr(chave)
+        except ValueError:
+            # A chave expirou entre o add e o incr.
+            self.cache.add(chave, 0, self.janela * 2)
+            return self.cache.incr(chave)
+
+    def _liberacao(self, atual, anterior, inicio, agora):
+        # Segundos até que mais uma tentativa caiba no limite.
+        if atual + 1 <= self.maximo:
+            fracao = 1 - (self.maximo - atual - 1) / anterior if anterior else 0
+            momento = inicio + self.janela * fracao
+        else:
+            fracao = 1 - (self.maximo - 1) / atual
+            momento = inicio + self.janela * (1 + fracao)
+        return max(1, math.ceil(momento - agora))
+
+    def consumir(self, identificador):
+        if not settings.LIMITES_ATIVOS:
+            return Consumo(identificador, None, True, self.maximo, None)
+
+        agora = time.time()
+        indice = int(agora // self.janela)
+        inicio = indice * self.janela
+        peso_anterior = 1 - (agora - inicio) / self.janela
+
+        chave = self._chave(identificador, indice)
+        atual = self._incrementar(chave)
+        anterior = self.cache.get(self._chave(identificador, indice - 1), 0)
+        estimativa = atual + anterior * peso_anterior
+
+        if estimativa > self.maximo:
+            self.cache.decr(chave)
+            liberacao = self._liberacao(atual - 1, anterior, inicio, agora)
+            return Consumo(identificador, chave, False, 0, liberacao)
+
+        restantes = max(0, math.floor(self.maximo - estimativa))
+        return Consumo(identificador, chave, True, restantes, None)
+
+    def devolver(self, consumo):
+        if consumo.chave is None:
+            return
+        try:
+            self.cache.decr(consumo.chave)
+        except ValueError:
+            pass
+
+    def limpar(self, identificador):
+        indice = int(time.time() // self.janela)
+        self.cache.delete_many([
+            self._chave(identificador, indice),
+            self._chave(identificador, indice - 1),
+        ])
+
+
+def por_ip(request, **kwargs):
+    return f"ip_{request.META.get('REMOTE_ADDR', 'unknown')}"
+
+
+def por_email(request, **kwargs):
+    email = kwargs.get('email') or request.POST.get('email', '').strip().lower()
+    return f'email_{email}' if email else None
+
+
+def por_ip_e_email(request, **kwargs):
+    email = por_email(request, **kwargs)
+    return f'{por_ip(request)}_{email}' if email else None
+
+
+def nao_contar_tentativa(request):
+    # Para a view marcar um POST que nem chegou a ser avaliado (campos vazios,
+    # formato inválido): a vaga reservada é devolvida, como era antes do decorator.
+    request.tentativa_nao_contada = True
+
+
+def limitar_tentativas(escopo, maximo, janela, template, mensagem, chaves=(por_ip,),
+                       contar=SEMPRE, liberar_no_sucesso=False):
+    """
+    Limita os POSTs da view por cada uma das `chaves`. A vaga é reservada antes
+    de a view rodar, então requisições paralelas não passam do limite; depois,
+    conforme `contar`, ela é devolvida se a resposta não for o caso contado.
+    Um redirect é tratado como sucesso. POSTs marcados com
+    nao_contar_tentativa nunca contam.
+    """
+    limite = LimiteTaxa(escopo, maximo, janela)
+
+    def reservar(request, kwargs):
+        consumos = []
+        for chave in chaves:
+            identificador = chave(request, **kwargs)
+            if not identificador:
+                continue
+
+            consumo = limite.consumir(identificador)
+            if not consumo.permitido:
+                for anterior in consumos:
+                    limite.devolver(anterior)
+                minutos = max(1, math.ceil(consumo.liberacao_em / 60))
+                logger.warning(f'Rate limit atingido em {escopo} para {identificador}')
+                messages.error(request, mensagem.format(minutos=minutos))
+                return None, render(request, template, kwargs)
+            consumos.append(consumo)
+
+        request.tentativas_restantes = min((c.restantes for c in consumos), default=maximo)
+        return consumos, None
+
+    def concluir(request, consumos, resposta):
+        sucesso = resposta.status_code == 302
+
+        if getattr(request, 'tentativa_nao_contada', False):
+            for consumo in consumos:
+                limite.devolver(consumo)
+        elif sucesso and liberar_no_sucesso:
+            for consumo in consumos:
+                limite.limpar(consumo.identificador)
+        elif (resposta.status_code == 429 or (contar == FALHAS and sucesso)
+              or (contar == SUCESSOS and not sucesso)):
+            # 429: a view recusou por sobrecarga, a tentativa não chegou a ser avaliada.
+            for consumo in consumos:
+                limite.devolver(consumo)
+        return resposta
+
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def wrapper_async(request, *args, **kwargs):
+                if request.method != 'POST':
+                    return await view_func(request, *args, **kwargs)
+
+                consumos, bloqueio = await sync_to_async(reservar)(request, kwargs)
+                if bloqueio is not None:
+                    return bloqueio
+                resposta = await view_func(request, *args, **kwargs)
+                return await sync_to_async(concluir)(request, consumos, resposta)
+            return wrapper_async
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'POST':
+                return view_func(request, *args, **kwargs)
+
+            consumos, bloqueio = reservar(request, kwargs)
+            if bloqueio is not None:
+                return bloqueio
+            return concluir(request, consumos, view_func(request, *args, **kwargs))
+        return wrapper
+    return decorator
@@ -0,0 +1,71 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from cadlog.documentos import validar_cnpjs, validar_cpfs
+from cadlog.models import ONG, UsuarioComum
+from cadlog.views import validar_cnpj, validar_cpf
+
+COLUNAS = [
+    (UsuarioComum, 'cpf', validar_cpfs, validar_cpf),
+    (ONG, 'cpf_responsavel', validar_cpfs, validar_cpf),
+    (ONG, 'cnpj', validar_cnpjs, validar_cnpj),
+]
+
+
+class Command(BaseCommand):
+    help = 'Valida em lote todos os CPFs e CNPJs gravados e lista os inválidos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=100_000)
+        parser.add_argument('--mostrar', type=int, default=20, help='Quantos inválidos listar por coluna.')
+        parser.add_argument(
+            '--conferir', action='store_true',
+            help='Confere cada resultado com o validador escalar de cadlog.views.',
+        )
+
+    def lotes(self, modelo, coluna, tamanho):
+        ultimo = 0
+        while True:
+            linhas = list(
+                modelo.objects.filter(pk__gt=ultimo)
+                .order_by('pk')
+                .values_list('pk', coluna)[:tamanho]
+            )
+            if not linhas:
+                return
+            ultimo = linhas[-1][0]
+            yield linhas
+
+    def handle(self, *args, **options):
+        for modelo, coluna, validar_lote, validar in COLUNAS:
+            nome = f'{modelo.__name__}.{coluna}'
+            total = invalidos = fora_do_padrao = divergentes = 0
+            exemplos = []
+            inicio = time.perf_counter()
+
+            for linhas in self.lotes(modelo, coluna, options['lote']):
+                pks, valores = zip(*linhas)
+                validos, normalizados = validar_lote(valores)
+                total += len(valores)
+                invalidos += int((~validos).sum())
+                fora_do_padrao += sum(1 for valor, normal in zip(valores, normalizados) if normal and valor != normal)
+
+                if len(exemplos) < options['mostrar']:
+                    for indice in (~validos).nonzero()[0][:options['mostrar'] - len(exemplos)]:
+                        exemplos.append((pks[indice], valores[indice]))
+
+                if options['conferir']:
+                    divergentes += sum(1 for valor, ok in zip(valores, validos) if validar(valor) != ok)
+
+            duracao = time.perf_counter() - inicio
+            estilo = self.style.WARNING if invalidos else self.style.SUCCESS
+            self.stdout.write(estilo(
+                f'{nome}: {total} registros, {invalidos} inválidos, '
+                f'{fora_do_padrao} com pontuação gravada ({duracao:.2f}s)'
+            ))
+            for pk, valor in exemplos:
+                self.stdout.write(f'  pk={pk} {valor!r}')
+            if options['conferir']:
+                estilo = self.style.ERROR if divergentes else self.style.SUCCESS
+                self.stdout.write(estilo(f'  {divergentes} divergências com o validador escalar'))
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from PatasNaRua.instrumentacao import percentil
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def esperar_porta(porta, processo, prazo=30):
+    limite = time.monotonic() + prazo
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise CommandError(f'O servidor saiu com código {processo.returncode}.')
+        try:
+            socket.create_connection(('127.0.0.1', porta), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise CommandError(f'O servidor não abriu a porta {porta} em {prazo}s.')
+
+
+async def ler_resposta(leitor):
+    status = int((await leitor.readline()).split()[1])
+    tamanho = 0
+    while (linha := await leitor.readline()) not in (b'\r\n', b''):
+        nome, _, valor = linha.decode('latin-1').partition(':')
+        if nome.lower() == 'content-length':
+            tamanho = int(valor)
+    await leitor.readexactly(tamanho)
+    return status
+
+
+async def cliente(porta, caminho, atraso, fim, resultados):
+    # Uma conexão keep-alive por cliente. Com `atraso`, o cabeçalho chega em
+    # duas partes, como num cliente móvel lento.
+    pedido = f'GET {caminho} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: keep-alive\r\n'.encode()
+    leitor = escritor = None
+    while time.monotonic() < fim:
+        inicio = time.perf_counter()
+        try:
+            if escritor is None:
+                leitor, escritor = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', porta), 10)
+            escritor.write(pedido)
+            if atraso:
+                await escritor.drain()
+                await asyncio.sleep(atraso)
+            escritor.write(b'\r\n')
+            status = await asyncio.wait_for(ler_resposta(leitor), 30)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError):
+            status = 'erro'
+            if escritor is not None:
+                escritor.close()
+            leitor = escritor = None
+        resultados.append((status, (time.perf_counter() - inicio) * 1000))
+    if escritor is not None:
+        escritor.close()
+
+
+async def medir(porta, caminho, concorrencia, duracao, atraso):
+    resultados = []
+    fim = time.monotonic() + duracao
+    await asyncio.gather(*(cliente(porta, caminho, atraso, fim, resultados) for _ in range(concorrencia)))
+    return resultados
+
+
+class Command(BaseCommand):
+    help = (
+        'Sobe o projeto no gunicorn (WSGI, workers com threads) e no uvicorn (ASGI) com o mesmo '
+        'número de processos e mede vazão, latência e erros com N conexões simultâneas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--caminho', action='append', help='Rota medida (pode repetir). Padrão: /api/pets/ e /tela-user/.')
+        parser.add_argument('--concorrencias', default='10,50,200', help='Conexões simultâneas, separadas por vírgula.')
+        parser.add_argument('--duracao', type=float, default=10.0, help='Segundos por medição.')
+        parser.add_argument('--atraso-cliente', type=float, default=0.0,
+                            help='Segundos entre as duas partes de cada requisição (clientes lentos).')
+        parser.add_argument('--processos', type=int, default=1)
+        parser.add_argument('--threads', type=int, default=4, help='Threads por worker do gunicorn.')
+        parser.add_argument('--saida', default='servidores.json')
+
+    def servidores(self, porta, options):
+        processos = str(options['processos'])
+        return {
+            'wsgi': [
+                sys.executable, '-m', 'gunicorn', 'PatasNaRua.wsgi:application', '-b', f'127.0.0.1:{porta}',
+                '-w', processos, '-k', 'gthread', '--threads', str(options['threads']), '--log-level', 'warning',
+            ],
+            'asgi': [
+                sys.executable, '-m', 'uvicorn', 'PatasNaRua.asgi:application', '--host', '127.0.0.1',
+                '--port', str(porta), '--workers', processos, '--log-level', 'warning', '--no-access-log',
+            ],
+        }
+
+    def handle(self, *args, **options):
+        caminhos = options['caminho'] or ['/api/pets/', '/tela-user/']
+        concorrencias = [int(c) for c in options['concorrencias'].split(',')]
+        ambiente = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'PatasNaRua.settings'))
+        resultado = {'parametros': {k: options[k] for k in ('duracao', 'atraso_cliente', 'processos', 'threads')}, 'medicoes': []}
+
+        for nome in ('wsgi', 'asgi'):
+            porta = porta_livre()
+            processo = subprocess.Popen(
+                self.servidores(porta, options)[nome], cwd=settings.BASE_DIR, env=ambiente,
+                stdout=subprocess.DEVNULL,
+            )
+            try:
+                esperar_porta(porta, processo)
+                for caminho in caminhos:
+                    # Aquece conexões, templates e caches antes de medir.
+                    asyncio.run(medir(porta, caminho, 4, 1, 0))
+                    for concorrencia in concorrencias:
+                        resultados = asyncio.run(
+                            medir(porta, caminho, concorrencia, options['duracao'], options['atraso_cliente'])
+                        )
+                        resultado['medicoes'].append(self.resumir(nome, caminho, concorrencia, resultados, options))
+            finally:
+                processo.terminate()
+                processo.wait()
+
+        with open(options['saida'], 'w') as arquivo:
+            json.dump(resultado, arquivo, indent=2)
+
+        self.stdout.write(f"{'servidor':<8} {'rota':<14} {'conexões':>8} {'rps':>8} {'p50':>8} {'p99':>9} {'erros':>6}")
+        for m in resultado['medicoes']:
+            self.stdout.write(
+                f"{m['servidor']:<8} {m['rota']:<14} {m['conexoes']:>8} {m['vazao_rps']:>8} "
+                f"{m['p50_ms']:>8} {m['p99_ms']:>9} {m['erros']:>6}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Resultado gravado em {options['saida']}"))
+
+    def resumir(self, nome, caminho, concorrencia, resultados, options):
+        ok = sorted(latencia for status, latencia in resultados if status == 200)
+        return {
+            'servidor': nome,
+            'rota': caminho,
+            'conexoes': concorrencia,
+            'requisicoes': len(ok),
+            'vazao_rps': round(len(ok) / options['duracao'], 1),
+            'p50_ms': round(percentil(ok, 50) or 0, 1),
+            'p99_ms': round(percentil(ok, 99) or 0, 1),
+            'erros': len(resultados) - len(ok),
+        }
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from cadlog.dns_local import ServidorDNSLocal
+
+
+class Command(BaseCommand):
+    help = (
+        'Sobe um resolvedor DNS local que responde MX e A para os domínios informados '
+        'e NXDOMAIN para o resto. Use com DNS_NAMESERVERS=127.0.0.1 e DNS_PORT=5353.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('dominios', nargs='*', default=['gmail.com', 'hotmail.com', 'outlook.com'])
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--porta', type=int, default=5353)
+        parser.add_argument('--ttl', type=int, default=300)
+
+    def handle(self, *args, **options):
+        zonas = {
+            dominio: {'MX': [f'10 mx.{dominio}.'], 'A': ['127.0.0.1']}
+            for dominio in options['dominios']
+        }
+        servidor = ServidorDNSLocal((options['host'], options['porta']), zonas=zonas, ttl=options['ttl'])
+        self.stdout.write(self.style.SUCCESS(
+            f"DNS local ouvindo em {options['host']}:{options['porta']} para {', '.join(zonas)}"
+        ))
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.server_close()
@@ -0,0 +1,266 @@
+import datetime
+import time
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from cadlog.documentos import gerar_cnpjs, gerar_cpfs
+from cadlog.models import ONG, CustomUser, UsuarioComum
+from ong.busca import indexar_pets
+from ong.geo import codificar_geohash
+from ong.models import Pet
+from ong.storage import armazenamento_fotos
+
+NOMES = [
+    'Ana', 'Beatriz', 'Bruno', 'Camila', 'Carlos', 'Daniel', 'Eduarda', 'Felipe', 'Fernanda', 'Gabriel',
+    'Helena', 'Igor', 'Isabela', 'João', 'Juliana', 'Larissa', 'Lucas', 'Luiza', 'Marcos', 'Maria',
+    'Mateus', 'Natália', 'Pedro', 'Rafael', 'Renata', 'Sofia', 'Thiago', 'Vinícius', 'Vitória', 'Yasmin',
+]
+SOBRENOMES = [
+    'Almeida', 'Araújo', 'Barbosa', 'Cardoso', 'Carvalho', 'Costa', 'Dias', 'Ferreira', 'Gomes', 'Lima',
+    'Martins', 'Melo', 'Oliveira', 'Pereira', 'Ribeiro', 'Rocha', 'Rodrigues', 'Santos', 'Silva', 'Souza',
+]
+RUAS = [
+    'Rua das Flores', 'Avenida Brasil', 'Rua São João', 'Rua XV de Novembro', 'Avenida Paulista',
+    'Rua Sete de Setembro', 'Rua da Paz', 'Avenida Getúlio Vargas', 'Rua Tiradentes', 'Rua do Comércio',
+]
+# (cidade, latitude, longitude, peso)
+CIDADES = [
+    ('São Paulo/SP', -23.5505, -46.6333, 30),
+    ('Rio de Janeiro/RJ', -22.9068, -43.1729, 18),
+    ('Belo Horizonte/MG', -19.9167, -43.9345, 10),
+    ('Brasília/DF', -15.7939, -47.8828, 9),
+    ('Salvador/BA', -12.9777, -38.5016, 8),
+    ('Fortaleza/CE', -3.7319, -38.5267, 7),
+    ('Recife/PE', -8.0476, -34.8770, 6),
+    ('Curitiba/PR', -25.4284, -49.2733, 6),
+    ('Porto Alegre/RS', -30.0346, -51.2177, 6),
+]
+PREFIXOS_ONG = ['Associação', 'Instituto', 'Projeto', 'Abrigo', 'ONG', 'Coletivo']
+NOMES_ONG = ['Patas Unidas', 'Amigos dos Bichos', 'Quatro Patas', 'Focinho Feliz', 'Lar Animal', 'Vira-Lata Amigo']
+
+NOMES_PET = [
+    'Thor', 'Mel', 'Luna', 'Bob', 'Pipoca', 'Nina', 'Fred', 'Amora', 'Rex', 'Bidu', 'Frida', 'Paçoca',
+    'Simba', 'Belinha', 'Tobias', 'Lola', 'Max', 'Jade', 'Chico', 'Pretinha', 'Mingau', 'Farofa',
+]
+RACAS = {
+    'Cachorro': (['SRD', 'Labrador', 'Poodle', 'Shih Tzu', 'Pinscher', 'Pastor Alemão', 'Vira-lata caramelo'],
+                 [0.55, 0.08, 0.08, 0.08, 0.07, 0.04, 0.10]),
+    'Gato': (['SRD', 'Siamês', 'Persa', 'Angorá', 'Maine Coon'], [0.75, 0.10, 0.07, 0.05, 0.03]),
+}
+PORTES = ['Pequeno', 'Médio', 'Grande']
+# espécie -> (probabilidade, probabilidade de cada porte, faixa de peso em kg de cada porte)
+ESPECIES = {
+    'Cachorro': (0.62, [0.40, 0.38, 0.22], [(2, 10), (10, 25), (25, 45)]),
+    'Gato': (0.38, [0.70, 0.27, 0.03], [(1.5, 4), (4, 6), (6, 9)]),
+}
+STATUS = (['Disponível', 'Adotado', 'Em tratamento', 'Lar temporário'], [0.68, 0.22, 0.06, 0.04])
+IDADE_MAXIMA = 18
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera dados sintéticos a partir de uma semente: usuários comuns e ONGs com CPF/CNPJ '
+        'válidos e pets com distribuições realistas. A mesma semente e as mesmas quantidades '
+        'geram os mesmos dados. Ex.: --pets 1000000 --usuarios 100000 --ongs 5000.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--semente', type=int, default=1)
+        parser.add_argument('--usuarios', type=int, default=100)
+        parser.add_argument('--ongs', type=int, default=10)
+        parser.add_argument('--pets', type=int, default=1000)
+        parser.add_argument('--senha', default='PatasNaRua#2024', help='Senha de todas as contas geradas.')
+        parser.add_argument('--dominio', default='semente.patasnarua.test', help='Domínio dos emails gerados.')
+        parser.add_argument('--lote', type=int, default=5000)
+        parser.add_argument('--sem-indice', action='store_true',
+                            help='Não indexa os pets para a busca (rode reindexar_busca depois).')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.lote = options['lote']
+        semente = options['semente']
+        self.email = lambda tipo, i: f'{tipo}{semente}-{i}@{options["dominio"]}'
+
+        if CustomUser.objects.filter(email__in=[self.email('usuario', 0), self.email('ong', 0)]).exists():
+            raise CommandError(f'Já existem dados gerados com a semente {semente}. Use outra --semente.')
+
+        inicio = time.perf_counter()
+        # Um hash para todas as contas: o PBKDF2 por usuário levaria horas.
+        self.senha = make_password(options['senha'])
+
+        etapas = [
+            ('usuarios', self.gerar_usuarios, np.random.default_rng([semente, 1])),
+            ('ongs', self.gerar_ongs, np.random.default_rng([semente, 2])),
+            ('pets', self.gerar_pets, np.random.default_rng([semente, 3])),
+        ]
+        for nome, gerar, aleatorio in etapas:
+            if options[nome] <= 0:
+                continue
+            etapa = time.perf_counter()
+            gerar(aleatorio, options[nome])
+            duracao = time.perf_counter() - etapa
+            self.stdout.write(f'{nome}: {options[nome]} em {duracao:.1f}s ({options[nome] / duracao:,.0f}/s)')
+
+        self.stdout.write(self.style.SUCCESS(f'Dados gerados em {time.perf_counter() - inicio:.1f}s'))
+        if options['sem_indice'] and options['pets'] > 0:
+            self.stdout.write('Rode reindexar_busca para incluir os pets novos na busca.')
+
+    def lotes(self, quantidade):
+        for inicio in range(0, quantidade, self.lote):
+            yield range(inicio, min(inicio + self.lote, quantidade))
+
+    def documentos_livres(self, gerar, aleatorio, quantidade, modelo, coluna):
+        # Sorteia a mais e descarta os que já existem no banco (colunas únicas).
+        documentos = gerar(aleatorio, quantidade + quantidade // 100 + 100).tolist()
+        existentes = set()
+        for inicio in range(0, len(documentos), 2000):
+            bloco = documentos[inicio:inicio + 2000]
+            existentes.update(modelo.objects.filter(**{f'{coluna}__in': bloco}).values_list(coluna, flat=True))
+        documentos = [documento for documento in documentos if documento not in existentes]
+        if len(documentos) < quantidade:
+            raise CommandError(f'Não há documentos livres suficientes em {modelo.__name__}.{coluna}.')
+        return documentos[:quantidade]
+
+    def pessoas(self, aleatorio, quantidade):
+        nomes = aleatorio.integers(len(NOMES), size=quantidade)
+        sobrenomes = aleatorio.integers(len(SOBRENOMES), size=(quantidade, 2))
+        ddds = aleatorio.choice([11, 21, 31, 41, 51, 61, 71, 81, 85], size=quantidade)
+        telefones = aleatorio.integers(10 ** 7, 10 ** 8, size=quantidade)
+        return [
+            (NOMES[n], f'{SOBRENOMES[s1]} {SOBRENOMES[s2]}', f'+55{ddd}9{telefone}')
+            for n, (s1, s2), ddd, telefone in zip(nomes.tolist(), sobrenomes.tolist(), ddds.tolist(), telefones.tolist())
+        ]
+
+    def coordenadas(self, aleatorio, quantidade):
+        pesos = np.array([cidade[3] for cidade in CIDADES], dtype=float)
+        cidades = aleatorio.choice(len(CIDADES), size=quantidade, p=pesos / pesos.sum())
+        # ~10 km de dispersão em torno do centro de cada cidade.
+        latitudes = np.array([c[1] for c in CIDADES])[cidades] + aleatorio.normal(0, 0.09, quantidade)
+        longitudes = np.array([c[2] for c in CIDADES])[cidades] + aleatorio.normal(0, 0.09, quantidade)
+        return cidades.tolist(), np.round(latitudes, 6).tolist(), np.round(longitudes, 6).tolist()
+
+    def enderecos(self, aleatorio, cidades):
+        ruas = aleatorio.integers(len(RUAS), size=len(cidades)).tolist()
+        numeros = aleatorio.integers(1, 3000, size=len(cidades)).tolist()
+        return [f'{RUAS[r]}, {n} - {CIDADES[c][0]}' for r, n, c in zip(ruas, numeros, cidades)]
+
+    def criar_contas(self, tipo, pessoas, indices):
+        contas = [
+            CustomUser(
+                username=self.email(tipo, i), email=self.email(tipo, i), password=self.senha,
+                first_name=pessoas[i][0], last_name=pessoas[i][1], telefone=pessoas[i][2],
+            )
+            for i in indices
+        ]
+        CustomUser.objects.bulk_create(contas, batch_size=self.lote)
+        if all(conta.pk for conta in contas):
+            return [conta.pk for conta in contas]
+        # Bancos sem RETURNING (MySQL) não devolvem os ids do bulk_create.
+        ids = dict(CustomUser.objects.filter(email__in=[c.email for c in contas]).values_list('email', 'id'))
+        return [ids[conta.email] for conta in contas]
+
+    def gerar_usuarios(self, aleatorio, quantidade):
+        cpfs = self.documentos_livres(gerar_cpfs, aleatorio, quantidade, UsuarioComum, 'cpf')
+        pessoas = self.pessoas(aleatorio, quantidade)
+        cidades, _, _ = self.coordenadas(aleatorio, quantidade)
+        enderecos = self.enderecos(aleatorio, cidades)
+        hoje = datetime.date.today()
+        idades_em_dias = aleatorio.integers(18 * 365, 80 * 365, size=quantidade).tolist()
+
+        for indices in self.lotes(quantidade):
+            with transaction.atomic():
+                ids = self.criar_contas('usuario', pessoas, indices)
+                UsuarioComum.objects.bulk_create([
+                    UsuarioComum(
+                        user_id=user_id, cpf=cpfs[i], endereco=enderecos[i],
+                        data_nascimento=hoje - datetime.timedelta(days=idades_em_dias[i]),
+                    )
+                    for user_id, i in zip(ids, indices)
+                ], batch_size=self.lote)
+
+    def gerar_ongs(self, aleatorio, quantidade):
+        cnpjs = self.documentos_livres(gerar_cnpjs, aleatorio, quantidade, ONG, 'cnpj')
+        cpfs = gerar_cpfs(aleatorio, quantidade).tolist()
+        pessoas = self.pessoas(aleatorio, quantidade)
+        cidades, latitudes, longitudes = self.coordenadas(aleatorio, quantidade)
+        enderecos = self.enderecos(aleatorio, cidades)
+        prefixos = aleatorio.integers(len(PREFIXOS_ONG), size=quantidade).tolist()
+        nomes = aleatorio.integers(len(NOMES_ONG), size=quantidade).tolist()
+
+        for indices in self.lotes(quantidade):
+            with transaction.atomic():
+                ids = self.criar_contas('ong', pessoas, indices)
+                ONG.objects.bulk_create([
+                    ONG(
+                        user_id=user_id,
+                        nome_ong=f'{PREFIXOS_ONG[prefixos[i]]} {NOMES_ONG[nomes[i]]} {CIDADES[cidades[i]][0]}',
+                        cnpj=cnpjs[i], endereco=enderecos[i], email_institucional=self.email('ong', i),
+                        nome_responsavel=f'{pessoas[i][0]} {pessoas[i][1]}', cpf_responsavel=cpfs[i],
+                        latitude=latitudes[i], longitude=longitudes[i],
+                        # bulk_create não passa por ONG.save.
+                        geohash=codificar_geohash(latitudes[i], longitudes[i]),
+                    )
+                    for user_id, i in zip(ids, indices)
+                ], batch_size=self.lote)
+
+    def atributos_pets(self, aleatorio, quantidade):
+        nomes_especies = list(ESPECIES)
+        especies = aleatorio.choice(len(ESPECIES), size=quantidade, p=[ESPECIES[e][0] for e in nomes_especies])
+        portes = np.empty(quantidade, dtype=np.int64)
+        pesos = np.empty(quantidade)
+        racas = np.empty(quantidade, dtype=object)
+
+        for codigo, especie in enumerate(nomes_especies):
+            linhas = np.flatnonzero(especies == codigo)
+            _, probabilidades, faixas = ESPECIES[especie]
+            portes[linhas] = aleatorio.choice(len(PORTES), size=len(linhas), p=probabilidades)
+            faixas = np.array(faixas)[portes[linhas]]
+            pesos[linhas] = aleatorio.uniform(faixas[:, 0], faixas[:, 1])
+            opcoes, probabilidades = RACAS[especie]
+            racas[linhas] = np.array(opcoes, dtype=object)[aleatorio.choice(len(opcoes), size=len(linhas), p=probabilidades)]
+
+        # Abrigos recebem mais filhotes e adultos jovens do que idosos.
+        idades = np.minimum(aleatorio.gamma(1.6, 2.2, quantidade).astype(np.int64), IDADE_MAXIMA)
+        return {
+            'especie': [nomes_especies[e] for e in especies.tolist()],
+            'porte': [PORTES[p] for p in portes.tolist()],
+            'peso': np.round(pesos, 1).tolist(),
+            'idade': idades.tolist(),
+            'raca': racas.tolist(),
+            'nome': [NOMES_PET[n] for n in aleatorio.integers(len(NOMES_PET), size=quantidade).tolist()],
+            'sexo': aleatorio.choice(['Macho', 'Fêmea'], size=quantidade).tolist(),
+            'castrado': np.where(aleatorio.random(quantidade) < 0.3 + 0.08 * idades, 'Sim', 'Não').tolist(),
+            'status': aleatorio.choice(STATUS[0], size=quantidade, p=STATUS[1]).tolist(),
+        }
+
+    def gerar_pets(self, aleatorio, quantidade):
+        atributos = self.atributos_pets(aleatorio, quantidade)
+        _, latitudes, longitudes = self.coordenadas(aleatorio, quantidade)
+        # Sem foto nova por pet: reaproveita as que já estão no armazenamento.
+        try:
+            fotos = sorted(f'fotosPet/{nome}' for nome in armazenamento_fotos.listdir('fotosPet')[1])
+        except FileNotFoundError:
+            fotos = []
+        escolhas_fotos = aleatorio.integers(len(fotos), size=quantidade).tolist() if fotos else None
+
+        for indices in self.lotes(quantidade):
+            pets = [
+                Pet(
+                    **{campo: valores[i] for campo, valores in atributos.items()},
+                    foto=fotos[escolhas_fotos[i]] if fotos else None,
+                    latitude=latitudes[i], longitude=longitudes[i],
+                    geohash=codificar_geohash(latitudes[i], longitudes[i]),
+                )
+                for i in indices
+            ]
+            with transaction.atomic():
+                Pet.objects.bulk_create(pets, batch_size=self.lote)
+                if not self.options['sem_indice']:
+                    if all(pet.pk for pet in pets):
+                        indexar_pets(pets)
+                    else:
+                        self.options['sem_indice'] = True
+                        self.stderr.write('O banco não devolveu os ids dos pets; o índice de busca não foi atualizado.')
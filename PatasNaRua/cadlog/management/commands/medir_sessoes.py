@@ -0,0 +1,84 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.conf import settings
+
+from cadlog.models import CustomUser
+from cadlog.sessoes import CHAVE_RENOVACAO
+
+PAGINAS = ['/', '/tela-user/', '/api/pets/', '/cadastro/']
+
+
+class _Desfazer(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Conta as escritas em django_session por requisição com o comportamento antigo '
+        '(SESSION_SAVE_EVERY_REQUEST) e com a renovação preguiçosa. Nada fica gravado no banco.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requisicoes', type=int, default=200)
+
+    def escritas(self, requisicoes, dias_por_requisicao=0):
+        contador = {'escritas': 0}
+
+        def contar(execute, sql, params, many, context):
+            comando = sql.lstrip().split(' ', 1)[0].upper()
+            if 'django_session' in sql and comando in ('INSERT', 'UPDATE', 'DELETE'):
+                contador['escritas'] += 1
+            return execute(sql, params, many, context)
+
+        usuario = CustomUser.objects.create_user(
+            username='medir_sessoes@exemplo.com', email='medir_sessoes@exemplo.com', password=None,
+        )
+        cliente = Client()
+        cliente.force_login(usuario)
+        sessao = cliente.session
+        sessao.set_expiry(2592000)
+        sessao.save()
+
+        for i in range(requisicoes):
+            if dias_por_requisicao:
+                # Simula o tempo passando recuando o carimbo da última renovação.
+                sessao = cliente.session
+                if CHAVE_RENOVACAO in sessao:
+                    sessao[CHAVE_RENOVACAO] -= int(dias_por_requisicao * 86400)
+                    sessao.save()
+            with connection.execute_wrapper(contar):
+                cliente.get(PAGINAS[i % len(PAGINAS)])
+        return contador['escritas']
+
+    def medir(self, nome, requisicoes, **kwargs):
+        try:
+            with transaction.atomic():
+                escritas = self.escritas(requisicoes, **kwargs)
+                raise _Desfazer
+        except _Desfazer:
+            pass
+        self.stdout.write(
+            f'{nome:<40} {escritas:>6} escritas / {requisicoes} requisições '
+            f'({escritas / requisicoes:.3f} por requisição)'
+        )
+
+    def handle(self, *args, **options):
+        requisicoes = options['requisicoes']
+        antigo = [
+            'django.contrib.sessions.middleware.SessionMiddleware'
+            if m == 'cadlog.sessoes.SessaoPreguicosaMiddleware' else m
+            for m in settings.MIDDLEWARE
+        ]
+
+        with override_settings(
+            MIDDLEWARE=antigo,
+            SESSION_ENGINE='django.contrib.sessions.backends.db',
+            SESSION_SAVE_EVERY_REQUEST=True,
+        ):
+            self.medir('antes (db + SAVE_EVERY_REQUEST)', requisicoes)
+
+        self.medir('depois (renovação preguiçosa)', requisicoes)
+        # Com 30 dias de vida e fração 0,1 a sessão renova a cada 3 dias.
+        self.medir('depois, 1 dia entre requisições', requisicoes, dias_por_requisicao=1)
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from cadlog.outbox import LOTE_EMAILS, EntregadorEmails
+
+
+class Command(BaseCommand):
+    help = 'Envia os emails pendentes da fila, com uma conexão SMTP reaproveitada entre mensagens.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=LOTE_EMAILS)
+        parser.add_argument('--intervalo', type=float, default=1.0,
+                            help='Segundos de espera quando a fila está vazia.')
+        parser.add_argument('--uma-vez', action='store_true',
+                            help='Processa o que estiver pendente e encerra.')
+
+    def handle(self, *args, **options):
+        entregador = EntregadorEmails()
+        try:
+            while True:
+                reservados, enviados = entregador.processar_lote(options['lote'])
+                if reservados:
+                    self.stdout.write(f'Emails enviados: {enviados}/{reservados}')
+
+                if options['uma_vez'] and reservados < options['lote']:
+                    break
+                if not reservados:
+                    # Sem fila, a conexão não fica presa ao servidor SMTP.
+                    entregador.fechar()
+                    time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            entregador.fechar()
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from cadlog.smtp_local import ServidorSMTPLocal
+
+
+class Command(BaseCommand):
+    help = (
+        'Sobe um servidor SMTP local que só registra as mensagens recebidas. '
+        'Use com EMAIL_HOST=127.0.0.1, EMAIL_PORT=1025 e EMAIL_USE_TLS=False.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--porta', type=int, default=1025)
+
+    def handle(self, *args, **options):
+        def ao_receber(remetente, destinatarios, conteudo):
+            self.stdout.write(f'--- De {remetente} para {", ".join(destinatarios)}')
+            self.stdout.write(conteudo.decode(errors='replace'))
+
+        servidor = ServidorSMTPLocal((options['host'], options['porta']), ao_receber=ao_receber)
+        self.stdout.write(self.style.SUCCESS(
+            f"SMTP local ouvindo em {options['host']}:{options['porta']}"
+        ))
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.server_close()
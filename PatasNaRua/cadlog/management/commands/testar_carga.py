@@ -0,0 +1,345 @@
+import http.client
+import io
+import json
+import logging
+import random
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connections
+from django.test.testcases import LiveServerThread, _StaticFilesHandler
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from cadlog import dns_cache
+from cadlog.dns_local import ServidorDNSLocal
+from cadlog.models import CustomUser, UsuarioComum
+from cadlog.outbox import EntregadorEmails
+from cadlog.smtp_local import ServidorSMTPLocal
+from ong.models import Pet
+from PatasNaRua.instrumentacao import percentil
+
+DOMINIO = 'carga.test'
+SENHA = 'Carga#Teste2024'
+ROTAS = ('tela_user_page', 'detalhes_pet', 'cadpet_api', 'login', 'recuperacao')
+
+
+def jpeg_pequeno():
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), (200, 120, 40)).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+class Navegador:
+    """Cliente HTTP mínimo com cookies, sem seguir redirects."""
+
+    def __init__(self, host, porta):
+        self.host = host
+        self.porta = porta
+        self.cookies = {}
+
+    def requisitar(self, metodo, caminho, corpo=None, tipo=None):
+        cabecalhos = {}
+        if self.cookies:
+            cabecalhos['Cookie'] = '; '.join(f'{k}={v}' for k, v in self.cookies.items())
+        if tipo:
+            cabecalhos['Content-Type'] = tipo
+
+        conexao = http.client.HTTPConnection(self.host, self.porta, timeout=60)
+        try:
+            conexao.request(metodo, caminho, body=corpo, headers=cabecalhos)
+            resposta = conexao.getresponse()
+            conteudo = resposta.read()
+        finally:
+            conexao.close()
+
+        for cabecalho in resposta.headers.get_all('Set-Cookie') or []:
+            for nome, morsel in SimpleCookie(cabecalho).items():
+                if morsel.value:
+                    self.cookies[nome] = morsel.value
+                else:
+                    self.cookies.pop(nome, None)
+        return resposta.status, resposta.headers.get('Location', ''), conteudo
+
+    def get(self, caminho):
+        return self.requisitar('GET', caminho)
+
+    def post(self, caminho, dados):
+        if 'csrftoken' not in self.cookies:
+            self.get(caminho)
+        dados = dict(dados, csrfmiddlewaretoken=self.cookies.get('csrftoken', ''))
+        return self.requisitar('POST', caminho, urlencode(dados), 'application/x-www-form-urlencoded')
+
+    def post_multipart(self, caminho, campos, arquivos):
+        fronteira = uuid.uuid4().hex
+        partes = []
+        for nome, valor in campos.items():
+            partes.append(
+                f'--{fronteira}\r\nContent-Disposition: form-data; name="{nome}"\r\n\r\n{valor}\r\n'.encode()
+            )
+        for nome, (arquivo, conteudo, tipo) in arquivos.items():
+            partes.append(
+                f'--{fronteira}\r\nContent-Disposition: form-data; name="{nome}"; filename="{arquivo}"\r\n'
+                f'Content-Type: {tipo}\r\n\r\n'.encode() + conteudo + b'\r\n'
+            )
+        partes.append(f'--{fronteira}--\r\n'.encode())
+        return self.requisitar('POST', caminho, b''.join(partes), f'multipart/form-data; boundary={fronteira}')
+
+
+class Command(BaseCommand):
+    help = (
+        'Sobe o projeto num banco de teste, com SMTP e DNS locais, e dispara tráfego '
+        'concorrente nas rotas principais. Grava vazão e p50/p95/p99 por rota num JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=8, help='Usuários virtuais simultâneos.')
+        parser.add_argument('--duracao', type=float, default=30.0, help='Segundos de tráfego.')
+        parser.add_argument('--rotas', default=','.join(ROTAS), help=f'Subconjunto de {", ".join(ROTAS)}.')
+        parser.add_argument('--pets', type=int, default=500)
+        parser.add_argument('--contas', type=int, default=50)
+        parser.add_argument('--iteracoes-senha', type=int, default=None,
+                            help='Sobrescreve SENHA_PBKDF2_ITERACOES durante o teste.')
+        parser.add_argument('--saida', default='carga.json')
+        parser.add_argument('--semente', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rotas = [r.strip() for r in options['rotas'].split(',') if r.strip()]
+        desconhecidas = set(rotas) - set(ROTAS)
+        if desconhecidas:
+            raise CommandError(f'Rotas desconhecidas: {", ".join(sorted(desconhecidas))}')
+
+        if options['verbosity'] < 2:
+            logging.disable(logging.WARNING)
+
+        smtp = ServidorSMTPLocal(('127.0.0.1', 0))
+        dns = ServidorDNSLocal(('127.0.0.1', 0), zonas={DOMINIO: {'MX': [f'10 mx.{DOMINIO}.'], 'A': ['127.0.0.1']}})
+        smtp.iniciar_em_segundo_plano()
+        dns.iniciar_em_segundo_plano()
+
+        diretorio = tempfile.TemporaryDirectory(prefix='carga-')
+        ajustes = {
+            'EMAIL_HOST': '127.0.0.1',
+            'EMAIL_PORT': smtp.server_address[1],
+            'EMAIL_USE_TLS': False,
+            'DNS_NAMESERVERS': ['127.0.0.1'],
+            'DNS_PORT': dns.server_address[1],
+            'LIMITES_ATIVOS': False,
+            'MEDIA_ROOT': f'{diretorio.name}/media',
+            'FOTOS_VARIANTES_ROOT': f'{diretorio.name}/media/variantes',
+            'UPLOADS_ROOT': f'{diretorio.name}/uploads',
+            'ALLOWED_HOSTS': ['*'],
+        }
+        if options['iteracoes_senha']:
+            ajustes['SENHA_PBKDF2_ITERACOES'] = options['iteracoes_senha']
+
+        for conexao in connections.all():
+            if conexao.vendor == 'sqlite':
+                # Banco em arquivo: com o banco em memória todas as threads
+                # do servidor dividiriam a mesma conexão.
+                conexao.settings_dict['TEST']['NAME'] = f'{diretorio.name}/{conexao.alias}.sqlite3'
+                conexao.settings_dict['OPTIONS'].setdefault('timeout', 30)
+
+        try:
+            with override_settings(**ajustes):
+                dns_cache._resolvedor = None
+                configuracao = setup_databases(verbosity=0, interactive=False)
+                try:
+                    self.executar(rotas, options)
+                finally:
+                    teardown_databases(configuracao, verbosity=0)
+        finally:
+            dns_cache._resolvedor = None
+            smtp.shutdown()
+            dns.shutdown()
+            diretorio.cleanup()
+            logging.disable(logging.NOTSET)
+
+    def preparar(self, options):
+        aleatorio = random.Random(options['semente'])
+        foto = SimpleUploadedFile('carga.jpg', jpeg_pequeno(), content_type='image/jpeg')
+        modelo = Pet.objects.create(
+            nome='Modelo', especie='Cachorro', porte='Médio', raca='SRD', peso=10, idade=2,
+            sexo='Macho', castrado='Sim', foto=foto,
+        )
+        Pet.objects.bulk_create([
+            Pet(
+                nome=f'Pet {i}', especie=aleatorio.choice(['Cachorro', 'Gato']),
+                porte=aleatorio.choice(['Pequeno', 'Médio', 'Grande']), raca='SRD',
+                peso=aleatorio.randint(2, 40), idade=aleatorio.randint(0, 15),
+                sexo=aleatorio.choice(['Macho', 'Fêmea']), castrado=aleatorio.choice(['Sim', 'Não']),
+                foto=modelo.foto.name,
+            )
+            for i in range(options['pets'] - 1)
+        ], batch_size=500)
+
+        hash_senha = make_password(SENHA)
+        contas = []
+        for grupo in ('login', 'recuperacao'):
+            CustomUser.objects.bulk_create([
+                CustomUser(username=f'{grupo}{i}@{DOMINIO}', email=f'{grupo}{i}@{DOMINIO}',
+                           password=hash_senha, first_name='Carga')
+                for i in range(options['contas'])
+            ])
+            usuarios = list(CustomUser.objects.filter(email__startswith=grupo))
+            UsuarioComum.objects.bulk_create([
+                UsuarioComum(user=u, cpf=f'{grupo[0]}{u.id:010d}', data_nascimento='1990-01-01', endereco='Rua')
+                for u in usuarios
+            ])
+            contas.append([u.email for u in usuarios])
+
+        return list(Pet.objects.values_list('id', flat=True)), contas[0], contas[1]
+
+    def executar(self, rotas, options):
+        pet_ids, contas_login, contas_recuperacao = self.preparar(options)
+        foto = jpeg_pequeno()
+
+        servidor = LiveServerThread('127.0.0.1', _StaticFilesHandler, port=0)
+        servidor.daemon = True
+        servidor.start()
+        servidor.is_ready.wait()
+        if servidor.error:
+            raise servidor.error
+
+        parar = threading.Event()
+        entregas = threading.Thread(target=self.entregar_emails, args=(parar,), daemon=True)
+        entregas.start()
+
+        amostras = defaultdict(list)
+        status = defaultdict(lambda: defaultdict(int))
+        trava = threading.Lock()
+        # Cada conta de recuperação é usada por um usuário virtual por vez.
+        livres = list(contas_recuperacao)
+
+        def medir(rota, funcao, *args):
+            inicio = time.perf_counter()
+            try:
+                resposta = funcao(*args)
+            except Exception as e:
+                resposta = (type(e).__name__, '', b'')
+            duracao = (time.perf_counter() - inicio) * 1000
+            with trava:
+                amostras[rota].append(duracao)
+                status[rota][str(resposta[0])] += 1
+            return resposta
+
+        def usuario_virtual(indice):
+            aleatorio = random.Random(options['semente'] + indice)
+            navegador = Navegador('127.0.0.1', servidor.port)
+            while not parar.is_set():
+                rota = aleatorio.choice(rotas)
+                if rota == 'tela_user_page':
+                    medir(rota, navegador.get, reverse('tela_user_page'))
+                elif rota == 'detalhes_pet':
+                    medir(rota, navegador.get, reverse('detalhes_pet', args=[aleatorio.choice(pet_ids)]))
+                elif rota == 'cadpet_api':
+                    anonimo = Navegador('127.0.0.1', servidor.port)
+                    medir(rota, anonimo.post_multipart, reverse('cadpet_api'), {
+                        'nome': 'Carga', 'especie': 'Gato', 'porte': 'Pequeno', 'raca': 'SRD',
+                        'peso': '4', 'idade': '2', 'sexo': 'Fêmea', 'castrado': 'Sim',
+                    }, {'foto': ('carga.jpg', foto, 'image/jpeg')})
+                elif rota == 'login':
+                    medir(rota, navegador.post, reverse('login'),
+                          {'email': aleatorio.choice(contas_login), 'senha': SENHA})
+                else:
+                    with trava:
+                        email = livres.pop() if livres else None
+                    if email:
+                        try:
+                            self.recuperar(medir, Navegador('127.0.0.1', servidor.port), email)
+                        finally:
+                            with trava:
+                                livres.append(email)
+
+        threads = [threading.Thread(target=usuario_virtual, args=(i,), daemon=True)
+                   for i in range(options['usuarios'])]
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(options['duracao'])
+        parar.set()
+        for thread in threads:
+            thread.join()
+        decorrido = time.perf_counter() - inicio
+        entregas.join()
+        servidor.terminate()
+
+        self.relatar(amostras, status, decorrido, rotas, options)
+
+    def recuperar(self, medir, navegador, email):
+        codigo, destino, _ = medir('esqueci_senha', navegador.post, reverse('esqueci_senha'), {'email': email})
+        if codigo != 302:
+            return
+        # O código também sai por email pelo SMTP local; aqui é lido direto do cache.
+        codigo_recuperacao = cache.get(f'codigo_recuperacao_{email}')
+        codigo, destino, _ = medir('verificar_codigo', navegador.post, urlsplit(destino).path, {'codigo': codigo_recuperacao})
+        if codigo != 302:
+            return
+        medir('redefinir_senha', navegador.post, urlsplit(destino).path, {'nova_senha': SENHA, 'confirma_senha': SENHA})
+
+    def entregar_emails(self, parar):
+        entregador = EntregadorEmails()
+        try:
+            while not parar.is_set():
+                try:
+                    reservados, _ = entregador.processar_lote()
+                except DatabaseError:
+                    # SQLite travado pelos escritores do teste; tenta no próximo ciclo.
+                    reservados = 0
+                if not reservados:
+                    parar.wait(0.2)
+        finally:
+            entregador.fechar()
+            connections.close_all()
+
+    def relatar(self, amostras, status, decorrido, rotas, options):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=settings.BASE_DIR,
+            ).stdout.strip() or None
+        except OSError:
+            commit = None
+
+        resultado = {
+            'commit': commit,
+            'data': timezone.now().isoformat(),
+            'usuarios': options['usuarios'],
+            'duracao_s': round(decorrido, 2),
+            'rotas_sorteadas': rotas,
+            'rotas': {},
+        }
+        for rota, latencias in sorted(amostras.items()):
+            latencias.sort()
+            resultado['rotas'][rota] = {
+                'requisicoes': len(latencias),
+                'vazao_rps': round(len(latencias) / decorrido, 2),
+                'p50_ms': round(percentil(latencias, 50), 2),
+                'p95_ms': round(percentil(latencias, 95), 2),
+                'p99_ms': round(percentil(latencias, 99), 2),
+                'max_ms': round(latencias[-1], 2),
+                'status': dict(status[rota]),
+            }
+
+        with open(options['saida'], 'w') as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+
+        self.stdout.write(f"{'rota':<18} {'req':>6} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}  status")
+        for rota, dados in resultado['rotas'].items():
+            self.stdout.write(
+                f"{rota:<18} {dados['requisicoes']:>6} {dados['vazao_rps']:>8} {dados['p50_ms']:>8} "
+                f"{dados['p95_ms']:>8} {dados['p99_ms']:>8}  {dados['status']}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Resultado gravado em {options['saida']}"))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cadlog', '0003_alter_customuser_telefone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ong',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='ong',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='ong',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:56
+
+import logging
+
+import cadlog.models
+from django.db import migrations
+
+logger = logging.getLogger(__name__)
+
+
+def normalizar_emails(apps, schema_editor):
+    # Comparação feita em Python: em MySQL com collation _ci um filtro
+    # email != LOWER(email) não encontraria as linhas com maiúsculas.
+    for nome_modelo, coluna in (('CustomUser', 'email'), ('ONG', 'email_institucional')):
+        modelo = apps.get_model('cadlog', nome_modelo)
+        existentes = set(modelo.objects.values_list(coluna, flat=True))
+        for pk, email in modelo.objects.values_list('pk', coluna).iterator(chunk_size=2000):
+            normalizado = cadlog.models.normalizar_email(email)
+            if normalizado == email:
+                continue
+            if normalizado in existentes:
+                # Duas contas que só diferem na caixa: deixa como está para revisão manual.
+                logger.warning(f'{nome_modelo} pk={pk}: {email!r} conflita com {normalizado!r}, não alterado')
+                continue
+            modelo.objects.filter(pk=pk).update(**{coluna: normalizado})
+            existentes.add(normalizado)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cadlog', '0005_emailpendente'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='customuser',
+            managers=[
+                ('objects', cadlog.models.CustomUserManager()),
+            ],
+        ),
+        migrations.RunPython(normalizar_emails, migrations.RunPython.noop),
+    ]
@@ -1,15 +1,36 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from phonenumber_field.modelfields import PhoneNumberField
 from django.db import models
+from django.utils import timezone
+from ong.geo import codificar_geohash
+
+def normalizar_email(email):
+    return email.strip().lower() if email else email
+
+# Emails são gravados já normalizados, então toda busca usa igualdade
+# exata e cai no índice único em vez de um LIKE/UPPER sem índice.
+class CustomUserManager(UserManager):
+    @classmethod
+    def normalize_email(cls, email):
+        return normalizar_email(email or '')
+
+    def get_by_natural_key(self, username):
+        return self.get(**{self.model.USERNAME_FIELD: normalizar_email(username)})
 
 class CustomUser(AbstractUser):
     email = models.EmailField(unique=True)
 
     telefone = PhoneNumberField(region='BR', blank=True, null=True)
 
+    objects = CustomUserManager()
+
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
+    def save(self, *args, **kwargs):
+        self.email = normalizar_email(self.email)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.email
     
@@ -38,10 +59,45 @@ class ONG(models.Model):
     email_institucional = models.EmailField(unique=True)
     nome_responsavel = models.CharField(max_length=200)
     cpf_responsavel = models.CharField(max_length=14)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, null=True, blank=True, editable=False, db_index=True)
+
+    def save(self, *args, **kwargs):
+        self.email_institucional = normalizar_email(self.email_institucional)
+        self.geohash = codificar_geohash(self.latitude, self.longitude)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.nome_ong
     
     class Meta:
         verbose_name = "ONG"
-        verbose_name_plural = "ONGs"
\ No newline at end of file
+        verbose_name_plural = "ONGs"
+
+class EmailPendente(models.Model):
+    STATUS_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('enviado', 'Enviado'),
+        ('falhou', 'Falhou'),
+    ]
+
+    destinatario = models.EmailField()
+    assunto = models.CharField(max_length=200)
+    mensagem = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pendente')
+    tentativas = models.PositiveIntegerField(default=0)
+    proxima_tentativa = models.DateTimeField(default=timezone.now)
+    ultimo_erro = models.TextField(blank=True, default='')
+    criado_em = models.DateTimeField(auto_now_add=True)
+    enviado_em = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.assunto} -> {self.destinatario} ({self.status})"
+
+    class Meta:
+        verbose_name = "Email pendente"
+        verbose_name_plural = "Emails pendentes"
+        indexes = [
+            models.Index(fields=['status', 'proxima_tentativa'], name='email_status_proxima_idx'),
+        ]
@@ -0,0 +1,143 @@
+from datetime import timedelta
+import logging
+import random
+import smtplib
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EmailPendente
+
+logger = logging.getLogger(__name__)
+
+LOTE_EMAILS = 50
+MAX_TENTATIVAS = 6
+ESPERA_BASE = 30
+ESPERA_MAXIMA = 60 * 60
+# Tempo em que uma mensagem reservada por um worker fica invisível aos outros;
+# se o worker cair no meio do envio, ela volta à fila depois disso.
+RESERVA = 5 * 60
+
+
+def enfileirar_email(destinatario, assunto, mensagem):
+    return EmailPendente.objects.create(
+        destinatario=destinatario,
+        assunto=assunto,
+        mensagem=mensagem,
+    )
+
+
+def calcular_espera(tentativas):
+    espera = min(ESPERA_BASE * (2 ** (tentativas - 1)), ESPERA_MAXIMA)
+    return timedelta(seconds=espera + random.uniform(0, espera / 4))
+
+
+def reservar_lote(lote=LOTE_EMAILS):
+    agora = timezone.now()
+    with transaction.atomic():
+        pendentes = list(
+            EmailPendente.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='pendente', proxima_tentativa__lte=agora)
+            .order_by('proxima_tentativa')[:lote]
+        )
+        if pendentes:
+            EmailPendente.objects.filter(id__in=[email.id for email in pendentes]).update(
+                proxima_tentativa=agora + timedelta(seconds=RESERVA)
+            )
+    return pendentes
+
+
+def liberar_reservas(emails, espera=ESPERA_BASE):
+    # Devolve à fila sem contar tentativa: não foram nem tentadas.
+    if emails:
+        EmailPendente.objects.filter(id__in=[email.id for email in emails]).update(
+            proxima_tentativa=timezone.now() + timedelta(seconds=espera)
+        )
+
+
+def registrar_falha(email, erro):
+    email.tentativas += 1
+    email.ultimo_erro = str(erro)[:1000]
+    if email.tentativas >= MAX_TENTATIVAS:
+        email.status = 'falhou'
+        logger.error(f'Email {email.id} para {email.destinatario} descartado após {email.tentativas} tentativas: {erro}')
+    else:
+        email.proxima_tentativa = timezone.now() + calcular_espera(email.tentativas)
+        logger.warning(f'Falha ao enviar email {email.id} para {email.destinatario} (tentativa {email.tentativas}): {erro}')
+    email.save(update_fields=['tentativas', 'ultimo_erro', 'status', 'proxima_tentativa'])
+
+
+def registrar_envio(email):
+    email.status = 'enviado'
+    email.enviado_em = timezone.now()
+    # O conteúdo pode ter códigos de recuperação; não fica guardado depois do envio.
+    email.mensagem = ''
+    email.ultimo_erro = ''
+    email.save(update_fields=['status', 'enviado_em', 'mensagem', 'ultimo_erro'])
+
+
+class EntregadorEmails:
+    """Drena a fila reaproveitando uma única conexão SMTP entre mensagens e lotes."""
+
+    def __init__(self, conexao=None):
+        self.conexao = conexao or get_connection(fail_silently=False)
+        self.aberta = False
+
+    def abrir(self):
+        if not self.aberta:
+            try:
+                self.conexao.open()
+            except Exception:
+                # Uma conexão que falhou no login não pode ser reaproveitada.
+                try:
+                    self.conexao.close()
+                except Exception:
+                    pass
+                raise
+            self.aberta = True
+
+    def fechar(self):
+        if self.aberta:
+            try:
+                self.conexao.close()
+            finally:
+                self.aberta = False
+
+    def processar_lote(self, lote=LOTE_EMAILS):
+        pendentes = reservar_lote(lote)
+        enviados = 0
+
+        for indice, email in enumerate(pendentes):
+            try:
+                self.abrir()
+            except Exception as e:
+                # Sem servidor SMTP, cada mensagem esperaria o timeout da
+                # conexão e o lote passaria da RESERVA, sendo reservado e
+                # enviado de novo por outro worker. Para no primeiro erro.
+                registrar_falha(email, e)
+                liberar_reservas(pendentes[indice + 1:])
+                break
+
+            mensagem = EmailMessage(
+                email.assunto,
+                email.mensagem,
+                settings.DEFAULT_FROM_EMAIL,
+                [email.destinatario],
+                connection=self.conexao,
+            )
+            try:
+                mensagem.send()
+            except (smtplib.SMTPServerDisconnected, ConnectionError, OSError) as e:
+                # A conexão caiu: a próxima mensagem reabre uma nova.
+                self.fechar()
+                registrar_falha(email, e)
+            except Exception as e:
+                registrar_falha(email, e)
+            else:
+                registrar_envio(email)
+                enviados += 1
+
+        return len(pendentes), enviados
@@ -0,0 +1,119 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password, verify_password
+from django.conf import settings
+from .models import CustomUser, normalizar_email
+import asyncio
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PBKDF2Ajustavel(PBKDF2PasswordHasher):
+    """
+    Mesmo algoritmo do PBKDF2 padrão, com o número de iterações vindo de
+    SENHA_PBKDF2_ITERACOES. Hashes com outro custo são refeitos no próximo login.
+    """
+
+    @property
+    def iterations(self):
+        return settings.SENHA_PBKDF2_ITERACOES
+
+
+class FilaSaturada(RuntimeError):
+    pass
+
+
+class FilaHash:
+    """
+    Executor limitado para verificação de senha. Aceita no máximo
+    `trabalhadores + fila` tarefas ao mesmo tempo e descarta as que não
+    começarem dentro do `prazo`, para que uma rajada de logins não
+    segure os workers que servem as outras páginas.
+    """
+
+    def __init__(self, trabalhadores, fila, prazo):
+        self.limite = trabalhadores + fila
+        self.prazo = prazo
+        self.pendentes = 0
+        self.descartadas = 0
+        self._trava = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=trabalhadores, thread_name_prefix='hash-senha')
+
+    def _admitir(self):
+        with self._trava:
+            if self.pendentes >= self.limite:
+                self.descartadas += 1
+                raise FilaSaturada('fila de hash cheia')
+            self.pendentes += 1
+
+    def _liberar(self):
+        with self._trava:
+            self.pendentes -= 1
+
+    def _executar(self, limite, funcao, args):
+        try:
+            if time.monotonic() > limite:
+                with self._trava:
+                    self.descartadas += 1
+                raise FilaSaturada('prazo da fila de hash expirado')
+            return funcao(*args)
+        finally:
+            self._liberar()
+
+    async def executar(self, funcao, *args):
+        self._admitir()
+        limite = time.monotonic() + self.prazo
+        futuro = self._executor.submit(self._executar, limite, funcao, args)
+        # Se a corrotina for cancelada (cliente desconectou) com a tarefa ainda
+        # na fila, o wrap_future cancela o futuro e _executar nunca roda.
+        futuro.add_done_callback(self._liberar_se_cancelada)
+        return await asyncio.wrap_future(futuro)
+
+    def _liberar_se_cancelada(self, futuro):
+        if futuro.cancelled():
+            self._liberar()
+
+
+_fila = None
+_trava_fila = threading.Lock()
+
+
+def fila_hash():
+    global _fila
+    if _fila is None:
+        with _trava_fila:
+            if _fila is None:
+                _fila = FilaHash(
+                    settings.LOGIN_HASH_TRABALHADORES,
+                    settings.LOGIN_HASH_FILA,
+                    settings.LOGIN_HASH_PRAZO,
+                )
+    return _fila
+
+
+async def autenticar(email, senha):
+    """
+    Equivalente ao ModelBackend.authenticate, com o hash rodando na FilaHash.
+    Levanta FilaSaturada quando não há capacidade para verificar a senha.
+    """
+    fila = fila_hash()
+    try:
+        user = await CustomUser.objects.select_related('ong', 'usuario_comum').aget(email=normalizar_email(email))
+    except CustomUser.DoesNotExist:
+        # Gasta o mesmo tempo de um usuário existente para não revelar quais emails existem.
+        await fila.executar(make_password, senha)
+        return None
+
+    correta, precisa_atualizar = await fila.executar(verify_password, senha, user.password)
+    if not correta or not user.is_active:
+        return None
+
+    if precisa_atualizar:
+        user.password = await fila.executar(make_password, senha)
+        await user.asave(update_fields=['password'])
+        logger.info(f'Hash de senha atualizado para o custo atual: {email}')
+
+    user.backend = 'django.contrib.auth.backends.ModelBackend'
+    return user
@@ -0,0 +1,48 @@
+from asgiref.sync import sync_to_async
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.conf import settings
+import time
+
+CHAVE_RENOVACAO = '_renovada_em'
+
+
+def renovar_se_preciso(sessao, agora=None):
+    """
+    Marca a sessão como modificada só quando já passou SESSION_FRACAO_RENOVACAO
+    do tempo de vida desde a última gravação, o que empurra a expiração
+    (cookie e expire_date) sem escrever no banco a cada página.
+    """
+    if sessao.is_empty():
+        return False
+
+    agora = int(agora or time.time())
+    renovada_em = sessao.get(CHAVE_RENOVACAO)
+    intervalo = sessao.get_expiry_age() * settings.SESSION_FRACAO_RENOVACAO
+
+    # Se a sessão já vai ser gravada, aproveita a escrita para registrar o momento.
+    if sessao.modified or renovada_em is None or agora - renovada_em >= intervalo:
+        sessao[CHAVE_RENOVACAO] = agora
+        return True
+    return False
+
+
+class SessaoPreguicosaMiddleware(SessionMiddleware):
+    """SessionMiddleware que substitui o SESSION_SAVE_EVERY_REQUEST pela renovação preguiçosa."""
+
+    def process_response(self, request, response):
+        sessao = getattr(request, 'session', None)
+        if sessao is not None and sessao.accessed:
+            renovar_se_preciso(sessao)
+        return super().process_response(request, response)
+
+    async def __acall__(self, request):
+        # Criar o SessionStore e decidir a renovação não fazem I/O (uma sessão
+        # acessada já foi carregada pela view); só a gravação sai do event loop.
+        self.process_request(request)
+        response = await self.get_response(request)
+        sessao = request.session
+        if sessao.accessed:
+            renovar_se_preciso(sessao)
+        if sessao.modified and not sessao.is_empty() and response.status_code < 500:
+            return await sync_to_async(super().process_response)(request, response)
+        return super().process_response(request, response)
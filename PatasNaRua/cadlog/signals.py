@@ -0,0 +1,26 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .disponibilidade import indice_disponibilidade
+from .models import CustomUser, ONG, UsuarioComum
+
+
+# Remoções não saem do filtro de Bloom: viram falsos positivos, que a
+# consulta de confirmação já trata.
+@receiver(post_save, sender=CustomUser)
+def indexar_email(sender, instance, raw=False, **kwargs):
+    if not raw:
+        indice_disponibilidade.adicionar('email', instance.email)
+
+
+@receiver(post_save, sender=UsuarioComum)
+def indexar_cpf(sender, instance, raw=False, **kwargs):
+    if not raw:
+        indice_disponibilidade.adicionar('cpf', instance.cpf)
+
+
+@receiver(post_save, sender=ONG)
+def indexar_ong(sender, instance, raw=False, **kwargs):
+    if not raw:
+        indice_disponibilidade.adicionar('cnpj', instance.cnpj)
+        indice_disponibilidade.adicionar('email', instance.email_institucional)
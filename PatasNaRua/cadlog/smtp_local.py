@@ -0,0 +1,78 @@
+import socketserver
+import threading
+
+
+class _SessaoSMTP(socketserver.StreamRequestHandler):
+    def responder(self, linha):
+        self.wfile.write(f'{linha}\r\n'.encode())
+
+    def handle(self):
+        self.responder('220 patasnarua-smtp-local pronto')
+        remetente = None
+        destinatarios = []
+
+        while True:
+            linha = self.rfile.readline()
+            if not linha:
+                return
+            comando = linha.decode(errors='replace').strip()
+            verbo = comando.split(' ', 1)[0].upper()
+
+            if verbo == 'EHLO':
+                self.responder('250-patasnarua-smtp-local')
+                self.responder('250 AUTH PLAIN')
+            elif verbo == 'HELO':
+                self.responder('250 patasnarua-smtp-local')
+            elif verbo == 'AUTH':
+                self.responder('235 Autenticado')
+            elif verbo == 'MAIL':
+                remetente = comando.split(':', 1)[-1].strip()
+                destinatarios = []
+                self.responder('250 OK')
+            elif verbo == 'RCPT':
+                destinatarios.append(comando.split(':', 1)[-1].strip())
+                self.responder('250 OK')
+            elif verbo == 'DATA':
+                self.responder('354 Termine com <CRLF>.<CRLF>')
+                partes = []
+                while True:
+                    dado = self.rfile.readline()
+                    if not dado or dado in (b'.\r\n', b'.\n'):
+                        break
+                    partes.append(dado[1:] if dado.startswith(b'..') else dado)
+                self.server.registrar(remetente, destinatarios, b''.join(partes))
+                self.responder('250 OK')
+            elif verbo == 'RSET':
+                remetente, destinatarios = None, []
+                self.responder('250 OK')
+            elif verbo == 'NOOP':
+                self.responder('250 OK')
+            elif verbo == 'QUIT':
+                self.responder('221 Tchau')
+                return
+            else:
+                self.responder('502 Comando não implementado')
+
+
+class ServidorSMTPLocal(socketserver.ThreadingTCPServer):
+    """Servidor SMTP mínimo, sem TLS, que aceita qualquer login e só guarda as mensagens recebidas."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, endereco=('127.0.0.1', 1025), ao_receber=None):
+        super().__init__(endereco, _SessaoSMTP)
+        self.mensagens = []
+        self.ao_receber = ao_receber
+        self._trava = threading.Lock()
+
+    def registrar(self, remetente, destinatarios, conteudo):
+        with self._trava:
+            self.mensagens.append((remetente, destinatarios, conteudo))
+        if self.ao_receber:
+            self.ao_receber(remetente, destinatarios, conteudo)
+
+    def iniciar_em_segundo_plano(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,32 @@
+const MENSAGENS_INDISPONIVEL = {
+    email: 'Este email já está cadastrado',
+    cpf: 'Este CPF já está cadastrado',
+    cnpj: 'Este CNPJ já está cadastrado'
+};
+
+function verificarDisponibilidade(input) {
+    const campo = input.dataset.disponibilidade;
+    const valor = input.value.trim();
+
+    input.setCustomValidity('');
+    if (!valor || valor === input.dataset.ultimoVerificado) {
+        return;
+    }
+    input.dataset.ultimoVerificado = valor;
+
+    const url = `${window.DISPONIBILIDADE_URL}?campo=${campo}&valor=${encodeURIComponent(valor)}`;
+    fetch(url, { headers: { 'Accept': 'application/json' } })
+        .then(resposta => resposta.ok ? resposta.json() : null)
+        .then(dados => {
+            if (dados && dados.valido && dados.disponivel === false) {
+                input.setCustomValidity(MENSAGENS_INDISPONIVEL[campo]);
+                showToast(MENSAGENS_INDISPONIVEL[campo], 'error');
+            }
+        })
+        .catch(() => {});
+}
+
+document.querySelectorAll('[data-disponibilidade]').forEach(input => {
+    input.addEventListener('blur', () => verificarDisponibilidade(input));
+    input.addEventListener('input', () => input.setCustomValidity(''));
+});
@@ -1,3 +1,295 @@
-from django.test import TestCase
+import io
+import socket
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy
+from django.contrib.messages import get_messages
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import dns_cache
+from .documentos import gerar_cnpjs, gerar_cpfs
+from .dns_local import ServidorDNSLocal
+from .limites import FALHAS, SUCESSOS, LimiteTaxa, limitar_tentativas, nao_contar_tentativa
+from .models import ONG, EmailPendente
+from .outbox import ESPERA_BASE, MAX_TENTATIVAS, EntregadorEmails, enfileirar_email
+from .smtp_local import ServidorSMTPLocal
+
+
+def porta_fechada():
+    with socket.socket() as sondagem:
+        sondagem.bind(('127.0.0.1', 0))
+        return sondagem.getsockname()[1]
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.servidor = ServidorSMTPLocal(('127.0.0.1', 0))
+        self.servidor.iniciar_em_segundo_plano()
+        self.addCleanup(self.servidor.server_close)
+        self.addCleanup(self.servidor.shutdown)
+        configuracao = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1', EMAIL_PORT=self.servidor.server_address[1],
+            EMAIL_USE_TLS=False, EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='',
+            EMAIL_TIMEOUT=5, DEFAULT_FROM_EMAIL='patas@exemplo.com',
+        )
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def test_enfileirar_e_entregar(self):
+        enfileirar_email('ana@exemplo.com', 'Código', 'Seu código é 123456')
+        enfileirar_email('bia@exemplo.com', 'Código', 'Seu código é 654321')
+
+        call_command('processar_emails', '--uma-vez', stdout=io.StringIO())
+
+        self.assertEqual(
+            sorted(destinatarios for _, destinatarios, _ in self.servidor.mensagens),
+            [['<ana@exemplo.com>'], ['<bia@exemplo.com>']]
+        )
+        self.assertIn(b'123456', self.servidor.mensagens[0][2] + self.servidor.mensagens[1][2])
+        for email in EmailPendente.objects.all():
+            self.assertEqual(email.status, 'enviado')
+            self.assertEqual(email.mensagem, '')
+
+    def test_servidor_fora_do_ar(self):
+        primeiro = enfileirar_email('ana@exemplo.com', 'Código', '123456')
+        segundo = enfileirar_email('bia@exemplo.com', 'Código', '654321')
+
+        with override_settings(EMAIL_PORT=porta_fechada()):
+            entregador = EntregadorEmails()
+            inicio = timezone.now()
+            self.assertEqual(entregador.processar_lote(), (2, 0))
+
+        # Só a primeira conta tentativa, com espera exponencial e jitter de até 25%.
+        primeiro.refresh_from_db()
+        self.assertEqual((primeiro.status, primeiro.tentativas), ('pendente', 1))
+        espera = primeiro.proxima_tentativa - inicio
+        self.assertGreaterEqual(espera, timedelta(seconds=ESPERA_BASE))
+        self.assertLessEqual(espera, timedelta(seconds=ESPERA_BASE * 1.25 + 1))
+        segundo.refresh_from_db()
+        self.assertEqual(segundo.tentativas, 0)
+        self.assertGreater(segundo.proxima_tentativa, inicio)
+
+        # De volta no ar, as duas saem na mesma conexão assim que vencem.
+        EmailPendente.objects.update(proxima_tentativa=timezone.now())
+        entregador = EntregadorEmails()
+        self.addCleanup(entregador.fechar)
+        self.assertEqual(entregador.processar_lote(), (2, 2))
+        self.assertEqual(len(self.servidor.mensagens), 2)
+
+    def test_espera_dobra_e_desiste(self):
+        email = enfileirar_email('ana@exemplo.com', 'Código', '123456')
+        with override_settings(EMAIL_PORT=porta_fechada()):
+            for tentativa in range(1, MAX_TENTATIVAS + 1):
+                EmailPendente.objects.update(proxima_tentativa=timezone.now())
+                inicio = timezone.now()
+                EntregadorEmails().processar_lote()
+                email.refresh_from_db()
+                self.assertEqual(email.tentativas, tentativa)
+                if tentativa < MAX_TENTATIVAS:
+                    self.assertGreaterEqual(
+                        email.proxima_tentativa - inicio, timedelta(seconds=ESPERA_BASE * 2 ** (tentativa - 1))
+                    )
+
+        self.assertEqual(email.status, 'falhou')
+        EmailPendente.objects.update(proxima_tentativa=timezone.now())
+        self.assertEqual(EntregadorEmails().processar_lote(), (0, 0))
+
+
+class DnsCacheTests(TestCase):
+    def setUp(self):
+        self.servidor = ServidorDNSLocal(('127.0.0.1', 0), zonas={
+            'exemplo.com': {'MX': ['10 mx.exemplo.com.']},
+            'so-a.com': {'A': ['127.0.0.1']},
+        }, ttl=1)
+        self.servidor.iniciar_em_segundo_plano()
+        self.addCleanup(self.servidor.server_close)
+        self.addCleanup(self.servidor.shutdown)
+        configuracao = override_settings(
+            DNS_NAMESERVERS=['127.0.0.1'], DNS_PORT=self.servidor.server_address[1], DNS_TIMEOUT=2.0
+        )
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        for substituto in (mock.patch.object(dns_cache, '_resolvedor', None), mock.patch.object(dns_cache, 'TTL_MINIMO', 1)):
+            substituto.start()
+            self.addCleanup(substituto.stop)
+        cache.clear()
+
+    def test_resposta_fica_em_cache_ate_o_ttl(self):
+        self.assertTrue(dns_cache.dominio_aceita_email('exemplo.com'))
+        consultas = len(self.servidor.consultas)
+        self.assertTrue(dns_cache.dominio_aceita_email('Exemplo.com.'))
+        self.assertEqual(len(self.servidor.consultas), consultas)
+
+        # O domínio some, mas a resposta anterior vale até o TTL do registro.
+        del self.servidor.zonas['exemplo.com']
+        self.assertTrue(dns_cache.dominio_aceita_email('exemplo.com'))
+        time.sleep(1.1)
+        self.assertFalse(dns_cache.dominio_aceita_email('exemplo.com'))
+        self.assertGreater(len(self.servidor.consultas), consultas)
+
+    def test_nxdomain_em_cache_negativo(self):
+        self.assertFalse(dns_cache.dominio_aceita_email('nao-existe.com'))
+        consultas = len(self.servidor.consultas)
+        self.assertFalse(dns_cache.dominio_aceita_email('nao-existe.com'))
+        self.assertEqual(len(self.servidor.consultas), consultas)
+        self.assertEqual(
+            dns_cache.resolver('nao-existe.com'), {'MX': dns_cache.INEXISTENTE, 'A': dns_cache.INEXISTENTE}
+        )
+
+    def test_sem_mx_usa_o_registro_a(self):
+        self.assertTrue(dns_cache.dominio_aceita_email('so-a.com'))
+        self.assertEqual(dns_cache.resolver('so-a.com')['MX'], dns_cache.SEM_RESPOSTA)
+
+
+@override_settings(LIMITES_ATIVOS=True, LIMITES_CACHE='default')
+class LimitesTests(TestCase):
+    JANELA = 600
+
+    def setUp(self):
+        cache.clear()
+        relogio = mock.patch('cadlog.limites.time')
+        self.relogio = relogio.start()
+        self.addCleanup(relogio.stop)
+        self.agora(0)
+
+    def agora(self, segundos):
+        # Início de uma janela qualquer, para o índice não depender do relógio real.
+        self.relogio.time.return_value = 1000 * self.JANELA + segundos
+
+    def test_limite_da_janela(self):
+        limite = LimiteTaxa('teste', maximo=3, janela=self.JANELA)
+        consumos = [limite.consumir('ip_1') for _ in range(4)]
+        self.assertEqual([c.permitido for c in consumos], [True, True, True, False])
+        self.assertEqual([c.restantes for c in consumos], [2, 1, 0, 0])
+        self.assertTrue(limite.consumir('ip_2').permitido)
+
+        # Na metade da janela seguinte a anterior ainda pesa 50%: 3 * 0.5 + 1 cabe, + 2 não.
+        self.agora(self.JANELA * 1.5)
+        self.assertTrue(limite.consumir('ip_1').permitido)
+        self.assertFalse(limite.consumir('ip_1').permitido)
+
+    def test_paralelo_nao_passa_do_limite(self):
+        limite = LimiteTaxa('teste', maximo=5, janela=self.JANELA)
+        resultados = []
+        barreira = threading.Barrier(20)
+
+        def consumir():
+            barreira.wait()
+            resultados.append(limite.consumir('ip_1').permitido)
+
+        threads = [threading.Thread(target=consumir) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(resultados.count(True), 5)
+
+    def test_liberacao(self):
+        limite = LimiteTaxa('teste', maximo=3, janela=self.JANELA)
+        for _ in range(3):
+            limite.consumir('ip_1')
+        # Com 3 na janela atual, a próxima cabe quando o peso dela cair a 2/3:
+        # um terço de janela depois do fim dela.
+        self.assertEqual(limite.consumir('ip_1').liberacao_em, self.JANELA * 4 // 3)
+        self.agora(self.JANELA * 4 // 3)
+        self.assertTrue(limite.consumir('ip_1').permitido)
+
+    def requisicao(self, view):
+        request = RequestFactory().post('/', REMOTE_ADDR='10.0.0.1')
+        request._messages = CookieStorage(request)
+        return view(request), request
+
+    def visao(self, status, contar, maximo=2, nao_contar=False, liberar_no_sucesso=False):
+        self.chamadas = 0
+
+        @limitar_tentativas('teste', maximo=maximo, janela=self.JANELA, template='login.html',
+                            mensagem='Tente novamente em {minutos} minutos.', contar=contar,
+                            liberar_no_sucesso=liberar_no_sucesso)
+        def view(request):
+            self.chamadas += 1
+            if nao_contar:
+                nao_contar_tentativa(request)
+            return HttpResponse(status=status[0])
+        return view
+
+    def test_falhas_contam_e_sucessos_devolvem(self):
+        status = [302]
+        view = self.visao(status, FALHAS)
+        for _ in range(3):
+            self.requisicao(view)
+        self.assertEqual(self.chamadas, 3)
+
+        status[0] = 200
+        self.requisicao(view)
+        self.requisicao(view)
+        resposta, request = self.requisicao(view)
+        self.assertEqual(self.chamadas, 5)
+        # 2 na janela atual: a próxima cabe 1/2 janela depois do fim dela, 15 minutos.
+        self.assertEqual([str(m) for m in get_messages(request)], ['Tente novamente em 15 minutos.'])
+
+    def test_sucessos_contam_e_falhas_devolvem(self):
+        status = [200]
+        view = self.visao(status, SUCESSOS)
+        for _ in range(3):
+            self.requisicao(view)
+        status[0] = 302
+        for _ in range(3):
+            self.requisicao(view)
+        self.assertEqual(self.chamadas, 5)
+
+    def test_nao_contar_tentativa(self):
+        view = self.visao([200], 'sempre', nao_contar=True)
+        for _ in range(5):
+            self.requisicao(view)
+        self.assertEqual(self.chamadas, 5)
+
+    def test_sucesso_libera(self):
+        status = [200]
+        view = self.visao(status, FALHAS, liberar_no_sucesso=True)
+        self.requisicao(view)
+        status[0] = 302
+        self.requisicao(view)
+        status[0] = 200
+        for _ in range(3):
+            self.requisicao(view)
+        self.assertEqual(self.chamadas, 4)
+
+
+@mock.patch('cadlog.views.validar_email_formato', return_value=True)
+class CadastroOngTests(TestCase):
+    SENHA = 'Senha#Forte123'
+
+    def setUp(self):
+        aleatorio = numpy.random.default_rng(0)
+        self.dados = {
+            'nome_ong': 'Patinhas', 'cnpj': gerar_cnpjs(aleatorio, 1)[0], 'endereco': 'Rua B',
+            'email_institucional': 'ong@exemplo.com', 'nome_responsavel': 'Bia Lima',
+            'cpf_responsavel': gerar_cpfs(aleatorio, 1)[0], 'telefone': '(61) 98888-0000',
+            'senha': self.SENHA, 'confirma_senha': self.SENHA,
+        }
+
+    def test_grava_a_localizacao(self, _):
+        resposta = self.client.post(reverse('cadastro_ong'), {**self.dados, 'latitude': '-15.8', 'longitude': '-47.9'})
+        self.assertEqual(resposta.status_code, 302)
+        ong = ONG.objects.get()
+        self.assertEqual((ong.latitude, ong.longitude), (-15.8, -47.9))
+        self.assertTrue(ong.geohash)
+
+    def test_localizacao_opcional(self, _):
+        self.assertEqual(self.client.post(reverse('cadastro_ong'), self.dados).status_code, 302)
+        self.assertIsNone(ONG.objects.get().latitude)
+
+    def test_localizacao_invalida(self, _):
+        resposta = self.client.post(reverse('cadastro_ong'), {**self.dados, 'latitude': '91', 'longitude': '0'})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertFalse(ONG.objects.exists())
@@ -9,4 +9,5 @@ urlpatterns = [
     path('cadastro/', views.cadastro_escolha, name='cadastro_escolha'),
     path('cadastro/ong/', views.cadastro_ong, name='cadastro_ong'),
     path('cadastro/usuario/', views.cadastro_usuario, name='cadastro_usuario'),
+    path('api/disponibilidade/', views.disponibilidade_api, name='disponibilidade_api'),
 ]
\ No newline at end of file
@@ -2,21 +2,25 @@ from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_protect
 from django.views.decorators.cache import never_cache
 from django.utils.crypto import constant_time_compare
-from django.contrib.auth import authenticate, login
+from django.contrib.auth import alogin
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
-from .models import CustomUser, ONG, UsuarioComum
+from .models import CustomUser, ONG, UsuarioComum, normalizar_email
+from ong.geo import CoordenadaInvalida, validar_coordenadas
+from .outbox import enfileirar_email
+from .dns_cache import dominio_aceita_email
+from .senhas import autenticar, FilaSaturada
+from .disponibilidade import CAMPOS_DISPONIBILIDADE, indice_disponibilidade
+from .limites import LimiteTaxa, limitar_tentativas, nao_contar_tentativa, por_ip, por_email, por_ip_e_email, FALHAS, SUCESSOS
 from dateutil.relativedelta import relativedelta
-from datetime import timedelta, date, datetime
+from datetime import date, datetime
 from django.shortcuts import render, redirect
-from django.core.mail import send_mail
+from django.http import JsonResponse
 from django.contrib import messages
 from django.core.cache import cache
 from django.db import transaction
-from django.utils import timezone
-from django.conf import settings
 from functools import wraps
-import dns.resolver
+from asgiref.sync import sync_to_async
 import logging
 import secrets
 import string
@@ -113,17 +117,7 @@ def validar_email_formato(email):
 
         dominio = email.split('@')[1]
 
-        try:
-            dns.resolver.resolve(dominio, 'MX')
-        except dns.resolver.NXDOMAIN:
-            return False
-        except dns.resolver.NoAnswer:
-            try:
-                dns.resolver.resolve(dominio, 'A')
-            except Exception:
-                return False
-        
-        return True
+        return dominio_aceita_email(dominio)
     
     except ValidationError:
         return False
@@ -180,31 +174,6 @@ def validar_telefone(telefone):
     
     return True
 
-def verificar_rate_limit(identificador, max_tentativas=5, janela_tempo=15):
-    cache_key = f'rate_limit_{identificador}'
-    tentativas = cache.get(cache_key, [])
-    agora = timezone.now()
-    
-    tentativas = [t for t in tentativas if agora - t < timedelta(minutes=janela_tempo)]
-    
-    if len(tentativas) >= max_tentativas:
-        tempo_liberacao = tentativas[0] + timedelta(minutes=janela_tempo)
-        tentativas_restantes = 0
-        return False, tempo_liberacao, tentativas_restantes
-    
-    tentativas_restantes = max_tentativas - len(tentativas) - 1
-    return True, None, tentativas_restantes
-
-def registrar_tentativa(identificador):
-    cache_key = f'rate_limit_{identificador}'
-    tentativas = cache.get(cache_key, [])
-    tentativas.append(timezone.now())
-    cache.set(cache_key, tentativas, 60 * 30) 
-
-def limpar_tentativas(identificador):
-    cache_key = f'rate_limit_{identificador}'
-    cache.delete(cache_key)
-
 def gerar_codigo_recuperacao():
     return ''.join(secrets.choice(string.digits) for _ in range(6))
 
@@ -229,71 +198,55 @@ Equipe Patas na Rua
     """
 
     try:
-        resultado = send_mail(
-            assunto,
-            mensagem,
-            settings.EMAIL_HOST_USER,
-            [email],
-            fail_silently=False,
-        )
-        if resultado == 1:
-            logger.info(f'Email de recuperação enviado com sucesso para {email}')
-            return True
-        else:
-            logger.error(f'Falha ao enviar email para {email}')
-            return False
+        enfileirar_email(email, assunto, mensagem)
+        logger.info(f'Email de recuperação enfileirado para {email}')
+        return True
     except Exception as e:
-        logger.error(f"Erro ao enviar email para {email}: {str(e)}")
+        logger.error(f"Erro ao enfileirar email para {email}: {str(e)}")
         return False
 
 @never_cache
 @require_http_methods(["GET", "POST"])
 @csrf_protect
-def login_view(request):
+@limitar_tentativas('login', maximo=5, janela=60 * 15, template='login.html',
+                    mensagem='Muitas tentativas. Tente novamente em {minutos} minutos.',
+                    chaves=(por_ip, por_email), contar=FALHAS, liberar_no_sucesso=True)
+async def login_view(request):
+    # Assíncrona: o hash da senha roda na FilaHash (cadlog.senhas), e o que
+    # toca o banco ou a sessão de forma síncrona passa por sync_to_async.
+    renderizar = sync_to_async(render)
+
     if request.method == 'POST':
         email = request.POST.get('email', '').strip().lower()
         senha = request.POST.get('senha')
         lembrar = request.POST.get('lembrar')
 
         if not email or not senha:
+            nao_contar_tentativa(request)
             messages.error(request, 'Email e senha são obrigatórios')
-            return render(request, 'login.html')
+            return await renderizar(request, 'login.html')
 
-        if not validar_email_formato(email):
+        if not await sync_to_async(validar_email_formato)(email):
+            nao_contar_tentativa(request)
             messages.error(request, 'Formato de email inválido')
-            return render(request, 'login.html')
+            return await renderizar(request, 'login.html')
 
         ip_address = request.META.get('REMOTE_ADDR', 'unknown')
-        identificador_ip = f"login_ip_{ip_address}"
-        identificador_email = f"login_email_{email}"
-
-        pode_tentar_ip, tempo_liberacao_ip, _ = verificar_rate_limit(identificador_ip)
-        pode_tentar_email, tempo_liberacao_email, _ = verificar_rate_limit(identificador_email)
 
-        if not pode_tentar_ip:
-            tempo_restante = max(1, int((tempo_liberacao_ip - timezone.now()).total_seconds() / 60))
-            messages.error(request, f'Muitas tentativas. Tente novamente em {tempo_restante} minutos.')
-            logger.warning(f'Rate limit atingido por IP: {ip_address}')
-            return render(request, 'login.html')
-        
-        if not pode_tentar_email:
-            tempo_restante = max(1, int((tempo_liberacao_email - timezone.now()).total_seconds() / 60))
-            messages.error(request, f'Muitas tentativas para este email. Tente novamente em {tempo_restante} minutos.')
-            logger.warning(f'Rate limit atingido para email: {email}')
-            return render(request, 'login.html')
-
-        user = authenticate(request, username=email, password=senha)
+        try:
+            user = await autenticar(email, senha)
+        except FilaSaturada:
+            logger.warning(f'Login recusado por sobrecarga para {email} do IP {ip_address}')
+            messages.error(request, 'Estamos com muitos acessos no momento. Tente novamente em instantes.')
+            return await renderizar(request, 'login.html', status=429)
 
         if user is not None:
-            limpar_tentativas(identificador_ip)
-            limpar_tentativas(identificador_email)
-
-            login(request, user)
+            await alogin(request, user)
 
             if not lembrar:
-                request.session.set_expiry(0)  
+                await request.session.aset_expiry(0)
             else:
-                request.session.set_expiry(2592000) 
+                await request.session.aset_expiry(2592000)
 
             if hasattr(user, 'ong'):
                 logger.info(f'Login bem-sucedido: ONG {user.ong.nome_ong} ({email})')
@@ -308,29 +261,20 @@ def login_view(request):
                 messages.warning(request, 'Perfil incompleto.')
                 return redirect('login')
         else:
-            registrar_tentativa(identificador_ip)
-            registrar_tentativa(identificador_email)
             logger.warning(f'Tentativa de login falha para {email} do IP {ip_address}')
             messages.error(request, 'Email ou senha incorretos')
     
-    return render(request, 'login.html')
+    return await renderizar(request, 'login.html')
 
 @transaction.atomic
 @require_http_methods(["GET", "POST"])
 @csrf_protect
+@limitar_tentativas('cadastro', maximo=3, janela=60 * 30, template='cadastro_usuario.html',
+                    mensagem='Muitas tentativas de cadastro. Tente novamente em {minutos} minutos.',
+                    contar=SUCESSOS)
 def cadastro_usuario(request):
     if request.method == 'POST':
         ip_address = request.META.get('REMOTE_ADDR', 'unknown')
-        identificador = f"cadastro_{ip_address}"
-        
-        pode_tentar, tempo_liberacao, _ = verificar_rate_limit(
-            identificador, max_tentativas=3, janela_tempo=30
-        )
-        
-        if not pode_tentar:
-            tempo_restante = max(1, int((tempo_liberacao - timezone.now()).total_seconds() / 60))
-            messages.error(request, f'Muitas tentativas de cadastro. Tente novamente em {tempo_restante} minutos.')
-            return render(request, 'cadastro_usuario.html')
 
         nome = request.POST.get('nome', '').strip()
         cpf = request.POST.get('cpf', '').strip()
@@ -383,7 +327,7 @@ def cadastro_usuario(request):
             messages.error(request, mensagem)
             return render(request, 'cadastro_usuario.html')
         
-        if CustomUser.objects.filter(email__iexact=email).exists():
+        if CustomUser.objects.filter(email=normalizar_email(email)).exists():
             messages.error(request, 'Este email já está cadastrado')
             return render(request, 'cadastro_usuario.html')
         
@@ -413,7 +357,6 @@ def cadastro_usuario(request):
                 endereco=endereco
             )
 
-            registrar_tentativa(identificador)
             logger.info(f'Novo usuário cadastrado: {email} do IP {ip_address}')
             messages.success(request, 'Cadastro realizado com sucesso! Faça login.')
             return redirect('login')
@@ -428,19 +371,12 @@ def cadastro_usuario(request):
 @transaction.atomic
 @require_http_methods(["GET", "POST"])
 @csrf_protect
+@limitar_tentativas('cadastro_ong', maximo=3, janela=60 * 30, template='cadastro_ong.html',
+                    mensagem='Muitas tentativas de cadastro. Tente novamente em {minutos} minutos.',
+                    contar=SUCESSOS)
 def cadastro_ong(request):
     if request.method == 'POST':
         ip_address = request.META.get('REMOTE_ADDR', 'unknown')
-        identificador = f"cadastro_ong_{ip_address}"
-        
-        pode_tentar, tempo_liberacao, _ = verificar_rate_limit(
-            identificador, max_tentativas=3, janela_tempo=30
-        )
-        
-        if not pode_tentar:
-            tempo_restante = max(1, int((tempo_liberacao - timezone.now()).total_seconds() / 60))
-            messages.error(request, f'Muitas tentativas de cadastro. Tente novamente em {tempo_restante} minutos.')
-            return render(request, 'cadastro_ong.html')
 
         nome_ong = request.POST.get('nome_ong', '').strip()
         cnpj = request.POST.get('cnpj', '').strip()
@@ -480,8 +416,17 @@ def cadastro_ong(request):
         if not valido:
             messages.error(request, mensagem)
             return render(request, 'cadastro_ong.html')
+
+        # Opcional: sem ela a ONG não aparece entre as próximas em /api/proximos/.
+        latitude = longitude = None
+        if request.POST.get('latitude') or request.POST.get('longitude'):
+            try:
+                latitude, longitude = validar_coordenadas(request.POST.get('latitude'), request.POST.get('longitude'))
+            except CoordenadaInvalida:
+                messages.error(request, 'Localização da ONG inválida')
+                return render(request, 'cadastro_ong.html')
         
-        if CustomUser.objects.filter(email__iexact=email_institucional).exists():
+        if CustomUser.objects.filter(email=normalizar_email(email_institucional)).exists():
             messages.error(request, 'Este email já está cadastrado')
             return render(request, 'cadastro_ong.html')
         
@@ -490,7 +435,7 @@ def cadastro_ong(request):
             messages.error(request, 'Este CNPJ já está cadastrado')
             return render(request, 'cadastro_ong.html')
         
-        if ONG.objects.filter(email_institucional__iexact=email_institucional).exists():
+        if ONG.objects.filter(email_institucional=normalizar_email(email_institucional)).exists():
             messages.error(request, 'Este email institucional já está cadastrado')
             return render(request, 'cadastro_ong.html')
         
@@ -517,10 +462,11 @@ def cadastro_ong(request):
                 endereco=endereco,
                 email_institucional=email_institucional,
                 nome_responsavel=nome_responsavel,
-                cpf_responsavel=cpf_limpo
+                cpf_responsavel=cpf_limpo,
+                latitude=latitude,
+                longitude=longitude
             )
             
-            registrar_tentativa(identificador)
             logger.info(f'Nova ONG cadastrada: {nome_ong} ({email_institucional}) do IP {ip_address}')
             messages.success(request, 'ONG cadastrada com sucesso! Faça login.')
             return redirect('login')
@@ -536,37 +482,60 @@ def cadastro_ong(request):
 def cadastro_escolha(request):
     return render(request, 'cadastro_escolha.html')
 
+limite_disponibilidade = LimiteTaxa('disponibilidade', maximo=30, janela=60 * 10)
+
+@require_http_methods(["GET"])
+def disponibilidade_api(request):
+    campo = request.GET.get('campo', '')
+    valor = request.GET.get('valor', '').strip()
+
+    if campo not in CAMPOS_DISPONIBILIDADE or not valor:
+        return JsonResponse({'erro': 'Informe campo (email, cpf ou cnpj) e valor.'}, status=400)
+
+    # Sem limite a API viraria um jeito barato de descobrir quem está cadastrado.
+    if not limite_disponibilidade.consumir(por_ip(request)).permitido:
+        return JsonResponse({'erro': 'Muitas consultas. Tente novamente mais tarde.'}, status=429)
+
+    if campo == 'email':
+        try:
+            validate_email(valor)
+            valido = True
+        except ValidationError:
+            valido = False
+    elif campo == 'cpf':
+        valido = validar_cpf(valor)
+    else:
+        valido = validar_cnpj(valor)
+
+    if not valido:
+        return JsonResponse({'campo': campo, 'valido': False, 'disponivel': None})
+
+    disponivel = indice_disponibilidade.disponivel(campo, valor)
+    return JsonResponse({'campo': campo, 'valido': True, 'disponivel': disponivel})
+
 @never_cache
 @require_http_methods(["GET", "POST"])
 @csrf_protect
+@limitar_tentativas('recuperacao', maximo=3, janela=60 * 30, template='esqueci_senha.html',
+                    mensagem='Muitas tentativas de recuperação. Tente novamente em {minutos} minutos.')
 def esqueci_senha(request):
     if request.method == 'POST':
         email = request.POST.get('email', '').strip().lower()
 
         if not email:
+            nao_contar_tentativa(request)
             messages.error(request, 'Digite seu email')
             return render(request, 'esqueci_senha.html')
 
         if not validar_email_formato(email):
+            nao_contar_tentativa(request)
             messages.info(request, 'Se o email estiver cadastrado, você receberá instruções de recuperação.')
             return render(request, 'esqueci_senha.html')
         
         ip_address = request.META.get('REMOTE_ADDR', 'unknown')
-        identificador = f"recuperacao_{ip_address}"
-        
-        pode_tentar, tempo_liberacao, _ = verificar_rate_limit(
-            identificador, max_tentativas=3, janela_tempo=30
-        )
-        
-        if not pode_tentar:
-            tempo_restante = max(1, int((tempo_liberacao - timezone.now()).total_seconds() / 60))
-            messages.error(request, f'Muitas tentativas de recuperação. Tente novamente em {tempo_restante} minutos.')
-            return render(request, 'esqueci_senha.html')
-        
-        registrar_tentativa(identificador)
 
         try:
-            user = CustomUser.objects.get(email__iexact=email)
+            user = CustomUser.objects.get(email=normalizar_email(email))
 
             codigo = gerar_codigo_recuperacao()
             token = gerar_token_recuperacao()
@@ -594,29 +563,20 @@ def esqueci_senha(request):
 @require_http_methods(["GET", "POST"])
 @csrf_protect
 @requer_fluxo_recuperacao
+@limitar_tentativas('verificacao', maximo=5, janela=60 * 15, template='verificar_codigo.html',
+                    mensagem='Muitas tentativas. Tente novamente em {minutos} minutos.',
+                    chaves=(por_ip_e_email,), liberar_no_sucesso=True)
 def verificar_codigo(request, email, token):
     """View de verificação do código de recuperação"""
     if request.method == 'POST':
         codigo_digitado = request.POST.get('codigo', '').strip()
 
         if not codigo_digitado:
+            nao_contar_tentativa(request)
             messages.error(request, 'Digite o código recebido por email.')
             return render(request, 'verificar_codigo.html', {'email': email, 'token': token})
-    
-        ip_address = request.META.get('REMOTE_ADDR', 'unknown')
-        identificador = f"verificacao_{ip_address}_{email}"
-        
-        pode_tentar, tempo_liberacao, tentativas_restantes = verificar_rate_limit(
-            identificador, max_tentativas=5, janela_tempo=15
-        )
-        
-        if not pode_tentar:
-            tempo_restante = max(1, int((tempo_liberacao - timezone.now()).total_seconds() / 60))
-            messages.error(request, f'Muitas tentativas. Tente novamente em {tempo_restante} minutos.')
-            logger.warning(f'Rate limit atingido na verificação de código para {email} do IP {ip_address}')
-            return render(request, 'verificar_codigo.html', {'email': email, 'token': token})
-        
-        registrar_tentativa(identificador)
+
+        tentativas_restantes = request.tentativas_restantes
 
         cache_key = f'codigo_recuperacao_{email}'
         codigo_armazenado = cache.get(cache_key)
@@ -627,7 +587,6 @@ def verificar_codigo(request, email, token):
             return redirect('esqueci_senha')
         
         if constant_time_compare(codigo_digitado, codigo_armazenado):
-            limpar_tentativas(identificador)
             cache.set(f'email_verificado_{email}_{token}', True, 60 * 30) 
             
             logger.info(f'Código verificado com sucesso para {email}')
@@ -667,7 +626,7 @@ def redefinir_senha(request, email, token):
             return render(request, 'redefinir_senha.html', {'email': email, 'token': token})
         
         try:
-            user = CustomUser.objects.get(email__iexact=email)
+            user = CustomUser.objects.get(email=normalizar_email(email))
             
             user.set_password(nova_senha)
             user.save()
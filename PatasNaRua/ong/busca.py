@@ -0,0 +1,159 @@
+from collections import Counter
+import unicodedata
+import re
+
+from django.db import connection
+
+from .models import Pet, TermoBusca
+
+# Peso de cada campo no ranking: um termo no nome vale mais que na descrição.
+CAMPOS_BUSCA = {
+    'nome': 3,
+    'raca': 2,
+    'info': 1,
+    'historico_saude': 1,
+}
+
+PALAVRAS_VAZIAS = {
+    'a', 'as', 'o', 'os', 'e', 'de', 'da', 'das', 'do', 'dos', 'em', 'na', 'nas',
+    'no', 'nos', 'um', 'uma', 'uns', 'umas', 'com', 'para', 'por', 'que', 'se', 'ao',
+}
+
+TAMANHO_MAXIMO_TERMO = 64
+BUSCA_LIMITE_PADRAO = 20
+BUSCA_LIMITE_MAXIMO = 50
+LOTE_INDEXACAO = 2000
+# Postagens lidas por termo, as de maior peso primeiro, e termos por consulta.
+# Um termo comum ("srd", "cachorr") cobre quase a tabela; sem o corte cada
+# busca agregaria todas as postagens dele.
+POSTAGENS_POR_TERMO = 200
+MAXIMO_TERMOS_BUSCA = 8
+
+_PALAVRA = re.compile(r'[a-z0-9]+')
+
+
+def remover_acentos(texto):
+    decomposto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def radical(palavra):
+    # Stemming leve: tira o plural e a vogal temática, para que
+    # "cachorro", "cachorra" e "cachorros" caiam no mesmo termo.
+    if len(palavra) > 3 and palavra.endswith('s'):
+        palavra = palavra[:-1]
+    if len(palavra) > 3 and palavra[-1] in 'aeo':
+        palavra = palavra[:-1]
+    return palavra
+
+
+def extrair_termos(texto):
+    if not texto:
+        return []
+
+    palavras = _PALAVRA.findall(remover_acentos(str(texto)).lower())
+    return [
+        radical(palavra)[:TAMANHO_MAXIMO_TERMO]
+        for palavra in palavras
+        if palavra not in PALAVRAS_VAZIAS
+    ]
+
+
+def termos_do_pet(pet):
+    pesos = Counter()
+    for campo, peso in CAMPOS_BUSCA.items():
+        for termo in extrair_termos(getattr(pet, campo)):
+            pesos[termo] += peso
+    return pesos
+
+
+def _entradas(pet):
+    return [
+        TermoBusca(termo=termo, pet_id=pet.id, peso=peso)
+        for termo, peso in termos_do_pet(pet).items()
+    ]
+
+
+def indexar_pet(pet):
+    TermoBusca.objects.filter(pet_id=pet.id).delete()
+    TermoBusca.objects.bulk_create(_entradas(pet))
+
+
+def indexar_pets(pets):
+    pets = list(pets)
+    TermoBusca.objects.filter(pet_id__in=[pet.id for pet in pets]).delete()
+    entradas = [entrada for pet in pets for entrada in _entradas(pet)]
+    TermoBusca.objects.bulk_create(entradas, batch_size=LOTE_INDEXACAO)
+    return len(entradas)
+
+
+def reconstruir_indice(lote=LOTE_INDEXACAO):
+    TermoBusca.objects.all().delete()
+
+    total_pets = 0
+    total_termos = 0
+    entradas = []
+    pets = Pet.objects.only('id', *CAMPOS_BUSCA).order_by('id').iterator(chunk_size=lote)
+    for pet in pets:
+        entradas.extend(_entradas(pet))
+        total_pets += 1
+        if len(entradas) >= lote:
+            TermoBusca.objects.bulk_create(entradas, batch_size=lote)
+            total_termos += len(entradas)
+            entradas = []
+
+    if entradas:
+        TermoBusca.objects.bulk_create(entradas, batch_size=lote)
+        total_termos += len(entradas)
+
+    return total_pets, total_termos
+
+
+async def _postagens_limitadas(postagens, termos):
+    por_termo = [
+        postagens.filter(termo=termo).order_by('-peso', '-pet_id')[:POSTAGENS_POR_TERMO + 1]
+        for termo in termos
+    ]
+    if len(por_termo) > 1 and connection.features.supports_slicing_ordering_in_compound:
+        return [linha async for linha in por_termo[0].union(*por_termo[1:], all=True)]
+    # SQLite não aceita LIMIT dentro de um UNION: uma consulta por termo.
+    return [linha for consulta in por_termo async for linha in consulta]
+
+
+async def abuscar_pets(consulta, limite=BUSCA_LIMITE_PADRAO, filtros=None):
+    termos = sorted(set(extrair_termos(consulta)), key=lambda termo: (-len(termo), termo))[:MAXIMO_TERMOS_BUSCA]
+    if not termos:
+        return []
+
+    postagens = TermoBusca.objects.values_list('termo', 'pet_id', 'peso')
+    if filtros:
+        postagens = postagens.filter(**{f'pet__{campo}': valor for campo, valor in filtros.items()})
+
+    encontradas = await _postagens_limitadas(postagens, termos)
+    por_termo = Counter(termo for termo, _, _ in encontradas)
+    cortados = [termo for termo in termos if por_termo[termo] > POSTAGENS_POR_TERMO]
+    if cortados:
+        # Candidatos: todas as postagens dos termos raros e as mais pesadas
+        # dos comuns. Quem tem todos os termos está entre as do mais raro;
+        # para os candidatos os termos comuns são relidos inteiros, então a
+        # contagem deles é exata.
+        candidatos = {pet_id for _, pet_id, _ in encontradas}
+        encontradas = [linha for linha in encontradas if linha[0] not in cortados]
+        encontradas += [
+            linha async for linha in
+            postagens.filter(termo__in=cortados, pet_id__in=candidatos).order_by()
+        ]
+
+    termos_encontrados = Counter()
+    relevancia = Counter()
+    for _, pet_id, peso in encontradas:
+        termos_encontrados[pet_id] += 1
+        relevancia[pet_id] += peso
+    ids = sorted(
+        termos_encontrados,
+        key=lambda pet_id: (termos_encontrados[pet_id], relevancia[pet_id], pet_id),
+        reverse=True,
+    )[:limite]
+
+    pets = await Pet.objects.ain_bulk(ids)
+    return [pets[pet_id] for pet_id in ids if pet_id in pets]
@@ -0,0 +1,9 @@
+def converter_peso(valor):
+    if not valor:
+        return None
+    return float(valor.strip().replace(',', '.'))
+
+def converter_idade(valor):
+    if not valor:
+        return None
+    return int(valor.strip())
@@ -0,0 +1,86 @@
+import base64
+import binascii
+
+from .fotos import srcset_foto, url_variante
+from .models import Pet
+
+CATALOGO_FILTROS = ('especie', 'porte', 'sexo', 'castrado', 'status')
+CATALOGO_CAMPOS = ('id', 'nome', 'especie', 'porte', 'raca', 'idade', 'sexo', 'castrado', 'status', 'foto')
+CATALOGO_LIMITE_PADRAO = 12
+CATALOGO_LIMITE_MAXIMO = 50
+CATALOGO_LARGURA_FOTO = 320
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def codificar_cursor(pet_id):
+    return base64.urlsafe_b64encode(str(pet_id).encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    try:
+        preenchimento = '=' * (-len(cursor) % 4)
+        pet_id = int(base64.urlsafe_b64decode(cursor + preenchimento).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise CursorInvalido(cursor)
+
+    if pet_id < 1:
+        raise CursorInvalido(cursor)
+    return pet_id
+
+
+def filtros_catalogo(parametros):
+    return {
+        campo: parametros.get(campo).strip()
+        for campo in CATALOGO_FILTROS
+        if parametros.get(campo, '').strip()
+    }
+
+
+def filtrar_catalogo(parametros, queryset=None):
+    if queryset is None:
+        queryset = Pet.objects.all()
+    return queryset.filter(**filtros_catalogo(parametros))
+
+
+def limite_catalogo(valor):
+    try:
+        limite = int(valor)
+    except (TypeError, ValueError):
+        return CATALOGO_LIMITE_PADRAO
+    return max(1, min(limite, CATALOGO_LIMITE_MAXIMO))
+
+
+async def apagina_catalogo(queryset, cursor=None, limite=CATALOGO_LIMITE_PADRAO):
+    # Paginação por keyset: a próxima página começa depois do último id visto,
+    # então a página 500 custa o mesmo que a primeira (sem OFFSET).
+    queryset = queryset.only(*CATALOGO_CAMPOS).order_by('-id')
+
+    if cursor:
+        queryset = queryset.filter(id__lt=decodificar_cursor(cursor))
+
+    pets = [pet async for pet in queryset[:limite + 1]]
+    proximo = None
+    if len(pets) > limite:
+        pets = pets[:limite]
+        proximo = codificar_cursor(pets[-1].id)
+
+    return pets, proximo
+
+
+def serializar_card(pet):
+    return {
+        "id": pet.id,
+        "nome": pet.nome,
+        "especie": pet.especie,
+        "porte": pet.porte,
+        "raca": pet.raca,
+        "idade": pet.idade,
+        "sexo": pet.sexo,
+        "castrado": pet.castrado,
+        "status": pet.status,
+        "foto": url_variante(pet.foto, CATALOGO_LARGURA_FOTO) if pet.foto else None,
+        "foto_srcset": srcset_foto(pet.foto),
+    }
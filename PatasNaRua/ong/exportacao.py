@@ -0,0 +1,100 @@
+import csv
+import json
+
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+
+from .storage import armazenamento_fotos
+
+FORMATOS_EXPORTACAO = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+CAMPOS_EXPORTACAO = (
+    'id', 'nome', 'especie', 'porte', 'raca', 'peso', 'idade', 'sexo', 'castrado',
+    'status', 'info', 'historico_saude', 'foto', 'atualizado_em',
+)
+LOTE_EXPORTACAO = 2000
+
+
+class _Eco:
+    def write(self, valor):
+        return valor
+
+
+def _ordenar(queryset):
+    return queryset.order_by('atualizado_em', 'id').values_list(*CAMPOS_EXPORTACAO)
+
+
+def _pagina(queryset, ultimo, lote):
+    if ultimo is not None:
+        atualizado_em, pet_id = ultimo
+        queryset = queryset.filter(
+            Q(atualizado_em__gt=atualizado_em) | Q(atualizado_em=atualizado_em, id__gt=pet_id)
+        )
+    return queryset[:lote]
+
+
+def _ultimo(linhas):
+    return linhas[-1][CAMPOS_EXPORTACAO.index('atualizado_em')], linhas[-1][0]
+
+
+def _dados(linha):
+    dados = dict(zip(CAMPOS_EXPORTACAO, linha))
+    dados['foto'] = armazenamento_fotos.url(dados['foto']) if dados['foto'] else None
+    dados['atualizado_em'] = dados['atualizado_em'].isoformat()
+    return dados
+
+
+def linhas_exportacao(queryset, lote=LOTE_EXPORTACAO):
+    # Keyset por (atualizado_em, id) em vez de um único iterator(): no MySQL o
+    # driver carrega o resultado inteiro na memória mesmo com chunk_size, e
+    # assim cada consulta traz no máximo um lote.
+    queryset = _ordenar(queryset)
+    ultimo = None
+    while True:
+        linhas = list(_pagina(queryset, ultimo, lote))
+        for linha in linhas:
+            yield _dados(linha)
+        if len(linhas) < lote:
+            return
+        ultimo = _ultimo(linhas)
+
+
+async def alinhas_exportacao(queryset, lote=LOTE_EXPORTACAO):
+    # Mesmo keyset, com cada lote buscado por sync_to_async. No ASGI o
+    # StreamingHttpResponse leria um gerador síncrono inteiro para a memória
+    # antes de mandar o primeiro byte.
+    queryset = _ordenar(queryset)
+    ultimo = None
+    while True:
+        linhas = await sync_to_async(list)(_pagina(queryset, ultimo, lote))
+        for linha in linhas:
+            yield _dados(linha)
+        if len(linhas) < lote:
+            return
+        ultimo = _ultimo(linhas)
+
+
+def _formatador(formato):
+    """(cabeçalho ou None, função que formata uma linha)."""
+    if formato == 'csv':
+        escritor = csv.DictWriter(_Eco(), fieldnames=CAMPOS_EXPORTACAO)
+        return escritor.writeheader(), escritor.writerow
+    return None, lambda dados: json.dumps(dados, ensure_ascii=False) + '\n'
+
+
+def gerar_exportacao(queryset, formato):
+    cabecalho, formatar = _formatador(formato)
+    if cabecalho:
+        yield cabecalho
+    for dados in linhas_exportacao(queryset):
+        yield formatar(dados)
+
+
+async def agerar_exportacao(queryset, formato):
+    cabecalho, formatar = _formatador(formato)
+    if cabecalho:
+        yield cabecalho
+    async for dados in alinhas_exportacao(queryset):
+        yield formatar(dados)
@@ -0,0 +1,196 @@
+import functools
+import hashlib
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils._os import safe_join
+from PIL import ExifTags, Image, ImageOps, UnidentifiedImageError
+
+FORMATOS_VARIANTE = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+    'png': ('PNG', 'image/png'),
+}
+QUALIDADE_VARIANTE = 80
+FORMATO_PADRAO = 'webp'
+# Orientações EXIF em que a foto é girada 90°, trocando largura e altura.
+ORIENTACOES_GIRADAS = (5, 6, 7, 8)
+
+
+class VarianteInvalida(ValueError):
+    pass
+
+
+def larguras_variante():
+    return settings.FOTOS_VARIANTES_LARGURAS
+
+
+def caminho_original(nome):
+    # O prefixo só vale no caminho normalizado: 'fotosPet/../x' sai da pasta.
+    partes = nome.split('/')
+    if partes[0] != 'fotosPet' or any(parte in ('', '.', '..') or parte.startswith('.') for parte in partes):
+        raise VarianteInvalida(nome)
+    try:
+        caminho = os.path.realpath(safe_join(settings.MEDIA_ROOT, nome))
+    except Exception:
+        raise VarianteInvalida(nome)
+    if os.path.relpath(caminho, os.path.realpath(settings.MEDIA_ROOT)).replace(os.sep, '/') != nome:
+        raise VarianteInvalida(nome)
+    if not os.path.isfile(caminho):
+        raise FileNotFoundError(nome)
+    return caminho
+
+
+def caminho_variante(nome, largura, formato):
+    chave = hashlib.sha256(f'{nome}:{largura}'.encode()).hexdigest()
+    return os.path.join(settings.FOTOS_VARIANTES_ROOT, chave[:2], f'{chave}.{formato}')
+
+
+def gerar_variante(original, destino, largura, formato):
+    formato_pil, _ = FORMATOS_VARIANTE[formato]
+    try:
+        aberta = Image.open(original)
+    except (UnidentifiedImageError, Image.DecompressionBombError):
+        raise VarianteInvalida(original)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+
+    with aberta as imagem:
+        imagem = ImageOps.exif_transpose(imagem)
+        if imagem.width > largura:
+            altura = max(1, round(imagem.height * largura / imagem.width))
+            imagem = imagem.resize((largura, altura), Image.LANCZOS)
+        if formato_pil == 'JPEG' and imagem.mode not in ('RGB', 'L'):
+            imagem = imagem.convert('RGB')
+
+        # Grava num temporário e renomeia, para que uma requisição concorrente
+        # nunca sirva uma variante pela metade.
+        descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(destino))
+        try:
+            with os.fdopen(descritor, 'wb') as arquivo:
+                imagem.save(arquivo, formato_pil, quality=QUALIDADE_VARIANTE, optimize=True)
+            os.replace(temporario, destino)
+        except BaseException:
+            os.unlink(temporario)
+            raise
+
+
+# Total estimado do cache de variantes neste processo. A varredura completa
+# só roda quando a estimativa passa do limite ou a cada
+# VARREDURA_A_CADA_GERACOES, para captar o que outros processos gravaram.
+# O despejo desce até FRACAO_APOS_DESPEJO do limite, para que as próximas
+# variantes caibam sem outra varredura.
+VARREDURA_A_CADA_GERACOES = 500
+FRACAO_APOS_DESPEJO = 0.9
+_estimativa = {'total': None, 'geracoes': 0}
+_trava_estimativa = threading.Lock()
+
+
+def registrar_variante_gerada(tamanho):
+    with _trava_estimativa:
+        _estimativa['geracoes'] += 1
+        if _estimativa['total'] is not None:
+            _estimativa['total'] += tamanho
+        varrer = (
+            _estimativa['total'] is None
+            or _estimativa['total'] > settings.FOTOS_VARIANTES_LIMITE_BYTES
+            or _estimativa['geracoes'] >= VARREDURA_A_CADA_GERACOES
+        )
+        if varrer:
+            _estimativa['geracoes'] = 0
+    if varrer:
+        despejar_variantes()
+
+
+def despejar_variantes(limite_bytes=None):
+    if limite_bytes is None:
+        limite_bytes = settings.FOTOS_VARIANTES_LIMITE_BYTES
+
+    arquivos = []
+    total = 0
+    for raiz, _, nomes in os.walk(settings.FOTOS_VARIANTES_ROOT):
+        for nome in nomes:
+            caminho = os.path.join(raiz, nome)
+            try:
+                info = os.stat(caminho)
+            except FileNotFoundError:
+                continue
+            arquivos.append((info.st_mtime, info.st_size, caminho))
+            total += info.st_size
+
+    alvo = limite_bytes * FRACAO_APOS_DESPEJO if total > limite_bytes else total
+    # O mtime é atualizado a cada acesso, então os menos recentes saem primeiro.
+    removidos = 0
+    for _, tamanho, caminho in sorted(arquivos):
+        if total <= alvo:
+            break
+        try:
+            os.unlink(caminho)
+        except FileNotFoundError:
+            pass
+        total -= tamanho
+        removidos += 1
+    with _trava_estimativa:
+        _estimativa['total'] = total
+    return removidos
+
+
+def obter_variante(nome, largura, formato):
+    if formato not in FORMATOS_VARIANTE or largura not in larguras_variante():
+        raise VarianteInvalida(f'{nome}:{largura}:{formato}')
+
+    destino = caminho_variante(nome, largura, formato)
+    try:
+        os.utime(destino)
+        return destino
+    except FileNotFoundError:
+        pass
+
+    gerar_variante(caminho_original(nome), destino, largura, formato)
+    try:
+        registrar_variante_gerada(os.path.getsize(destino))
+    except FileNotFoundError:
+        # Despejada por outro processo logo depois de gravada.
+        pass
+    return destino
+
+
+def mime_variante(formato):
+    return FORMATOS_VARIANTE[formato][1]
+
+
+def url_variante(foto, largura, formato=FORMATO_PADRAO):
+    return reverse('foto_variante', args=[largura, formato, foto.name])
+
+
+@functools.lru_cache(maxsize=4096)
+def largura_original(nome):
+    # Só o cabeçalho é lido. Os nomes vêm do conteúdo, então o valor não
+    # envelhece enquanto o processo vive.
+    try:
+        with Image.open(caminho_original(nome)) as imagem:
+            if imagem.getexif().get(ExifTags.Base.Orientation) in ORIENTACOES_GIRADAS:
+                return imagem.height
+            return imagem.width
+    except (VarianteInvalida, OSError, Image.DecompressionBombError):
+        return None
+
+
+def srcset_foto(foto, formato=FORMATO_PADRAO):
+    if not foto:
+        return ''
+    original = largura_original(foto.name)
+    if original is None:
+        return ''
+
+    candidatos = []
+    for largura in larguras_variante():
+        # Fotos não são ampliadas: da largura do original em diante toda
+        # variante tem a largura dele, então só a primeira entra, com o tamanho real.
+        if largura >= original:
+            candidatos.append(f'{url_variante(foto, largura, formato)} {original}w')
+            break
+        candidatos.append(f'{url_variante(foto, largura, formato)} {largura}w')
+    return ', '.join(candidatos)
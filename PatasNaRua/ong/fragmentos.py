@@ -0,0 +1,81 @@
+import time
+
+from django.core.cache import cache
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+FRAGMENTO_TIMEOUT = 60 * 60 * 24
+CONTADORES_FRAGMENTO = ('hits', 'misses', 'invalidacoes')
+
+# O fragmento é compartilhado entre usuários, então o token CSRF entra
+# como marcador e só é trocado pelo token real de cada requisição.
+MARCADOR_CSRF = 'CSRF-FRAGMENTO-PET'
+
+
+def _chave_versao(pet_id):
+    return f'pet_versao_{pet_id}'
+
+
+def _contar(nome):
+    chave = f'fragmento_pet_{nome}'
+    try:
+        cache.incr(chave)
+    except ValueError:
+        cache.set(chave, 1, None)
+
+
+async def _acontar(nome):
+    chave = f'fragmento_pet_{nome}'
+    try:
+        await cache.aincr(chave)
+    except ValueError:
+        await cache.aset(chave, 1, None)
+
+
+async def aversao_pet(pet_id):
+    chave = _chave_versao(pet_id)
+    versao = await cache.aget(chave)
+    if versao is None:
+        # Começa pelo relógio e não por 1: se a chave de versão for despejada,
+        # a nova versão nunca coincide com fragmentos antigos ainda em cache.
+        versao = time.time_ns()
+        if not await cache.aadd(chave, versao, None):
+            versao = await cache.aget(chave, versao)
+    return versao
+
+
+def invalidar_pet(pet_id):
+    try:
+        cache.incr(_chave_versao(pet_id))
+    except ValueError:
+        cache.set(_chave_versao(pet_id), time.time_ns(), None)
+    _contar('invalidacoes')
+
+
+async def afragmento_pet(request, template, pet_id, carregar_pet):
+    # carregar_pet é uma corrotina (aget_object_or_404) chamada só quando o fragmento não está em cache.
+    chave = f'fragmento_{template}_{pet_id}_{await aversao_pet(pet_id)}'
+    html = await cache.aget(chave)
+
+    if html is None:
+        await _acontar('misses')
+        html = render_to_string(template, {'pet': await carregar_pet(), 'csrf_token': MARCADOR_CSRF})
+        await cache.aset(chave, html, FRAGMENTO_TIMEOUT)
+    else:
+        await _acontar('hits')
+
+    if MARCADOR_CSRF in html:
+        html = html.replace(MARCADOR_CSRF, get_token(request))
+    return mark_safe(html)
+
+
+def estatisticas_fragmentos():
+    valores = cache.get_many([f'fragmento_pet_{nome}' for nome in CONTADORES_FRAGMENTO])
+    estatisticas = {
+        nome: valores.get(f'fragmento_pet_{nome}', 0)
+        for nome in CONTADORES_FRAGMENTO
+    }
+    consultas = estatisticas['hits'] + estatisticas['misses']
+    estatisticas['taxa_acerto'] = estatisticas['hits'] / consultas if consultas else 0.0
+    return estatisticas
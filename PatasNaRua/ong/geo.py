@@ -0,0 +1,173 @@
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+PRECISAO_GEOHASH = 9
+RAIO_TERRA = 6371008.8
+METROS_POR_GRAU = 111320.0
+RAIO_INICIAL = 500
+RAIO_MAXIMO = 100_000
+MAXIMO_CELULAS = 16
+FOLGA_AMPLIACAO = 1.5
+AMPLIACAO_VAZIO = 16
+
+
+class CoordenadaInvalida(ValueError):
+    pass
+
+
+def validar_coordenadas(latitude, longitude):
+    try:
+        latitude = float(str(latitude).strip().replace(',', '.'))
+        longitude = float(str(longitude).strip().replace(',', '.'))
+    except (TypeError, ValueError):
+        raise CoordenadaInvalida(f'{latitude},{longitude}')
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise CoordenadaInvalida(f'{latitude},{longitude}')
+    return latitude, longitude
+
+
+def codificar_geohash(latitude, longitude, precisao=PRECISAO_GEOHASH):
+    if latitude is None or longitude is None:
+        return None
+
+    faixa_lat = [-90.0, 90.0]
+    faixa_lon = [-180.0, 180.0]
+    resultado = []
+    bits = 0
+    total_bits = 0
+    usar_longitude = True
+
+    while len(resultado) < precisao:
+        faixa, valor = (faixa_lon, longitude) if usar_longitude else (faixa_lat, latitude)
+        meio = (faixa[0] + faixa[1]) / 2
+        if valor >= meio:
+            bits = (bits << 1) | 1
+            faixa[0] = meio
+        else:
+            bits <<= 1
+            faixa[1] = meio
+        usar_longitude = not usar_longitude
+        total_bits += 1
+
+        if total_bits == 5:
+            resultado.append(BASE32[bits])
+            bits = 0
+            total_bits = 0
+
+    return ''.join(resultado)
+
+
+def tamanho_celula(precisao):
+    bits = 5 * precisao
+    bits_lon = (bits + 1) // 2
+    bits_lat = bits // 2
+    return 180.0 / (1 << bits_lat), 360.0 / (1 << bits_lon)
+
+
+def _passos(inicio, fim, passo):
+    valores = []
+    atual = inicio
+    while atual < fim:
+        valores.append(atual)
+        atual += passo
+    valores.append(fim)
+    return valores
+
+
+def celulas_cobrindo(latitude, longitude, raio):
+    # Usa a maior precisão em que poucas células cobrem o retângulo em volta
+    # do círculo: cada célula vira um intervalo no índice de geohash e o
+    # número de candidatos fica próximo da área realmente pedida.
+    d_lat = raio / METROS_POR_GRAU
+    d_lon = raio / (METROS_POR_GRAU * max(math.cos(math.radians(latitude)), 0.01))
+    sul, norte = max(latitude - d_lat, -90.0), min(latitude + d_lat, 90.0)
+    oeste, leste = longitude - d_lon, longitude + d_lon
+
+    for precisao in range(PRECISAO_GEOHASH, 0, -1):
+        altura, largura = tamanho_celula(precisao)
+        linhas = math.floor(norte / altura) - math.floor(sul / altura) + 1
+        colunas = math.floor(leste / largura) - math.floor(oeste / largura) + 1
+        if linhas * colunas > MAXIMO_CELULAS:
+            continue
+
+        return {
+            codificar_geohash(lat, (lon + 180.0) % 360.0 - 180.0, precisao)
+            for lat in _passos(sul, norte, altura)
+            for lon in _passos(oeste, leste, largura)
+        }
+
+    return None
+
+
+def distancia_metros(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * RAIO_TERRA * math.asin(math.sqrt(a))
+
+
+def distancias_no_raio(queryset, latitude, longitude, raio, limite=None):
+    colunas = ('pk', 'latitude', 'longitude')
+    celulas = celulas_cobrindo(latitude, longitude, raio)
+    if celulas:
+        # Um intervalo por célula, unidos com UNION ALL: cada parte vira uma
+        # busca por faixa no índice (status, geohash), o que um OR de faixas
+        # não garante. O intervalo explícito evita o LIKE de startswith, e
+        # '{' é o primeiro caractere depois de 'z' no ASCII.
+        partes = [
+            queryset.filter(geohash__gte=celula, geohash__lt=celula + '{').values_list(*colunas)
+            for celula in sorted(celulas)
+        ]
+        candidatos = partes[0].union(*partes[1:], all=True)
+    else:
+        candidatos = queryset.exclude(geohash__isnull=True).values_list(*colunas)
+
+    # A distância é calculada sobre tuplas; os objetos só são carregados
+    # depois, para os que entram no resultado.
+    distancias = []
+    for pk, lat, lon in candidatos:
+        distancia = distancia_metros(latitude, longitude, lat, lon)
+        if distancia <= raio:
+            distancias.append((distancia, pk))
+
+    distancias.sort()
+    return distancias[:limite] if limite else distancias
+
+
+def carregar_distancias(queryset, distancias, campos=None):
+    # Os filtros já foram aplicados aos candidatos; buscar só pela chave
+    # primária evita que o otimizador prefira o índice de status.
+    if not distancias:
+        return []
+    objetos = queryset.model._default_manager.all()
+    if campos:
+        objetos = objetos.only(*campos)
+    objetos = objetos.in_bulk([pk for _, pk in distancias])
+    return [(distancia, objetos[pk]) for distancia, pk in distancias if pk in objetos]
+
+
+def no_raio(queryset, latitude, longitude, raio, limite=None, campos=None):
+    distancias = distancias_no_raio(queryset, latitude, longitude, raio, limite)
+    return carregar_distancias(queryset, distancias, campos)
+
+
+def mais_proximos(queryset, latitude, longitude, k, raio_maximo=RAIO_MAXIMO, campos=None):
+    # Começa com um raio pequeno e amplia: se já há k resultados dentro do
+    # raio, nenhum ponto fora dele pode estar entre os k mais próximos. A
+    # ampliação segue a densidade encontrada (n pontos num raio r pedem
+    # r * sqrt(k / n) para chegar a k), com folga, para fechar em uma ou duas
+    # buscas; sem nenhum ponto, salta AMPLIACAO_VAZIO vezes. Se a estimativa
+    # ainda não bastar, a terceira busca já é no raio máximo.
+    raio = min(RAIO_INICIAL, raio_maximo)
+    for tentativa in range(3):
+        distancias = distancias_no_raio(queryset, latitude, longitude, raio, limite=k)
+        if len(distancias) >= k or raio >= raio_maximo:
+            break
+        if tentativa == 1:
+            raio = raio_maximo
+        elif distancias:
+            raio = min(raio * max(2.0, FOLGA_AMPLIACAO * math.sqrt(k / len(distancias))), raio_maximo)
+        else:
+            raio = min(raio * AMPLIACAO_VAZIO, raio_maximo)
+    return carregar_distancias(queryset, distancias, campos)
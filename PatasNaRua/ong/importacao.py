@@ -0,0 +1,233 @@
+import csv
+import json
+import math
+import posixpath
+import zipfile
+
+from django.core.files import File
+from django.db import DatabaseError, transaction
+from django.db.models import Max
+
+from .busca import indexar_pets
+from .campos import converter_idade, converter_peso
+from .geo import CoordenadaInvalida, codificar_geohash, validar_coordenadas
+from .models import Pet
+from .storage import armazenamento_fotos
+
+FORMATOS_IMPORTACAO = ('csv', 'jsonl')
+LOTE_IMPORTACAO = 500
+LIMITE_ERROS_RELATORIO = 1000
+
+CAMPOS_OBRIGATORIOS = ('nome', 'especie', 'porte', 'raca', 'sexo', 'castrado')
+CAMPOS_TEXTO = ('nome', 'especie', 'porte', 'raca', 'sexo', 'castrado', 'info', 'historico_saude', 'status')
+
+
+class FormatoInvalido(ValueError):
+    pass
+
+
+class CodificacaoInvalida(ValueError):
+    pass
+
+
+def formato_do_arquivo(nome, formato=None):
+    formato = (formato or posixpath.splitext(nome or '')[1].lstrip('.')).lower()
+    if formato == 'ndjson':
+        formato = 'jsonl'
+    if formato not in FORMATOS_IMPORTACAO:
+        raise FormatoInvalido(formato)
+    return formato
+
+
+def _texto(valor):
+    return '' if valor is None else str(valor).strip()
+
+
+def linhas_texto(arquivo):
+    # Decodifica linha a linha: com um TextIOWrapper o erro de um arquivo
+    # fora de UTF-8 sairia no meio de um bloco, sem dizer onde.
+    for numero, linha in enumerate(arquivo, start=1):
+        try:
+            yield linha.decode('utf-8-sig' if numero == 1 else 'utf-8')
+        except UnicodeDecodeError:
+            raise CodificacaoInvalida(numero)
+
+
+def ler_linhas(arquivo, formato):
+    texto = linhas_texto(arquivo)
+    if formato == 'csv':
+        yield from csv.DictReader(texto)
+        return
+
+    for linha in texto:
+        linha = linha.strip()
+        if not linha:
+            continue
+        try:
+            dados = json.loads(linha)
+        except json.JSONDecodeError:
+            dados = None
+        yield dados if isinstance(dados, dict) else {'__invalida__': linha}
+
+
+class ImportadorPets:
+    def __init__(self, fotos=None, lote=LOTE_IMPORTACAO):
+        self.fotos = zipfile.ZipFile(fotos) if fotos else None
+        self.nomes_fotos = set(self.fotos.namelist()) if self.fotos else set()
+        self.fotos_salvas = {}
+        self.lote = lote
+        self.pendentes = []
+        self.importados = 0
+        self.total_erros = 0
+        self.erros = []
+
+    def validar(self, dados):
+        if '__invalida__' in dados:
+            return None, ['Linha JSON inválida.'], None
+
+        valores = {campo: _texto(dados.get(campo)) for campo in CAMPOS_TEXTO}
+        erros = []
+
+        faltando = [campo for campo in CAMPOS_OBRIGATORIOS if not valores[campo]]
+        if faltando:
+            erros.append(f'Campos obrigatórios ausentes: {", ".join(faltando)}.')
+
+        for campo in CAMPOS_TEXTO:
+            maximo = Pet._meta.get_field(campo).max_length
+            if maximo and len(valores[campo]) > maximo:
+                erros.append(f'O campo {campo} aceita no máximo {maximo} caracteres.')
+
+        try:
+            peso = converter_peso(_texto(dados.get('peso')))
+            idade = converter_idade(_texto(dados.get('idade')))
+        except ValueError:
+            peso = idade = None
+            erros.append('Os campos peso e idade devem ser numeros.')
+        else:
+            if peso is None or idade is None:
+                erros.append('Os campos peso e idade são obrigatórios.')
+            else:
+                # float() aceita 'nan' e 'inf', que o banco grava como NULL ou
+                # recusa, derrubando o lote inteiro.
+                if not math.isfinite(peso) or peso <= 0:
+                    erros.append('O peso deve ser maior que zero.')
+                if idade < 0:
+                    erros.append('A idade não pode ser negativa.')
+
+        for campo, escolhas in (
+            ('especie', Pet.ESPECIE_CHOICES),
+            ('sexo', Pet.SEXO_CHOICES),
+            ('castrado', Pet.CASTRADO_CHOICES),
+        ):
+            if valores[campo] and valores[campo] not in dict(escolhas):
+                erros.append(f'Valor inválido para {campo}: {valores[campo]}.')
+
+        latitude = longitude = None
+        if dados.get('latitude') not in (None, '') or dados.get('longitude') not in (None, ''):
+            try:
+                latitude, longitude = validar_coordenadas(dados.get('latitude'), dados.get('longitude'))
+            except CoordenadaInvalida:
+                erros.append('Latitude e longitude inválidas.')
+
+        foto = _texto(dados.get('foto'))
+        if foto and foto not in self.nomes_fotos:
+            erros.append(f'Foto não encontrada no arquivo zip: {foto}.')
+
+        if erros:
+            return None, erros, None
+
+        pet = Pet(
+            nome=valores['nome'],
+            especie=valores['especie'],
+            porte=valores['porte'],
+            raca=valores['raca'],
+            peso=peso,
+            idade=idade,
+            sexo=valores['sexo'],
+            castrado=valores['castrado'],
+            info=valores['info'] or None,
+            historico_saude=valores['historico_saude'] or None,
+            status=valores['status'] or 'Disponível',
+            latitude=latitude,
+            longitude=longitude,
+            # bulk_create não passa por Pet.save, então o geohash é calculado aqui.
+            geohash=codificar_geohash(latitude, longitude),
+        )
+        return pet, [], foto or None
+
+    def salvar_foto(self, nome):
+        if nome not in self.fotos_salvas:
+            with self.fotos.open(nome) as arquivo:
+                self.fotos_salvas[nome] = armazenamento_fotos.save(
+                    f'fotosPet/{posixpath.basename(nome)}', File(arquivo)
+                )
+        return self.fotos_salvas[nome]
+
+    def registrar_erro(self, numero, erros):
+        self.total_erros += 1
+        if len(self.erros) < LIMITE_ERROS_RELATORIO:
+            self.erros.append({'linha': numero, 'erros': erros})
+
+    def gravar_lote(self):
+        if not self.pendentes:
+            return
+
+        # As fotos só são gravadas quando o lote vai para o banco. Se ele
+        # falhar, as que ficarem sem pet saem na coleta de órfãos do
+        # reorganizar_fotos; apagá-las aqui poderia levar um arquivo que, por
+        # ter o mesmo conteúdo, outro pet já usa.
+        pets = []
+        for _, pet, foto in self.pendentes:
+            if foto:
+                pet.foto = self.salvar_foto(foto)
+            pets.append(pet)
+
+        try:
+            with transaction.atomic():
+                ultimo_id = Pet.objects.aggregate(ultimo=Max('id'))['ultimo'] or 0
+                Pet.objects.bulk_create(pets, batch_size=self.lote)
+
+                # bulk_create não dispara post_save; no MySQL os ids também não
+                # voltam preenchidos, então o índice de busca é refeito pelo intervalo.
+                if all(pet.pk for pet in pets):
+                    indexar_pets(pets)
+                else:
+                    indexar_pets(Pet.objects.filter(id__gt=ultimo_id))
+        except DatabaseError as erro:
+            for numero, _, _ in self.pendentes:
+                self.registrar_erro(numero, [f'O lote desta linha não foi gravado: {erro}'])
+        else:
+            self.importados += len(pets)
+        self.pendentes = []
+
+    def importar(self, linhas):
+        numero = 0
+        try:
+            for numero, dados in enumerate(linhas, start=1):
+                pet, erros, foto = self.validar(dados)
+                if erros:
+                    self.registrar_erro(numero, erros)
+                    continue
+
+                self.pendentes.append((numero, pet, foto))
+                if len(self.pendentes) >= self.lote:
+                    self.gravar_lote()
+        except CodificacaoInvalida as erro:
+            self.registrar_erro(numero + 1, [
+                f'A linha {erro.args[0]} do arquivo não está em UTF-8; o restante do arquivo não foi lido.'
+            ])
+
+        self.gravar_lote()
+        return self.relatorio()
+
+    def relatorio(self):
+        return {
+            'importados': self.importados,
+            'com_erro': self.total_erros,
+            'erros': self.erros,
+        }
+
+
+def importar_pets(arquivo, formato, fotos=None, lote=LOTE_IMPORTACAO):
+    importador = ImportadorPets(fotos=fotos, lote=lote)
+    return importador.importar(ler_linhas(arquivo, formato))
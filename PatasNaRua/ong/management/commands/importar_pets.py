@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ong.importacao import (
+    FORMATOS_IMPORTACAO, LOTE_IMPORTACAO, FormatoInvalido, formato_do_arquivo, importar_pets
+)
+
+
+class Command(BaseCommand):
+    help = 'Importa pets em lote a partir de um CSV ou JSONL, com fotos opcionais em um zip.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo')
+        parser.add_argument('--fotos', help='Arquivo zip com as fotos referenciadas na coluna foto.')
+        parser.add_argument('--formato', choices=FORMATOS_IMPORTACAO)
+        parser.add_argument('--lote', type=int, default=LOTE_IMPORTACAO)
+
+    def handle(self, *args, **options):
+        try:
+            formato = formato_do_arquivo(options['arquivo'], options['formato'])
+        except FormatoInvalido:
+            raise CommandError('Use um arquivo .csv ou .jsonl, ou informe --formato.')
+
+        fotos = open(options['fotos'], 'rb') if options['fotos'] else None
+        try:
+            with open(options['arquivo'], 'rb') as arquivo:
+                relatorio = importar_pets(arquivo, formato, fotos=fotos, lote=options['lote'])
+        finally:
+            if fotos:
+                fotos.close()
+
+        for erro in relatorio['erros']:
+            self.stderr.write(f"Linha {erro['linha']}: {' '.join(erro['erros'])}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Pets importados: {relatorio['importados']} (linhas com erro: {relatorio['com_erro']})"
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from ong.busca import LOTE_INDEXACAO, reconstruir_indice
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói do zero o índice de busca de pets.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=LOTE_INDEXACAO)
+
+    def handle(self, *args, **options):
+        total_pets, total_termos = reconstruir_indice(lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Índice reconstruído: {total_pets} pets, {total_termos} termos.'
+        ))
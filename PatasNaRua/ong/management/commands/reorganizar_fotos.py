@@ -0,0 +1,104 @@
+import os
+import re
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ong.fragmentos import invalidar_pet
+from ong.models import Pet
+from ong.storage import armazenamento_fotos, e_nome_por_conteudo
+
+PASTA_FOTOS = 'fotosPet'
+CARENCIA_PADRAO = 60 * 60
+# mkstemp (tmpXXXXXXXX) do ArmazenamentoPorConteudo, .tmp e arquivos ocultos.
+_TEMPORARIO = re.compile(r'^(?:tmp[a-z0-9_]{8}|\..*|.*\.tmp)$')
+
+
+class Command(BaseCommand):
+    help = (
+        'Move as fotos de pets para nomes por hash de conteúdo e remove '
+        'arquivos de fotosPet que nenhum pet referencia.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--simular', action='store_true',
+                            help='Apenas lista o que seria feito.')
+        parser.add_argument('--sem-coleta', action='store_true',
+                            help='Não remove arquivos órfãos.')
+        parser.add_argument('--carencia', type=int, default=CARENCIA_PADRAO,
+                            help='Segundos em que um arquivo recém-gravado ainda não conta como órfão.')
+
+    def handle(self, *args, **options):
+        simular = options['simular']
+        migradas, ausentes = self.migrar(simular)
+        self.stdout.write(f'Fotos migradas: {migradas} (ausentes no disco: {ausentes})')
+
+        if not options['sem_coleta']:
+            removidos, bytes_liberados = self.coletar_orfaos(simular, options['carencia'])
+            self.stdout.write(f'Órfãos removidos: {removidos} ({bytes_liberados} bytes)')
+
+        if simular:
+            self.stdout.write(self.style.WARNING('Simulação: nada foi alterado.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Fotos reorganizadas.'))
+
+    def migrar(self, simular):
+        migradas = 0
+        ausentes = 0
+        pets = Pet.objects.exclude(foto='').exclude(foto__isnull=True).only('id', 'foto')
+
+        for pet in pets.iterator(chunk_size=500):
+            nome_antigo = pet.foto.name
+            if e_nome_por_conteudo(nome_antigo):
+                continue
+            if not armazenamento_fotos.exists(nome_antigo):
+                ausentes += 1
+                self.stderr.write(f'Pet {pet.id}: arquivo ausente {nome_antigo}')
+                continue
+
+            migradas += 1
+            if simular:
+                continue
+
+            with armazenamento_fotos.open(nome_antigo) as arquivo:
+                nome_novo = armazenamento_fotos.save(f'{PASTA_FOTOS}/{os.path.basename(nome_antigo)}', arquivo)
+            Pet.objects.filter(id=pet.id).update(foto=nome_novo, atualizado_em=timezone.now())
+            invalidar_pet(pet.id)
+
+        return migradas, ausentes
+
+    def coletar_orfaos(self, simular, carencia=CARENCIA_PADRAO):
+        # Cadastro, upload em blocos e importação gravam a foto antes de a
+        # linha do pet ser confirmada; arquivos recentes ficam para a próxima.
+        limite = time.time() - carencia
+        referenciadas = set(
+            Pet.objects.exclude(foto='').exclude(foto__isnull=True)
+            .values_list('foto', flat=True).iterator(chunk_size=5000)
+        )
+
+        removidos = 0
+        bytes_liberados = 0
+        raiz_fotos = os.path.join(settings.MEDIA_ROOT, PASTA_FOTOS)
+        for raiz, _, nomes in os.walk(raiz_fotos):
+            for nome in nomes:
+                if _TEMPORARIO.match(nome):
+                    continue
+                caminho = os.path.join(raiz, nome)
+                try:
+                    info = os.stat(caminho)
+                except FileNotFoundError:
+                    continue
+                if info.st_mtime > limite:
+                    continue
+                relativo = os.path.relpath(caminho, settings.MEDIA_ROOT).replace(os.sep, '/')
+                if relativo in referenciadas:
+                    continue
+
+                removidos += 1
+                bytes_liberados += info.st_size
+                if not simular:
+                    os.remove(caminho)
+
+        return removidos, bytes_liberados
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ong', '0015_alter_pet_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(fields=['status', 'especie', 'id'], name='pet_status_especie_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(fields=['status', 'porte', 'id'], name='pet_status_porte_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(fields=['especie', 'id'], name='pet_especie_id_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ong', '0016_pet_indices_catalogo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TermoBusca',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termo', models.CharField(max_length=64)),
+                ('peso', models.PositiveIntegerField(default=1)),
+                ('pet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='termos_busca', to='ong.pet')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('termo', 'pet'), name='termo_busca_termo_pet_unico')],
+            },
+        ),
+    ]
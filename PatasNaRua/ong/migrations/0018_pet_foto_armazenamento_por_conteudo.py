@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:34
+
+import ong.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ong', '0017_termobusca'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pet',
+            name='foto',
+            field=models.ImageField(blank=True, null=True, storage=ong.storage.ArmazenamentoPorConteudo(), upload_to='fotosPet/'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-18 15:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ong', '0018_pet_foto_armazenamento_por_conteudo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pet',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(fields=['atualizado_em', 'id'], name='pet_atualizado_em_id_idx'),
+        ),
+    ]
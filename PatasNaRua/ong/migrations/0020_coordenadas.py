@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ong', '0019_pet_atualizado_em'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pet',
+            name='geohash',
+            field=models.CharField(blank=True, editable=False, max_length=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='pet',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pet',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(fields=['status', 'geohash'], name='pet_status_geohash_idx'),
+        ),
+    ]
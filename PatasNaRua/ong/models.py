@@ -1,5 +1,8 @@
 from django.db import models
 
+from .geo import codificar_geohash
+from .storage import armazenamento_fotos
+
 # Create your models here.
 
 class Pet (models.Model):
@@ -26,11 +29,41 @@ class Pet (models.Model):
     idade = models.PositiveIntegerField()
     sexo = models.CharField(max_length=5, choices=SEXO_CHOICES)
     info = models.TextField(null=True, blank=True)
-    foto = models.ImageField(upload_to="fotosPet/", null=True, blank=True)
+    foto = models.ImageField(upload_to="fotosPet/", storage=armazenamento_fotos, null=True, blank=True)
     status = models.CharField(max_length=100, default="Disponível")
     historico_saude = models.TextField(null=True, blank=True)
     castrado = models.CharField(max_length=3, choices=CASTRADO_CHOICES)
     adotantes_padrinhos = models.CharField(max_length=100, null=True, blank=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'especie', 'id'], name='pet_status_especie_id_idx'),
+            models.Index(fields=['status', 'porte', 'id'], name='pet_status_porte_id_idx'),
+            models.Index(fields=['especie', 'id'], name='pet_especie_id_idx'),
+            models.Index(fields=['atualizado_em', 'id'], name='pet_atualizado_em_id_idx'),
+            models.Index(fields=['status', 'geohash'], name='pet_status_geohash_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.geohash = codificar_geohash(self.latitude, self.longitude)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.nome} ({self.raca} - {self.get_sexo_display()} - {self.idade} anos)"
+
+class TermoBusca(models.Model):
+    termo = models.CharField(max_length=64)
+    pet = models.ForeignKey(Pet, on_delete=models.CASCADE, related_name='termos_busca')
+    peso = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['termo', 'pet'], name='termo_busca_termo_pet_unico'),
+        ]
 
     def __str__(self):
-        return f"{self.nome} ({self.raca} - {self.get_sexo_display()} - {self.idade} anos)"
\ No newline at end of file
+        return f"{self.termo} -> {self.pet_id} ({self.peso})"
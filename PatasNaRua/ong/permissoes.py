@@ -0,0 +1,14 @@
+from rest_framework.permissions import BasePermission
+
+
+def e_ong_ou_equipe(user):
+    return user.is_authenticated and (user.is_staff or hasattr(user, 'ong'))
+
+
+class ContaOng(BasePermission):
+    """Contas de ONG e da equipe: as únicas que cadastram e removem pets."""
+
+    message = 'Apenas contas de ONG podem fazer esta operação.'
+
+    def has_permission(self, request, view):
+        return e_ong_ou_equipe(request.user)
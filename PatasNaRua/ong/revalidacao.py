@@ -0,0 +1,58 @@
+import hashlib
+from functools import wraps
+
+from django.http import Http404
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .models import Pet
+
+
+def validadores_pet(pet_id, atualizado_em, variante=None):
+    marca = int(atualizado_em.timestamp() * 1_000_000)
+    sufixo = f'-{variante}' if variante else ''
+    return f'W/"pet-{pet_id}-{marca:x}{sufixo}"', int(atualizado_em.timestamp())
+
+
+def variante_csrf(request):
+    # O HTML leva o token CSRF mascarado, que muda a cada renderização sem
+    # mudar o sentido (daí a ETag fraca). O segredo CSRF entra na ETag para um
+    # 304 nunca ressuscitar uma página com o token de um cookie já trocado.
+    csrf = request.META.get('CSRF_COOKIE')
+    return hashlib.sha256(csrf.encode()).hexdigest()[:8] if csrf else None
+
+
+def marcar_validadores(resposta, etag, ultima_modificacao):
+    resposta['ETag'] = etag
+    resposta['Last-Modified'] = http_date(ultima_modificacao)
+    # Sem no-cache o navegador usaria o Last-Modified para adivinhar uma
+    # validade e mostraria o pet antigo depois de uma edição.
+    patch_cache_control(resposta, private=True, no_cache=True)
+    patch_vary_headers(resposta, ('Cookie',))
+    return resposta
+
+
+def revalidar_pet(view):
+    """
+    Responde 304 às revalidações de páginas de um pet com uma única consulta
+    ao atualizado_em pela chave primária, antes de a view renderizar qualquer
+    coisa. Para views assíncronas com pet_id na URL.
+    """
+
+    @wraps(view)
+    async def inner(request, pet_id, *args, **kwargs):
+        atualizado_em = await Pet.objects.filter(id=pet_id).values_list('atualizado_em', flat=True).afirst()
+        if atualizado_em is None:
+            raise Http404('Pet não encontrado.')
+
+        etag, ultima_modificacao = validadores_pet(pet_id, atualizado_em, variante_csrf(request))
+        resposta = get_conditional_response(request, etag=etag, last_modified=ultima_modificacao)
+        if resposta is None:
+            resposta = await view(request, pet_id, *args, **kwargs)
+            # A renderização pode ter criado o cookie CSRF.
+            etag, ultima_modificacao = validadores_pet(pet_id, atualizado_em, variante_csrf(request))
+        if resposta.status_code in (200, 304):
+            marcar_validadores(resposta, etag, ultima_modificacao)
+        return resposta
+
+    return inner
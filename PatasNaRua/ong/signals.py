@@ -0,0 +1,28 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .busca import indexar_pet
+from .fragmentos import invalidar_pet
+from .models import Pet
+
+
+# A remoção de um Pet apaga os termos dele via on_delete=CASCADE,
+# então só o post_save precisa manter o índice de busca.
+@receiver(post_save, sender=Pet)
+def atualizar_indice_busca(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    indexar_pet(instance)
+
+
+# editar_pet e cadpet_view salvam o Pet, então a versão é incrementada
+# aqui e nenhum fragmento renderizado antes da alteração volta a ser servido.
+# Só depois do commit: antes dele outra requisição ainda lê a linha antiga e
+# a guardaria sob a versão nova.
+@receiver(post_save, sender=Pet)
+@receiver(post_delete, sender=Pet)
+def invalidar_fragmentos(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidar_pet, instance.id))
@@ -4,6 +4,75 @@ document.addEventListener("DOMContentLoaded", () => {
     const pictureImageTxt = "Choose an image";
     const form = document.querySelector("form.dados");
     const PLACEHOLDER_URL = window.PLACEHOLDER_URL || "#";
+    const UPLOADS_URL = "/api/uploads/";
+    const TAMANHO_BLOCO = 512 * 1024;
+    const MAX_TENTATIVAS = 5;
+    // Com sessão ativa o DRF exige o token CSRF em todo método que não seja GET.
+    const CSRF_TOKEN = form.querySelector("[name=csrfmiddlewaretoken]").value;
+
+    async function lerJson(response) {
+        const data = await response.json();
+        if (!response.ok) {
+            const erro = new Error(data.erro || "Erro desconhecido.");
+            erro.status = response.status;
+            erro.data = data;
+            throw erro;
+        }
+        return data;
+    }
+
+    async function consultarOffset(uploadId) {
+        const data = await lerJson(await fetch(`${UPLOADS_URL}${uploadId}/`));
+        return data.offset;
+    }
+
+    async function enviarFoto(file) {
+        const inicio = await lerJson(await fetch(UPLOADS_URL, {
+            method: "POST",
+            headers: { "Content-Type": "application/json", "X-CSRFToken": CSRF_TOKEN },
+            body: JSON.stringify({ nome: file.name, tamanho: file.size })
+        }));
+        const uploadId = inicio.upload_id;
+        let offset = 0;
+        let tentativas = 0;
+
+        while (offset < file.size) {
+            const bloco = file.slice(offset, offset + TAMANHO_BLOCO);
+            try {
+                const data = await lerJson(await fetch(`${UPLOADS_URL}${uploadId}/`, {
+                    method: "PATCH",
+                    headers: {
+                        "Content-Type": "application/offset+octet-stream",
+                        "Upload-Offset": String(offset),
+                        "X-CSRFToken": CSRF_TOKEN
+                    },
+                    body: bloco
+                }));
+                offset = data.offset;
+                tentativas = 0;
+            } catch (error) {
+                if (error.status === 409 && error.data) {
+                    offset = error.data.offset;
+                    continue;
+                }
+                if (error.status && error.status !== 503) {
+                    throw error;
+                }
+                tentativas += 1;
+                if (tentativas > MAX_TENTATIVAS) {
+                    throw error;
+                }
+                await new Promise(resolve => setTimeout(resolve, 1000 * tentativas));
+                offset = await consultarOffset(uploadId).catch(() => offset);
+            }
+        }
+
+        await lerJson(await fetch(`${UPLOADS_URL}${uploadId}/finalizar/`, {
+            method: "POST",
+            headers: { "X-CSRFToken": CSRF_TOKEN }
+        }));
+        return uploadId;
+    }
 
     pictureImage.innerHTML = pictureImageTxt;
 
@@ -31,11 +100,13 @@ document.addEventListener("DOMContentLoaded", () => {
         event.preventDefault();
         const formData = new FormData(form);
         const file = inputFile.files[0];
-        if (file) {
-            formData.append("foto", file);
-        }
+        formData.delete("foto");
 
         try {
+            if (file) {
+                formData.append("upload_id", await enviarFoto(file));
+            }
+
             const response = await fetch("/api/cadpet/", {
                 method: "POST",
                 body: formData
@@ -53,7 +124,7 @@ document.addEventListener("DOMContentLoaded", () => {
             }
         } catch (error) {
             console.error("Erro de rede:", error);
-            alert("Falha de comunicação com o servidor.");
+            alert(error.status ? "Erro: " + error.message : "Falha de comunicação com o servidor.");
         }
     });
 });
@@ -1,12 +1,11 @@
 document.addEventListener('DOMContentLoaded', function () {
-    const botaoRemover = document.querySelector('.botao-remover');
-    if(botaoRemover) {
-        botaoRemover.addEventListener('submit', function(event) {
-            event.preventDefault();
+    const formRemover = document.querySelector('.form-remover');
+    if(formRemover) {
+        formRemover.addEventListener('submit', function(event) {
             const petNome = this.getAttribute('data-pet-nome') || 'este pet';
-            const confirmar = confirm('Tem certeza que deseja remover permanentemente o pet: ${petNome}? Esta ação não pode ser desfeita.');
-            if(confirmar) {
-                window.location.href = this.href;
+            const confirmar = confirm(`Tem certeza que deseja remover permanentemente o pet: ${petNome}? Esta ação não pode ser desfeita.`);
+            if(!confirmar) {
+                event.preventDefault();
             }
         })
     }
@@ -0,0 +1,78 @@
+document.addEventListener("DOMContentLoaded", () => {
+    const BUSCA_URL = window.BUSCA_URL || "/api/pets/busca/";
+    const INFOPET_URL = window.INFOPET_URL || "/pet/0/infopet-ong/";
+    const campoBusca = document.querySelector(".search-barra");
+    const lista = document.querySelector(".search-resultados");
+    let temporizador = null;
+
+    async function pesquisar(consulta) {
+        lista.innerHTML = "";
+        if (!consulta) {
+            return;
+        }
+
+        try {
+            const response = await fetch(`${BUSCA_URL}?${new URLSearchParams({ q: consulta })}`);
+            const data = await response.json();
+            data.resultados.forEach(pet => {
+                const item = document.createElement("li");
+                const link = document.createElement("a");
+                link.href = INFOPET_URL.replace("/0/", `/${pet.id}/`);
+                link.textContent = `${pet.nome} (${pet.especie} - ${pet.raca})`;
+                item.appendChild(link);
+                lista.appendChild(item);
+            });
+        } catch (error) {
+            console.error("Erro de rede:", error);
+        }
+    }
+
+    const PROXIMOS_URL = window.PROXIMOS_URL || "/api/proximos/";
+    const listaPets = document.querySelector(".lista-pets-proximos");
+    const listaOngs = document.querySelector(".lista-ongs-proximas");
+
+    function formatarDistancia(metros) {
+        return metros < 1000 ? `${metros} m` : `${(metros / 1000).toFixed(1)} km`;
+    }
+
+    async function carregarProximos(posicao) {
+        const params = new URLSearchParams({
+            lat: posicao.coords.latitude,
+            lng: posicao.coords.longitude,
+        });
+
+        try {
+            const response = await fetch(`${PROXIMOS_URL}?${params}`);
+            const data = await response.json();
+            if (!response.ok) {
+                console.error("Erro ao buscar proximidades:", data.erro);
+                return;
+            }
+
+            data.pets.forEach(pet => {
+                const item = document.createElement("li");
+                const link = document.createElement("a");
+                link.href = INFOPET_URL.replace("/0/", `/${pet.id}/`);
+                link.textContent = `${pet.nome} (${pet.especie}) - ${formatarDistancia(pet.distancia)}`;
+                item.appendChild(link);
+                listaPets.appendChild(item);
+            });
+            data.ongs.forEach(ong => {
+                const item = document.createElement("li");
+                item.textContent = `${ong.nome} - ${formatarDistancia(ong.distancia)}`;
+                listaOngs.appendChild(item);
+            });
+        } catch (error) {
+            console.error("Erro de rede:", error);
+        }
+    }
+
+    if (navigator.geolocation && listaPets && listaOngs) {
+        navigator.geolocation.getCurrentPosition(carregarProximos);
+    }
+
+    campoBusca.addEventListener("input", () => {
+        clearTimeout(temporizador);
+        temporizador = setTimeout(() => pesquisar(campoBusca.value.trim()), 250);
+    });
+});
@@ -0,0 +1,75 @@
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+TAMANHO_BLOCO_HASH = 64 * 1024
+_NOME_POR_CONTEUDO = re.compile(r'^(?:.+/)?[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(?:\.[a-z0-9]+)?$')
+
+
+def hash_conteudo(content):
+    digest = hashlib.sha256()
+    for bloco in content.chunks(TAMANHO_BLOCO_HASH):
+        digest.update(bloco)
+    return digest.hexdigest()
+
+
+def nome_por_conteudo(pasta, digest, extensao):
+    return posixpath.join(pasta, digest[:2], digest[2:4], f'{digest}{extensao}')
+
+
+def e_nome_por_conteudo(nome):
+    return bool(_NOME_POR_CONTEUDO.match(nome))
+
+
+@deconstructible
+class ArmazenamentoPorConteudo(FileSystemStorage):
+    """Nomeia cada arquivo pelo SHA-256 do conteúdo, em subpastas pelo prefixo do hash."""
+
+    def get_available_name(self, name, max_length=None):
+        # O nome final vem do conteúdo em _save, então colisões com o nome
+        # enviado pelo cliente não importam.
+        return name
+
+    def _save(self, name, content):
+        pasta = posixpath.dirname(name)
+        extensao = posixpath.splitext(name)[1].lower()
+        nome = nome_por_conteudo(pasta, hash_conteudo(content), extensao)
+
+        if self.exists(nome):
+            # Renova o mtime: reorganizar_fotos só poupa órfãos recentes, e
+            # este arquivo pode ser um órfão antigo prestes a ganhar um pet.
+            try:
+                os.utime(self.path(nome))
+                return nome
+            except FileNotFoundError:
+                pass
+
+        caminho = self.path(nome)
+        diretorio = os.path.dirname(caminho)
+        os.makedirs(diretorio, exist_ok=True)
+        if self.directory_permissions_mode is not None:
+            os.chmod(diretorio, self.directory_permissions_mode)
+
+        # Grava num temporário e renomeia: dois envios simultâneos do mesmo
+        # arquivo apenas substituem um conteúdo idêntico de forma atômica.
+        descritor, temporario = tempfile.mkstemp(dir=diretorio)
+        try:
+            with os.fdopen(descritor, 'wb') as arquivo:
+                for bloco in content.chunks():
+                    arquivo.write(bloco)
+            os.chmod(temporario, self.file_permissions_mode or 0o644)
+            os.replace(temporario, caminho)
+        except BaseException:
+            if os.path.exists(temporario):
+                os.unlink(temporario)
+            raise
+
+        return nome
+
+
+armazenamento_fotos = ArmazenamentoPorConteudo()
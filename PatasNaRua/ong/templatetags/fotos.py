@@ -0,0 +1,17 @@
+from django import template
+
+from ong.fotos import srcset_foto, url_variante
+
+register = template.Library()
+
+
+@register.filter
+def variante(foto, largura):
+    if not foto:
+        return ''
+    return url_variante(foto, int(largura))
+
+
+@register.filter
+def srcset(foto):
+    return srcset_foto(foto)
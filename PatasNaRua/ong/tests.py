@@ -1,3 +1,276 @@
-from django.test import TestCase
+import io
+import json
+import os
+import re
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from cadlog.models import ONG, CustomUser
+from . import busca, fotos
+from .fragmentos import aversao_pet
+from .models import Pet
+from .storage import ArmazenamentoPorConteudo
+
+
+class InfopetOngTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.pet = Pet.objects.create(
+            nome='Rex', especie='Cachorro', porte='Médio', raca='SRD', peso=10, idade=2,
+            sexo='Macho', castrado='Sim'
+        )
+        cls.usuario = CustomUser.objects.create_user(username='ong@exemplo.com', email='ong@exemplo.com', password='x')
+        ONG.objects.create(
+            user=cls.usuario, nome_ong='Patas', cnpj='11.222.333/0001-81', endereco='Rua A',
+            email_institucional='contato@exemplo.com', nome_responsavel='Ana', cpf_responsavel='123.456.789-09'
+        )
+        cls.adotante = CustomUser.objects.create_user(username='adotante@exemplo.com', email='adotante@exemplo.com', password='x')
+
+    def test_renderiza_com_formulario_de_remocao(self):
+        resposta = self.client.get(reverse('infopet_ong', args=[self.pet.id]))
+        self.assertEqual(resposta.status_code, 200)
+        self.assertContains(resposta, reverse('remover_pet', args=[self.pet.id]))
+
+    def test_remover_pet(self):
+        url = reverse('remover_pet', args=[self.pet.id])
+        self.assertEqual(self.client.post(url).status_code, 302)
+        self.assertTrue(Pet.objects.filter(id=self.pet.id).exists())
+
+        self.client.force_login(self.adotante)
+        self.assertEqual(self.client.post(url).status_code, 403)
+        self.assertTrue(Pet.objects.filter(id=self.pet.id).exists())
+
+        self.client.force_login(self.usuario)
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.assertRedirects(self.client.post(url), reverse('tela_user_page'), fetch_redirect_response=False)
+        self.assertFalse(Pet.objects.filter(id=self.pet.id).exists())
+
+
+class ImportarPetsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.adotante = CustomUser.objects.create_user(username='adotante@exemplo.com', email='adotante@exemplo.com', password='x')
+        cls.conta_ong = CustomUser.objects.create_user(username='ong@exemplo.com', email='ong@exemplo.com', password='x')
+        ONG.objects.create(
+            user=cls.conta_ong, nome_ong='Patas', cnpj='11.222.333/0001-81', endereco='Rua A',
+            email_institucional='contato@exemplo.com', nome_responsavel='Ana', cpf_responsavel='123.456.789-09'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.conta_ong)
+
+    def linha(self, **campos):
+        dados = {
+            'nome': 'Rex', 'especie': 'Cachorro', 'porte': 'Médio', 'raca': 'SRD',
+            'peso': 10, 'idade': 2, 'sexo': 'Macho', 'castrado': 'Sim', **campos
+        }
+        return json.dumps(dados, ensure_ascii=False)
+
+    def importar(self, conteudo, nome='pets.jsonl'):
+        arquivo = SimpleUploadedFile(nome, conteudo)
+        return self.client.post(reverse('importar_pets'), {'arquivo': arquivo})
+
+    def test_apenas_contas_de_ong(self):
+        self.client.force_login(self.adotante)
+        resposta = self.importar(self.linha().encode())
+        self.assertEqual(resposta.status_code, 403)
+        self.assertFalse(Pet.objects.exists())
+
+    def test_idade_zero(self):
+        resposta = self.importar(self.linha(idade=0).encode())
+        self.assertEqual(resposta.json()['importados'], 1)
+        self.assertEqual(Pet.objects.get().idade, 0)
+
+    def test_peso_invalido_recusado_por_linha(self):
+        linhas = [self.linha(peso=peso) for peso in ('nan', 'inf', -1, 0, 7.5)]
+        relatorio = self.importar('\n'.join(linhas).encode()).json()
+        self.assertEqual(relatorio['importados'], 1)
+        self.assertEqual([erro['linha'] for erro in relatorio['erros']], [1, 2, 3, 4])
+        self.assertEqual(Pet.objects.get().peso, 7.5)
+
+    def test_arquivo_fora_de_utf8(self):
+        conteudo = (
+            'nome,especie,porte,raca,peso,idade,sexo,castrado\n'
+            'Rex,Cachorro,Médio,SRD,10,2,Macho,Sim\n'
+        ).encode('latin-1')
+        resposta = self.importar(conteudo, 'pets.csv')
+        self.assertEqual(resposta.status_code, 200)
+        relatorio = resposta.json()
+        self.assertEqual(relatorio['importados'], 0)
+        self.assertIn('linha 2 do arquivo', relatorio['erros'][0]['erros'][0])
+
+
+class FotosVariantesTests(TestCase):
+    def setUp(self):
+        self.raiz = tempfile.TemporaryDirectory()
+        self.addCleanup(self.raiz.cleanup)
+        os.makedirs(os.path.join(self.raiz.name, 'fotosPet'))
+        Image.new('RGB', (200, 100)).save(os.path.join(self.raiz.name, 'fotosPet', 'estreita.png'))
+        with open(os.path.join(self.raiz.name, 'fotosPet', 'corrompida.png'), 'wb') as arquivo:
+            arquivo.write(b'nao e imagem')
+        configuracao = override_settings(
+            MEDIA_ROOT=self.raiz.name,
+            FOTOS_VARIANTES_ROOT=os.path.join(self.raiz.name, 'variantes'),
+            FOTOS_VARIANTES_LARGURAS=[160, 320, 640],
+        )
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        fotos.largura_original.cache_clear()
+
+    def test_original_corrompido(self):
+        resposta = self.client.get(reverse('foto_variante', args=[160, 'webp', 'fotosPet/corrompida.png']))
+        self.assertEqual(resposta.status_code, 404)
+
+    def test_srcset_sem_ampliacao(self):
+        foto = Pet(foto='fotosPet/estreita.png').foto
+        srcset = fotos.srcset_foto(foto)
+        self.assertEqual(
+            srcset,
+            f'{fotos.url_variante(foto, 160)} 160w, {fotos.url_variante(foto, 320)} 200w'
+        )
+
+    def test_despejo_desce_abaixo_do_limite(self):
+        pasta = os.path.join(self.raiz.name, 'variantes', 'aa')
+        os.makedirs(pasta)
+        for indice in range(10):
+            caminho = os.path.join(pasta, f'{indice}.webp')
+            with open(caminho, 'wb') as arquivo:
+                arquivo.write(b'x' * 100)
+            os.utime(caminho, (indice, indice))
+
+        self.assertEqual(fotos.despejar_variantes(limite_bytes=1000), 0)
+        with open(os.path.join(pasta, 'novo.webp'), 'wb') as arquivo:
+            arquivo.write(b'x' * 100)
+        self.assertEqual(fotos.despejar_variantes(limite_bytes=1000), 2)
+        self.assertEqual(sorted(os.listdir(pasta))[:2], ['2.webp', '3.webp'])
+
+
+class UploadsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = CustomUser.objects.create_user(username='ana@exemplo.com', email='ana@exemplo.com', password='x')
+        cls.outro = CustomUser.objects.create_user(username='bia@exemplo.com', email='bia@exemplo.com', password='x')
+        imagem = io.BytesIO()
+        Image.new('RGB', (10, 10)).save(imagem, 'PNG')
+        cls.foto = imagem.getvalue()
+
+    def setUp(self):
+        raiz = tempfile.TemporaryDirectory()
+        self.addCleanup(raiz.cleanup)
+        configuracao = override_settings(
+            UPLOADS_ROOT=raiz.name, MEDIA_ROOT=raiz.name, UPLOADS_ABERTOS_POR_USUARIO=2
+        )
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+        self.client = Client(enforce_csrf_checks=True)
+        self.client.force_login(self.usuario)
+        pagina = self.client.get(reverse('cadpet_page')).content.decode()
+        self.token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', pagina).group(1)
+
+    def iniciar(self, cliente=None):
+        return (cliente or self.client).post(
+            reverse('upload_iniciar'), {'nome': 'rex.png', 'tamanho': len(self.foto)},
+            content_type='application/json', headers={'X-CSRFToken': self.token}
+        )
+
+    def test_envio_completo_com_token_csrf(self):
+        upload_id = self.iniciar().json()['upload_id']
+        resposta = self.client.patch(
+            reverse('upload_bloco', args=[upload_id]), self.foto,
+            content_type='application/offset+octet-stream',
+            headers={'Upload-Offset': '0', 'X-CSRFToken': self.token}
+        )
+        self.assertEqual(resposta.json()['offset'], len(self.foto))
+        resposta = self.client.post(
+            reverse('upload_finalizar', args=[upload_id]), headers={'X-CSRFToken': self.token}
+        )
+        self.assertEqual(resposta.status_code, 200)
+
+        resposta = self.client.post(reverse('cadpet_api'), {
+            'csrfmiddlewaretoken': self.token, 'upload_id': upload_id,
+            'nome': 'Rex', 'especie': 'Cachorro', 'porte': 'Médio', 'raca': 'SRD',
+            'peso': '10', 'idade': '2', 'sexo': 'Macho', 'castrado': 'Sim',
+        })
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(Pet.objects.get().foto.name.endswith('.png'))
+
+    def test_sem_token_csrf(self):
+        resposta = self.client.post(
+            reverse('upload_iniciar'), {'nome': 'rex.png', 'tamanho': 10}, content_type='application/json'
+        )
+        self.assertEqual(resposta.status_code, 403)
+
+    def test_exige_login(self):
+        self.assertEqual(self.iniciar(Client()).status_code, 403)
+
+    def test_limite_de_envios_abertos(self):
+        self.assertEqual(self.iniciar().status_code, 201)
+        self.assertEqual(self.iniciar().status_code, 201)
+        self.assertEqual(self.iniciar().status_code, 429)
+
+    def test_envio_de_outro_usuario(self):
+        upload_id = self.iniciar().json()['upload_id']
+        self.client.force_login(self.outro)
+        self.assertEqual(self.client.get(reverse('upload_bloco', args=[upload_id])).status_code, 404)
+
+
+class InvalidacaoFragmentosTests(TestCase):
+    def test_versao_muda_so_no_commit(self):
+        pet = Pet.objects.create(
+            nome='Rex', especie='Cachorro', porte='Médio', raca='SRD', peso=10, idade=2,
+            sexo='Macho', castrado='Sim'
+        )
+        versao = async_to_sync(aversao_pet)(pet.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            pet.nome = 'Thor'
+            pet.save()
+            self.assertEqual(async_to_sync(aversao_pet)(pet.id), versao)
+        self.assertNotEqual(async_to_sync(aversao_pet)(pet.id), versao)
+
+
+class ArmazenamentoPorConteudoTests(TestCase):
+    def test_reenvio_renova_o_mtime(self):
+        with tempfile.TemporaryDirectory() as raiz:
+            armazenamento = ArmazenamentoPorConteudo(location=raiz)
+            nome = armazenamento.save('fotosPet/rex.png', ContentFile(b'foto'))
+            os.utime(armazenamento.path(nome), (0, 0))
+
+            self.assertEqual(armazenamento.save('fotosPet/outro.png', ContentFile(b'foto')), nome)
+            self.assertGreater(os.path.getmtime(armazenamento.path(nome)), 0)
+
+
+class BuscaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for indice, (nome, especie) in enumerate([
+            ('Bolt', 'Cachorro'), ('Luna', 'Gato'), ('Thor', 'Cachorro'), ('Mel', 'Gato'),
+            ('Nina', 'Cachorro'), ('Fred', 'Gato'),
+        ]):
+            Pet.objects.create(
+                nome=nome, especie=especie, porte='Médio', raca='SRD', peso=5, idade=indice,
+                sexo='Macho', castrado='Sim', info='Muito dócil' if indice % 2 else None
+            )
+
+    def buscar(self, consulta, **filtros):
+        return [pet.nome for pet in async_to_sync(busca.abuscar_pets)(consulta, filtros=filtros or None)]
+
+    @mock.patch.object(busca, 'POSTAGENS_POR_TERMO', 2)
+    def test_termo_comum_cortado_nao_esconde_quem_tem_todos(self):
+        self.assertEqual(self.buscar('thor srd')[0], 'Thor')
+        # "docil" tem 3 postagens e "srd" 6, ambos acima do corte: os três com
+        # os dois termos vêm primeiro, depois as postagens mais pesadas de "srd".
+        self.assertEqual(self.buscar('srd dócil'), ['Fred', 'Mel', 'Luna', 'Nina'])
+        self.assertEqual(self.buscar('srd thor', especie='Cachorro')[0], 'Thor')
+        self.assertEqual(self.buscar('thor', especie='Gato'), [])
+
+    def test_sem_corte(self):
+        self.assertEqual(self.buscar('srd dócil')[:3], ['Fred', 'Mel', 'Luna'])
+        self.assertEqual(len(self.buscar('srd')), 6)
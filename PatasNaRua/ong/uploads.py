@@ -0,0 +1,187 @@
+import fcntl
+import json
+import os
+import re
+import secrets
+import time
+
+from django.conf import settings
+from django.core.files import File
+from PIL import Image
+
+TAMANHO_LEITURA = 64 * 1024
+VALIDADE_UPLOAD = 60 * 60 * 24
+_UPLOAD_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+class UploadInvalido(ValueError):
+    pass
+
+
+class UploadNaoEncontrado(LookupError):
+    pass
+
+
+class UploadExcedido(ValueError):
+    pass
+
+
+class UploadsDemais(ValueError):
+    pass
+
+
+class OffsetIncorreto(ValueError):
+    def __init__(self, offset_atual):
+        super().__init__(offset_atual)
+        self.offset_atual = offset_atual
+
+
+def _caminhos(upload_id):
+    if not upload_id or not _UPLOAD_ID.match(upload_id):
+        raise UploadNaoEncontrado(upload_id)
+    base = os.path.join(settings.UPLOADS_ROOT, upload_id)
+    return f'{base}.part', f'{base}.json'
+
+
+def _ler_metadados(upload_id, dono):
+    parte, metadados = _caminhos(upload_id)
+    try:
+        with open(metadados) as arquivo:
+            dados = json.load(arquivo)
+    except FileNotFoundError:
+        raise UploadNaoEncontrado(upload_id)
+    # O envio de outro usuário é tratado como inexistente.
+    if dados.get('dono') != dono:
+        raise UploadNaoEncontrado(upload_id)
+    return dados, parte
+
+
+def _gravar_metadados(upload_id, dados):
+    _, metadados = _caminhos(upload_id)
+    temporario = f'{metadados}.tmp'
+    with open(temporario, 'w') as arquivo:
+        json.dump(dados, arquivo)
+    os.replace(temporario, metadados)
+
+
+def limpar_uploads_expirados(validade=VALIDADE_UPLOAD):
+    limite = time.time() - validade
+    try:
+        entradas = list(os.scandir(settings.UPLOADS_ROOT))
+    except FileNotFoundError:
+        return 0
+
+    removidos = 0
+    for entrada in entradas:
+        try:
+            if entrada.stat().st_mtime < limite:
+                os.unlink(entrada.path)
+                removidos += 1
+        except FileNotFoundError:
+            pass
+    return removidos
+
+
+def uploads_abertos(dono):
+    abertos = 0
+    for entrada in os.scandir(settings.UPLOADS_ROOT):
+        if not entrada.name.endswith('.json'):
+            continue
+        try:
+            with open(entrada.path) as arquivo:
+                abertos += json.load(arquivo).get('dono') == dono
+        except (FileNotFoundError, ValueError):
+            pass
+    return abertos
+
+
+def iniciar_upload(nome, tamanho, dono):
+    nome = os.path.basename(nome or '').strip()
+    if not nome:
+        raise UploadInvalido('Informe o nome do arquivo.')
+    if tamanho <= 0:
+        raise UploadInvalido('Informe o tamanho do arquivo.')
+    if tamanho > settings.UPLOAD_FOTO_LIMITE_BYTES:
+        raise UploadExcedido(settings.UPLOAD_FOTO_LIMITE_BYTES)
+
+    os.makedirs(settings.UPLOADS_ROOT, exist_ok=True)
+    limpar_uploads_expirados()
+    if uploads_abertos(dono) >= settings.UPLOADS_ABERTOS_POR_USUARIO:
+        raise UploadsDemais(settings.UPLOADS_ABERTOS_POR_USUARIO)
+
+    upload_id = secrets.token_hex(16)
+    parte, _ = _caminhos(upload_id)
+    open(parte, 'xb').close()
+    _gravar_metadados(upload_id, {'nome': nome, 'tamanho': tamanho, 'finalizado': False, 'dono': dono})
+    return upload_id
+
+
+def estado_upload(upload_id, dono):
+    dados, parte = _ler_metadados(upload_id, dono)
+    dados['offset'] = os.path.getsize(parte)
+    return dados
+
+
+def anexar_bloco(upload_id, dono, offset, stream, tamanho_bloco=None):
+    dados, parte = _ler_metadados(upload_id, dono)
+    if dados['finalizado']:
+        raise UploadInvalido('Upload já finalizado.')
+    if tamanho_bloco is not None and offset + tamanho_bloco > dados['tamanho']:
+        raise UploadExcedido(dados['tamanho'])
+
+    with open(parte, 'r+b') as arquivo:
+        # Um bloco por vez por upload: um reenvio concorrente do mesmo offset
+        # espera o anterior terminar e então recebe 409 com o offset atual.
+        fcntl.flock(arquivo, fcntl.LOCK_EX)
+        atual = os.fstat(arquivo.fileno()).st_size
+        if offset != atual:
+            raise OffsetIncorreto(atual)
+
+        arquivo.seek(atual)
+        recebido = atual
+        while True:
+            bloco = stream.read(TAMANHO_LEITURA)
+            if not bloco:
+                break
+            recebido += len(bloco)
+            # O limite é checado a cada leitura, então um envio maior que o
+            # declarado é cortado sem que o restante seja gravado.
+            if recebido > dados['tamanho']:
+                arquivo.truncate(atual)
+                raise UploadExcedido(dados['tamanho'])
+            arquivo.write(bloco)
+
+    return recebido
+
+
+def finalizar_upload(upload_id, dono):
+    dados, parte = _ler_metadados(upload_id, dono)
+    recebido = os.path.getsize(parte)
+    if recebido != dados['tamanho']:
+        raise OffsetIncorreto(recebido)
+
+    try:
+        with Image.open(parte) as imagem:
+            imagem.verify()
+    except Exception:
+        descartar_upload(upload_id)
+        raise UploadInvalido('O arquivo enviado não é uma imagem válida.')
+
+    dados['finalizado'] = True
+    _gravar_metadados(upload_id, dados)
+    return dados
+
+
+def abrir_upload(upload_id, dono):
+    dados, parte = _ler_metadados(upload_id, dono)
+    if not dados['finalizado']:
+        raise UploadInvalido('Upload ainda não finalizado.')
+    return File(open(parte, 'rb'), name=dados['nome'])
+
+
+def descartar_upload(upload_id):
+    for caminho in _caminhos(upload_id):
+        try:
+            os.unlink(caminho)
+        except FileNotFoundError:
+            pass
@@ -1,16 +1,19 @@
 from django.urls import path
 from . import views
-from django.conf import settings
-from django.conf.urls.static import static
 
 urlpatterns = [
     path('cadastro-pet/', views.cadpet_page, name='cadpet_page'),
     path('api/cadpet/', views.cadpet_view, name='cadpet_api'),
+    path('api/pets/importar/', views.importar_pets_view, name='importar_pets'),
+    path('api/uploads/', views.upload_iniciar, name='upload_iniciar'),
+    path('api/uploads/<str:upload_id>/', views.upload_bloco, name='upload_bloco'),
+    path('api/uploads/<str:upload_id>/finalizar/', views.upload_finalizar, name='upload_finalizar'),
     path('pet/<int:pet_id>/infopet-ong/', views.infopet_ong, name='infopet_ong'),
     path('infopet-ong/', views.infopet_ong, name='infopet_ong'),
     path('localpet-ong/', views.localpet_ong, name='localpet_ong'),
+    path('api/proximos/', views.proximos_api, name='proximos_api'),
     path('pet/<int:pet_id>/editar/', views.editar_pet, name='editar_pet'),
+    path('pet/<int:pet_id>/remover/', views.remover_pet, name='remover_pet'),
+    path('foto/<int:largura>/<str:formato>/<path:nome>', views.foto_variante, name='foto_variante'),
+    path('api/fragmentos/estatisticas/', views.fragmentos_estatisticas, name='fragmentos_estatisticas'),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
@@ -1,19 +1,111 @@
-from django.shortcuts import render, get_object_or_404, redirect
-from rest_framework.decorators import api_view
+from django.shortcuts import render, aget_object_or_404, get_object_or_404, redirect
+from django.http import Http404
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.core.exceptions import PermissionDenied
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from cadlog.models import ONG
+from PatasNaRua.midia import responder_arquivo
+from .campos import converter_idade, converter_peso
+from .catalogo import CATALOGO_CAMPOS, filtrar_catalogo, serializar_card
+from .fotos import VarianteInvalida, mime_variante, obter_variante
+from .fragmentos import afragmento_pet, estatisticas_fragmentos
+from .geo import RAIO_MAXIMO, CoordenadaInvalida, mais_proximos, no_raio, validar_coordenadas
+from .importacao import FormatoInvalido, formato_do_arquivo, importar_pets
 from .models import Pet
+from .permissoes import ContaOng, e_ong_ou_equipe
+from .revalidacao import marcar_validadores, revalidar_pet, validadores_pet
+from .storage import e_nome_por_conteudo
+from .uploads import (
+    OffsetIncorreto, UploadExcedido, UploadInvalido, UploadNaoEncontrado, UploadsDemais,
+    abrir_upload, anexar_bloco, descartar_upload, estado_upload, finalizar_upload,
+    iniciar_upload
+)
+import io
+import os
+import zipfile
 from rest_framework import status
 
+PROXIMOS_PADRAO = 10
+PROXIMOS_MAXIMO = 50
+CAMPOS_ONG_PROXIMA = ("id", "nome_ong", "endereco")
+
 def cadpet_page(request):
     return render(request, "cadpet.html")
 
-def infopet_ong(request, pet_id):
-    pet = get_object_or_404(Pet, id=pet_id)
-    return render(request, "infopet_ong.html", {"pet": pet})
+@revalidar_pet
+async def infopet_ong(request, pet_id):
+    fragmento = await afragmento_pet(
+        request, "fragmento_infopet_ong.html", pet_id,
+        lambda: aget_object_or_404(Pet, id=pet_id)
+    )
+    return render(request, "infopet_ong.html", {"pet_id": pet_id, "fragmento_pet": fragmento})
+
+@require_GET
+def foto_variante(request, largura, formato, nome):
+    try:
+        caminho = obter_variante(nome, largura, formato)
+    except (VarianteInvalida, FileNotFoundError):
+        raise Http404("Foto não encontrada.")
+
+    # O mtime da variante muda a cada acesso (despejo por LRU); a ETag vem do
+    # nome, que já identifica original, largura e formato.
+    etag = f'"{os.path.basename(caminho).replace(".", "-")}"'
+    return responder_arquivo(
+        request, caminho, mime_variante(formato), etag=etag, imutavel=e_nome_por_conteudo(nome)
+    )
 
 def localpet_ong(request):
     return render(request, "localpet.html")
 
+@api_view(["GET"])
+def proximos_api(request):
+    try:
+        latitude, longitude = validar_coordenadas(
+            request.query_params.get("lat"), request.query_params.get("lng")
+        )
+    except CoordenadaInvalida:
+        return Response(
+            {"erro": "Informe lat e lng válidos."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        k = max(1, min(int(request.query_params.get("k", PROXIMOS_PADRAO)), PROXIMOS_MAXIMO))
+        raio = request.query_params.get("raio")
+        raio = max(1.0, min(float(raio), RAIO_MAXIMO)) if raio else None
+    except ValueError:
+        return Response(
+            {"erro": "Os campos k e raio devem ser numeros."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    pets = filtrar_catalogo(request.query_params)
+    if "status" not in request.query_params:
+        pets = pets.filter(status="Disponível")
+    ongs = ONG.objects.all()
+
+    if raio:
+        pets = no_raio(pets, latitude, longitude, raio, limite=k, campos=CATALOGO_CAMPOS)
+        ongs = no_raio(ongs, latitude, longitude, raio, limite=k, campos=CAMPOS_ONG_PROXIMA)
+    else:
+        pets = mais_proximos(pets, latitude, longitude, k, campos=CATALOGO_CAMPOS)
+        ongs = mais_proximos(ongs, latitude, longitude, k, campos=CAMPOS_ONG_PROXIMA)
+
+    return Response({
+        "pets": [
+            {**serializar_card(pet), "distancia": round(distancia)}
+            for distancia, pet in pets
+        ],
+        "ongs": [
+            {"id": ong.id, "nome": ong.nome_ong, "endereco": ong.endereco, "distancia": round(distancia)}
+            for distancia, ong in ongs
+        ],
+    })
+
 @api_view(["POST"])
 def cadpet_view(request):
     nome = request.data.get("nome")
@@ -25,6 +117,7 @@ def cadpet_view(request):
     sexo = request.data.get("sexo")
     info = request.data.get("info")
     foto = request.FILES.get("foto")
+    upload_id = request.data.get("upload_id")
     historico_saude = request.data.get("historico_saude")
     castrado = request.data.get("castrado")
 
@@ -32,11 +125,8 @@ def cadpet_view(request):
         peso_str = request.data.get("peso")
         idade_str = request.data.get("idade")
 
-        if peso_str:
-            peso = float(peso_str.strip().replace(',', '.')) 
-
-        if idade_str:
-            idade = int(idade_str.strip())
+        peso = converter_peso(peso_str)
+        idade = converter_idade(idade_str)
 
     except ValueError:
         return Response(
@@ -44,12 +134,32 @@ def cadpet_view(request):
             status=status.HTTP_400_BAD_REQUEST
     )
 
-    if not all([nome, especie, porte, raca, sexo, castrado, foto]) or peso is None or idade is None:
+    latitude = longitude = None
+    if request.data.get("latitude") or request.data.get("longitude"):
+        try:
+            latitude, longitude = validar_coordenadas(
+                request.data.get("latitude"), request.data.get("longitude")
+            )
+        except CoordenadaInvalida:
+            return Response(
+                {"erro": "Latitude e longitude inválidas."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+    if not all([nome, especie, porte, raca, sexo, castrado]) or not (foto or upload_id) or peso is None or idade is None:
         return Response(
             {"erro": "Preencha todos os campos obrigatórios: Nome, Espécie, Porte, Raça, Peso, Idade, Sexo, Castrado e Foto."},
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    if not foto:
+        try:
+            foto = abrir_upload(upload_id, request.user.pk)
+        except (UploadNaoEncontrado, UploadInvalido):
+            return Response(
+                {"erro": "Envio da foto não encontrado ou incompleto."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
     pet = Pet.objects.create(
         nome=nome,
@@ -62,10 +172,16 @@ def cadpet_view(request):
         info=info,
         foto=foto,
         historico_saude = historico_saude,
-        castrado=castrado
+        castrado=castrado,
+        latitude=latitude,
+        longitude=longitude
     )
 
-    return Response({
+    if upload_id and not request.FILES.get("foto"):
+        foto.close()
+        descartar_upload(upload_id)
+
+    resposta = Response({
         "status": "ok",
         "mensagem": "Pet cadastrado com sucesso",
         "dados": {
@@ -80,9 +196,115 @@ def cadpet_view(request):
             "info": pet.info,
             "castrado": pet.castrado,
             "historico_saude": pet.historico_saude,
-            "foto": pet.foto.url if pet.foto else None
+            "foto": pet.foto.url if pet.foto else None,
+            "atualizado_em": pet.atualizado_em.isoformat()
         }
     })
+    return marcar_validadores(resposta, *validadores_pet(pet.id, pet.atualizado_em))
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def upload_iniciar(request):
+    try:
+        tamanho = int(request.data.get("tamanho", 0))
+    except (TypeError, ValueError):
+        tamanho = 0
+
+    try:
+        upload_id = iniciar_upload(request.data.get("nome"), tamanho, request.user.pk)
+    except UploadExcedido as e:
+        return Response(
+            {"erro": f"A foto deve ter no máximo {e.args[0]} bytes."},
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+    except UploadsDemais as e:
+        return Response(
+            {"erro": f"Conclua ou aguarde expirar um dos {e.args[0]} envios em aberto."},
+            status=status.HTTP_429_TOO_MANY_REQUESTS
+        )
+    except UploadInvalido as e:
+        return Response({"erro": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({"upload_id": upload_id, "offset": 0}, status=status.HTTP_201_CREATED)
+
+@api_view(["GET", "PATCH"])
+@permission_classes([IsAuthenticated])
+def upload_bloco(request, upload_id):
+    try:
+        if request.method == "GET":
+            return Response(estado_upload(upload_id, request.user.pk))
+
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+            tamanho_bloco = int(request.headers.get("Content-Length", ""))
+        except ValueError:
+            return Response(
+                {"erro": "Os cabeçalhos Upload-Offset e Content-Length são obrigatórios."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        offset = anexar_bloco(upload_id, request.user.pk, offset, request.stream or io.BytesIO(), tamanho_bloco)
+    except UploadNaoEncontrado:
+        return Response({"erro": "Envio não encontrado."}, status=status.HTTP_404_NOT_FOUND)
+    except OffsetIncorreto as e:
+        return Response(
+            {"erro": "Offset fora de ordem.", "offset": e.offset_atual},
+            status=status.HTTP_409_CONFLICT
+        )
+    except UploadExcedido as e:
+        return Response(
+            {"erro": f"O envio excede o tamanho declarado de {e.args[0]} bytes."},
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+    except UploadInvalido as e:
+        return Response({"erro": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({"upload_id": upload_id, "offset": offset})
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def upload_finalizar(request, upload_id):
+    try:
+        dados = finalizar_upload(upload_id, request.user.pk)
+    except UploadNaoEncontrado:
+        return Response({"erro": "Envio não encontrado."}, status=status.HTTP_404_NOT_FOUND)
+    except OffsetIncorreto as e:
+        return Response(
+            {"erro": "O envio ainda não está completo.", "offset": e.offset_atual},
+            status=status.HTTP_409_CONFLICT
+        )
+    except UploadInvalido as e:
+        return Response({"erro": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({"upload_id": upload_id, "tamanho": dados["tamanho"]})
+
+@api_view(["POST"])
+@permission_classes([ContaOng])
+def importar_pets_view(request):
+    arquivo = request.FILES.get("arquivo")
+    if not arquivo:
+        return Response(
+            {"erro": "Envie o arquivo CSV ou JSONL no campo arquivo."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        formato = formato_do_arquivo(arquivo.name, request.data.get("formato"))
+    except FormatoInvalido:
+        return Response(
+            {"erro": "Formato inválido. Use CSV ou JSONL."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        relatorio = importar_pets(arquivo, formato, fotos=request.FILES.get("fotos"))
+    except zipfile.BadZipFile:
+        return Response(
+            {"erro": "O arquivo de fotos deve ser um zip válido."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return Response({"status": "ok", **relatorio})
 
 def editar_pet(request, pet_id):
     pet = get_object_or_404(Pet, id=pet_id)
@@ -104,4 +326,19 @@ def editar_pet(request, pet_id):
         pet.save()
         return redirect('detalhes_pet', pet_id=pet.id)
 
-    return render(request, 'editar_pet.html', {'pet': pet})
\ No newline at end of file
+    return render(request, 'editar_pet.html', {'pet': pet})
+
+@login_required
+@require_POST
+def remover_pet(request, pet_id):
+    if not e_ong_ou_equipe(request.user):
+        raise PermissionDenied
+    pet = get_object_or_404(Pet, id=pet_id)
+    pet.delete()
+    messages.success(request, f'Pet {pet.nome} removido.')
+    return redirect('tela_user_page')
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def fragmentos_estatisticas(request):
+    return Response(estatisticas_fragmentos())
@@ -0,0 +1,112 @@
+document.addEventListener("DOMContentLoaded", () => {
+    const CATALOGO_URL = window.CATALOGO_URL || "/api/pets/";
+    const DETALHES_URL = window.DETALHES_URL || "/pet/0/";
+    const BUSCA_URL = window.BUSCA_URL || "/api/pets/busca/";
+
+    function criarCard(pet) {
+        const card = document.createElement("div");
+        card.classList.add("swiper-slide", "pet-card");
+
+        if (pet.foto) {
+            const img = document.createElement("img");
+            img.src = pet.foto;
+            img.srcset = pet.foto_srcset;
+            img.sizes = "200px";
+            img.alt = pet.nome;
+            img.loading = "lazy";
+            card.appendChild(img);
+        }
+
+        const nome = document.createElement("h4");
+        nome.textContent = pet.nome;
+        const raca = document.createElement("p");
+        raca.textContent = `Raça: ${pet.raca}`;
+        const idade = document.createElement("p");
+        idade.textContent = `Idade: ${pet.idade}`;
+        const link = document.createElement("a");
+        link.href = DETALHES_URL.replace(/0\/$/, `${pet.id}/`);
+        link.classList.add("info-btn");
+        link.textContent = "Mais informações";
+
+        card.append(nome, raca, idade, link);
+        return card;
+    }
+
+    document.querySelectorAll(".swiper-container").forEach(slider => {
+        let carregando = false;
+
+        const swiper = new Swiper(slider, {
+            pagination: {
+                el: slider.querySelector(".swiper-pagination"),
+                clickable: true,
+            },
+            slidesPerView: 2,
+            spaceBetween: 20,
+        });
+
+        async function carregarProximaPagina() {
+            const proximo = slider.dataset.proximo;
+            if (carregando || !proximo) {
+                return;
+            }
+            carregando = true;
+
+            const params = new URLSearchParams({
+                especie: slider.dataset.especie,
+                status: "Disponível",
+                cursor: proximo,
+            });
+
+            try {
+                const response = await fetch(`${CATALOGO_URL}?${params}`);
+                const data = await response.json();
+                if (response.ok) {
+                    swiper.appendSlide(data.resultados.map(criarCard));
+                    slider.dataset.proximo = data.proximo || "";
+                } else {
+                    console.error("Erro ao carregar pets:", data.erro);
+                }
+            } catch (error) {
+                console.error("Erro de rede:", error);
+            } finally {
+                carregando = false;
+            }
+        }
+
+        swiper.on("reachEnd", carregarProximaPagina);
+    });
+
+    const campoBusca = document.querySelector(".search-input");
+    const secaoResultados = document.querySelector(".search-results");
+    const listaResultados = document.querySelector(".search-results-list");
+    let temporizadorBusca = null;
+
+    async function pesquisar(consulta) {
+        if (!consulta) {
+            secaoResultados.hidden = true;
+            listaResultados.innerHTML = "";
+            return;
+        }
+
+        try {
+            const response = await fetch(`${BUSCA_URL}?${new URLSearchParams({ q: consulta })}`);
+            const data = await response.json();
+            listaResultados.innerHTML = "";
+            if (data.resultados.length) {
+                listaResultados.append(...data.resultados.map(criarCard));
+            } else {
+                listaResultados.textContent = "Nenhum pet encontrado.";
+            }
+            secaoResultados.hidden = false;
+        } catch (error) {
+            console.error("Erro de rede:", error);
+        }
+    }
+
+    if (campoBusca) {
+        campoBusca.addEventListener("input", () => {
+            clearTimeout(temporizadorBusca);
+            temporizadorBusca = setTimeout(() => pesquisar(campoBusca.value.trim()), 250);
+        });
+    }
+});
@@ -1,3 +1,39 @@
+import json
+
 from django.test import TestCase
+from django.urls import reverse
+
+from ong.models import Pet
+
+
+class ExportarPetsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Pet.objects.create(
+            nome='Rex', especie='Cachorro', porte='Médio', raca='SRD', peso=10,
+            idade=2, sexo='Macho', castrado='Sim'
+        )
+
+    def exportar(self, **params):
+        resposta = self.client.get(reverse('exportar_pets'), params)
+        linhas = b''.join(resposta.streaming_content).decode().splitlines()
+        return resposta, [json.loads(linha) for linha in linhas]
+
+    def test_updated_since_sem_fuso_e_tratado_como_utc(self):
+        resposta, pets = self.exportar(updated_since='2000-01-01T00:00:00')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual([pet['nome'] for pet in pets], ['Rex'])
+
+        _, pets = self.exportar(updated_since='2999-01-01T00:00:00')
+        self.assertEqual(pets, [])
+
+    def test_updated_since_invalido(self):
+        resposta = self.client.get(reverse('exportar_pets'), {'updated_since': 'ontem'})
+        self.assertEqual(resposta.status_code, 400)
 
-# Create your tests here.
+    async def test_exportacao_assincrona_no_asgi(self):
+        resposta = await self.async_client.get(reverse('exportar_pets'), {'formato': 'csv'})
+        self.assertTrue(resposta.is_async)
+        linhas = b''.join([parte async for parte in resposta.streaming_content]).decode().splitlines()
+        self.assertEqual(len(linhas), 2)
+        self.assertIn('Rex', linhas[1])
@@ -6,4 +6,7 @@ from django.conf.urls.static import static
 urlpatterns = [
     path('tela-user/', views.tela_user_page, name='tela_user_page'),
     path('pet/<int:pet_id>/', views.detalhes_pet, name='detalhes_pet'),
-]
\ No newline at end of file
+    path('api/pets/', views.catalogo_api, name='catalogo_api'),
+    path('api/pets/busca/', views.busca_api, name='busca_api'),
+    path('api/pets/exportar/', views.exportar_pets, name='exportar_pets'),
+]
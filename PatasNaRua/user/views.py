@@ -1,12 +1,100 @@
-from django.shortcuts import render, get_object_or_404
-from rest_framework.decorators import api_view
-from rest_framework.response import Response
-from rest_framework import status
+import datetime
+
+from django.shortcuts import render, aget_object_or_404
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET
+from ong.busca import BUSCA_LIMITE_MAXIMO, BUSCA_LIMITE_PADRAO, abuscar_pets
+from ong.catalogo import (
+    CursorInvalido, apagina_catalogo, filtrar_catalogo, filtros_catalogo, limite_catalogo,
+    serializar_card
+)
+from ong.exportacao import FORMATOS_EXPORTACAO, agerar_exportacao, gerar_exportacao
+from ong.fragmentos import afragmento_pet
 from ong.models import Pet
+from ong.revalidacao import revalidar_pet
+
+CARROSSEIS = (
+    ('dogs', 'Cachorro'),
+    ('cats', 'Gato'),
+)
+
+# As páginas e APIs de leitura são assíncronas: no ASGI uma consulta lenta
+# ou um cliente lento não prende uma thread do servidor.
+async def tela_user_page(request):
+    contexto = {}
+    for chave, especie in CARROSSEIS:
+        pets, proximo = await apagina_catalogo(
+            filtrar_catalogo({'especie': especie, 'status': 'Disponível'})
+        )
+        contexto[chave] = pets
+        contexto[f'{chave}_proximo'] = proximo
+    return render(request, "tela_user.html", contexto)
+
+@revalidar_pet
+async def detalhes_pet(request, pet_id):
+    fragmento = await afragmento_pet(
+        request, "fragmento_detalhes_pet.html", pet_id,
+        lambda: aget_object_or_404(Pet, id=pet_id)
+    )
+    return render(request, "detalhes_pet.html", {"pet_id": pet_id, "fragmento_pet": fragmento})
+
+# O APIView do DRF não roda views assíncronas, então as APIs do catálogo
+# respondem com JsonResponse, no mesmo formato de antes.
+@require_GET
+async def catalogo_api(request):
+    queryset = filtrar_catalogo(request.GET)
+    limite = limite_catalogo(request.GET.get("limite"))
+
+    try:
+        pets, proximo = await apagina_catalogo(queryset, request.GET.get("cursor"), limite)
+    except CursorInvalido:
+        return JsonResponse({"erro": "Cursor de paginação inválido."}, status=400)
+
+    return JsonResponse({
+        "resultados": [serializar_card(pet) for pet in pets],
+        "proximo": proximo,
+    })
+
+@require_GET
+async def busca_api(request):
+    consulta = request.GET.get("q", "").strip()
+    if not consulta:
+        return JsonResponse({"resultados": []})
+
+    try:
+        limite = int(request.GET.get("limite", BUSCA_LIMITE_PADRAO))
+    except ValueError:
+        limite = BUSCA_LIMITE_PADRAO
+    limite = max(1, min(limite, BUSCA_LIMITE_MAXIMO))
+
+    pets = await abuscar_pets(consulta, limite=limite, filtros=filtros_catalogo(request.GET))
+    return JsonResponse({"resultados": [serializar_card(pet) for pet in pets]})
+
+@require_GET
+def exportar_pets(request):
+    formato = request.GET.get("formato", "ndjson").lower()
+    if formato not in FORMATOS_EXPORTACAO:
+        return JsonResponse({"erro": "Formato inválido. Use ndjson ou csv."}, status=400)
+
+    queryset = filtrar_catalogo(request.GET)
 
-def tela_user_page(request):
-    return render(request, "tela_user.html")
+    updated_since = request.GET.get("updated_since", "").strip()
+    if updated_since:
+        data = parse_datetime(updated_since.replace(" ", "+"))
+        if data is None:
+            return JsonResponse({"erro": "updated_since deve estar no formato ISO 8601."}, status=400)
+        if timezone.is_naive(data):
+            data = timezone.make_aware(data, datetime.timezone.utc)
+        queryset = queryset.filter(atualizado_em__gt=data)
 
-def detalhes_pet(request, pet_id):
-    pet = get_object_or_404(Pet, id=pet_id)
-    return render(request, "detalhes_pet.html", {"pet": pet})
+    # No ASGI o corpo precisa vir de um gerador assíncrono para sair em lotes.
+    gerar = agerar_exportacao if isinstance(request, ASGIRequest) else gerar_exportacao
+    response = StreamingHttpResponse(
+        gerar(queryset, formato),
+        content_type=f"{FORMATOS_EXPORTACAO[formato]}; charset=utf-8"
+    )
+    response["Content-Disposition"] = f'attachment; filename="pets.{formato}"'
+    return response